@@ -2,9 +2,36 @@
 
 """amorty"""
 
-from amorty.loan import Annuity, StraightLine
-from amorty.loan_format import TableFormat, ExcelFormat
+from amorty.loan import Annuity, Prepayment, RateReset, StraightLine
 
-__all__ = ['Annuity', 'StraightLine', 'TableFormat', 'ExcelFormat']
+__all__ = [
+    'Annuity',
+    'Prepayment',
+    'RateReset',
+    'StraightLine',
+    'TableFormat',
+    'ExcelFormat',
+    'CSVFormat',
+    'JSONLFormat',
+    'ParquetFormat',
+]
 
 __version__ = '0.1.1'
+
+# The formats are imported on first access, so that the loans can be used
+# without loading the modules of the output formats
+_LAZY_ATTRIBUTES = {
+    'TableFormat': 'amorty.loan_format',
+    'ExcelFormat': 'amorty.loan_format',
+    'CSVFormat': 'amorty.loan_format',
+    'JSONLFormat': 'amorty.loan_format',
+    'ParquetFormat': 'amorty.loan_format',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,21 +1,91 @@
 """The main entry point."""
 
 import argparse
-from typing import List, Type, Union
+import contextlib
+import os
+import sys
+from typing import IO, TYPE_CHECKING, Dict, Iterator, List, Optional, Type, Union
 
-from amorty.loan import Annuity, StraightLine
-from amorty.loan_format import ExcelFormat, TableFormat
+from amorty import profiling, utils
+from amorty.date import CALENDARS
+from amorty.daycount import DAY_COUNTS
+from amorty.loan import Annuity, StraightLine, get_loan_type
+from amorty.loan_format import (
+    CSVFormat,
+    ExcelFormat,
+    ExcelPortfolioFormat,
+    Format,
+    JSONLFormat,
+    ParquetFormat,
+    TableFormat,
+)
 
+if TYPE_CHECKING:
+    from amorty.portfolio import LoanSchedule, LoanSpec
 
-def main() -> None:
+FORMATS: Dict[str, Type[Format]] = {
+    "table": TableFormat,
+    "excel": ExcelFormat,
+    "csv": CSVFormat,
+    "jsonl": JSONLFormat,
+    "parquet": ParquetFormat,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
     """Run application."""
-    args = get_arguments()
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["batch"]:
+        args = create_batch_parser().parse_args(argv[1:])
+        with profile_run(args.profile):
+            run_batch(args)
+        return
+    if argv[:1] == ["export"]:
+        args = create_export_parser().parse_args(argv[1:])
+        with profile_run(args.profile):
+            run_export(args)
+        return
+    if argv[:1] == ["serve"]:
+        run_server(create_serve_parser().parse_args(argv[1:]))
+        return
+    args = get_arguments(argv)
+    with profile_run(args.profile):
+        run_schedule(args)
+
+
+def run_schedule(args) -> None:
+    """Writes the schedule of the loan in the requested format."""
     headers = get_headers()
     loan_method = set_loan_method(args.method)
-    loan = loan_method(args.amount, args.period, args.rate, args.date)
+    loan = loan_method(
+        args.amount,
+        args.period,
+        args.rate,
+        args.date,
+        calendar=args.calendar,
+        day_count=args.day_count,
+    )
     format_type = set_format(args.format)
-    formatter = format_type(loan.create_loan(), headers)
-    formatter.write()
+    # The progress bar is not shown, when the rows are written to the terminal
+    to_file = args.output is not None or format_type in (ExcelFormat, ParquetFormat)
+    progress = utils.create_progress("Writing", loan.period, args.quiet or not to_file)
+    rows = profiling.counted("rows written", loan.create_loan())
+    formatter = format_type(rows, headers, args.output, progress)
+    with profiling.timer("rendering"):
+        formatter.write()
+    if isinstance(formatter, (ExcelFormat, ParquetFormat)) and not args.quiet:
+        print(f"The file has been saved to '{formatter.output}'")
+
+
+@contextlib.contextmanager
+def profile_run(enabled: bool) -> Iterator[None]:
+    """Prints the time of the stages and the counters to stderr, if enabled."""
+    if not enabled:
+        yield
+        return
+    with profiling.profile() as stats:
+        yield
+    print(stats.format_summary(), file=sys.stderr)
 
 
 def get_headers() -> List[str]:
@@ -23,30 +93,157 @@ def get_headers() -> List[str]:
     return ["Date", "Days", "Principal", "Interest", "Payment", "Balance"]
 
 
-def get_arguments():
+def get_arguments(argv: Optional[List[str]] = None):
     """Parse the arguments."""
     parser = create_parser()
-    return parser.parse_args()
+    return parser.parse_args(argv)
+
+
+def run_batch(args) -> None:
+    """Streams the schedules of the loans from the input to the output.
+
+    The loans are read, amortized and written one by one, so the memory
+    does not depend on the number of loans.
+    """
+    from amorty import portfolio
+
+    with open_file(args.input, "r") as input_file:
+        specs = read_input_specs(input_file, args)
+        schedules = portfolio.amortize_portfolio(specs, workers=args.workers)
+        write_schedules(schedules, args)
+
+
+def run_export(args) -> None:
+    """Writes the schedule of every loan from the input to its own file."""
+    from amorty import export
+
+    with open_file(args.input, "r") as input_file:
+        paths = export.export_schedules(
+            read_input_specs(input_file, args),
+            args.output_dir,
+            args.format,
+            workers=args.workers,
+            writers=args.writers,
+            queue_size=args.queue_size,
+            header=get_headers(),
+            progress=utils.create_progress("Loans exported", quiet=args.quiet),
+        )
+    profiling.count("files written", len(paths))
+    if not args.quiet:
+        print(f"{len(paths)} files have been saved to '{args.output_dir}'")
+
+
+def read_input_specs(input_file: IO[str], args) -> Iterator["LoanSpec"]:
+    """Reads the loans with the default calendar and day count of the args."""
+    from amorty import portfolio
+
+    input_format = get_file_format(args.input, args.input_format, "csv")
+    readers = {"csv": portfolio.read_csv, "jsonl": portfolio.read_jsonl}
+    return (
+        spec._replace(
+            calendar=spec.calendar or args.calendar,
+            day_count=spec.day_count or args.day_count,
+        )
+        for spec in readers[input_format](input_file)
+    )
+
+
+def run_server(args) -> None:
+    """Serves the schedules over HTTP until it is interrupted."""
+    import asyncio
+
+    from amorty import server
+
+    schedule_server = server.ScheduleServer(
+        workers=args.workers, cache_size=args.cache_size, max_batch=args.max_batch
+    )
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(
+            server.serve(schedule_server, args.host, args.port, args.socket, args.quiet)
+        )
+
+
+def write_schedules(schedules: Iterator["LoanSchedule"], args) -> None:
+    """Writes the schedules to the output in the requested format."""
+    from amorty import portfolio
+
+    output_format = get_file_format(args.output, args.output_format, "jsonl")
+    quiet = args.quiet or args.output == "-"
+    progress = utils.create_progress("Loans written", quiet=quiet)
+    schedules = profiling.counted("loans written", schedules)
+    formatter: Format
+    if output_format == "xlsx":
+        if args.output == "-":
+            raise ValueError("Excel output requires a file path")
+        formatter = ExcelPortfolioFormat(
+            schedules, get_headers(), args.output, args.excel_layout, progress
+        )
+    else:
+        format_type = CSVFormat if output_format == "csv" else JSONLFormat
+        formatter = format_type(
+            (
+                portfolio.LoanSchedule(spec, profiling.counted("rows written", rows))
+                for spec, rows in schedules
+            ),
+            list(portfolio.SCHEDULE_FIELDS),
+            None if args.output == "-" else args.output,
+            progress,
+            loan_ids=True,
+        )
+    with stop_on_closed_stdout():
+        with profiling.timer("rendering"):
+            formatter.write()
+        sys.stdout.flush()
+
+
+@contextlib.contextmanager
+def stop_on_closed_stdout() -> Iterator[None]:
+    """Exits quietly, when the reader of stdout is closed, as head does.
+
+    The rest of the output is redirected to devnull, so that it is not
+    flushed to the closed pipe again at the exit.
+    """
+    try:
+        yield
+    except BrokenPipeError:
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
+
+
+def get_file_format(path: str, format_name: Optional[str], default: str) -> str:
+    """Returns the explicit format or the one of the file extension."""
+    if format_name:
+        return format_name
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("csv", "jsonl", "xlsx"):
+        return extension
+    return default
+
+
+@contextlib.contextmanager
+def open_file(path: str, mode: str) -> Iterator[IO[str]]:
+    """Opens the file or uses the standard stream for "-"."""
+    if path == "-":
+        yield sys.stdin if "r" in mode else sys.stdout
+        return
+    with open(path, mode, newline="") as file:
+        yield file
 
 
 def set_loan_method(method: str) -> Union[Type["Annuity"], Type["StraightLine"]]:
     """Set type of the loan."""
-    annuity_methods = ("a", "ann", "annuity")
-    straight_line_methods = ("s", "straight-line", "str", "sl")
-    if method in annuity_methods:
-        return Annuity
-    elif method in straight_line_methods:
-        return StraightLine
-    raise AttributeError(f"Invalid method option: {method}")
+    try:
+        return get_loan_type(method)
+    except ValueError as error:
+        raise AttributeError(str(error)) from None
 
 
-def set_format(format_name: str) -> Union[Type["TableFormat"], Type["ExcelFormat"]]:
+def set_format(format_name: str) -> Type[Format]:
     """Set output format."""
-    if format_name == "table":
-        return TableFormat
-    elif format_name == "excel":
-        return ExcelFormat
-    raise AttributeError(f"Invalid format option: {format}")
+    if format_name not in FORMATS:
+        raise AttributeError(f"Invalid format option: {format_name}")
+    return FORMATS[format_name]
 
 
 def create_parser():
@@ -97,7 +294,239 @@ def create_parser():
         "--format",
         type=str,
         default="table",
-        help="The amortization schedule output format (table, excel)",
+        help="The amortization schedule output format (table, excel, csv, jsonl, parquet)",
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="Output file (~/Downloads/loan.xlsx by default for excel)",
+    )
+
+    add_convention_arguments(parser)
+
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Do not show the progress and the messages",
+    )
+
+    add_profile_argument(parser)
+    return parser
+
+
+def add_convention_arguments(parser: argparse.ArgumentParser) -> None:
+    """Adds the calendar and the day count options to the parser."""
+    parser.add_argument(
+        "-c",
+        "--calendar",
+        type=str,
+        help=f"Calendar of business days ({', '.join(CALENDARS)} or a file), RU by default",
+    )
+
+    day_counts = ", ".join(
+        dict.fromkeys(day_count.name for day_count in DAY_COUNTS.values())
+    )
+    parser.add_argument(
+        "--day-count",
+        type=str,
+        help=f"Day count convention ({day_counts}), ACT/ACT by default",
+    )
+
+
+def add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the time of the pipeline stages and the counters to stderr",
+    )
+
+
+def create_batch_parser():
+    """Creates a parser object for the batch mode."""
+    parser = argparse.ArgumentParser(
+        prog="amorty batch", description="Amortize a stream of loans"
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        default="-",
+        type=str,
+        help='CSV or JSON Lines file with the loans, "-" for stdin',
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="-",
+        type=str,
+        help='CSV, JSON Lines or Excel file for the schedules, "-" for stdout',
+    )
+
+    parser.add_argument(
+        "--input-format",
+        choices=("csv", "jsonl"),
+        help="Input format (by the file extension, csv for stdin)",
+    )
+
+    parser.add_argument(
+        "--output-format",
+        choices=("csv", "jsonl", "xlsx"),
+        help="Output format (by the file extension, jsonl for stdout)",
+    )
+
+    parser.add_argument(
+        "--excel-layout",
+        choices=ExcelPortfolioFormat.layouts,
+        default="long",
+        help="Excel worksheet per loan (sheets) or a single worksheet (long)",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--workers",
+        default=1,
+        type=int,
+        help="Number of worker processes",
+    )
+
+    add_convention_arguments(parser)
+
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Do not show the progress",
+    )
+
+    add_profile_argument(parser)
+    return parser
+
+
+def create_export_parser():
+    """Creates a parser object for the export mode."""
+    from amorty import export
+
+    parser = argparse.ArgumentParser(
+        prog="amorty export", description="Export the schedule of every loan to a file"
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        default="-",
+        type=str,
+        help='CSV or JSON Lines file with the loans, "-" for stdin',
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output-dir",
+        required=True,
+        type=str,
+        help="Directory for the files of the loans",
+    )
+
+    parser.add_argument(
+        "--input-format",
+        choices=("csv", "jsonl"),
+        help="Input format (by the file extension, csv for stdin)",
+    )
+
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=tuple(export.EXPORT_FORMATS),
+        default="csv",
+        help="Format of the files",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        help="Number of worker processes (all CPUs by default)",
+    )
+
+    parser.add_argument(
+        "--writers",
+        default=export.DEFAULT_WRITERS,
+        type=int,
+        help="Number of threads writing the files",
+    )
+
+    parser.add_argument(
+        "--queue-size",
+        default=export.DEFAULT_QUEUE_SIZE,
+        type=int,
+        help="Number of schedules waiting to be written",
+    )
+
+    add_convention_arguments(parser)
+
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Do not show the progress and the messages",
+    )
+
+    add_profile_argument(parser)
+    return parser
+
+
+def create_serve_parser():
+    """Creates a parser object for the server mode."""
+    parser = argparse.ArgumentParser(
+        prog="amorty serve", description="Serve loan schedules over HTTP"
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        type=str,
+        help="Host to listen on",
+    )
+
+    parser.add_argument(
+        "--port",
+        default=8000,
+        type=int,
+        help="Port to listen on",
+    )
+
+    parser.add_argument(
+        "--socket",
+        type=str,
+        help="Unix socket path to listen on instead of the port",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        help="Number of worker processes (all CPUs by default)",
+    )
+
+    parser.add_argument(
+        "--cache-size",
+        default=4096,
+        type=int,
+        help="Number of schedules kept in memory",
+    )
+
+    parser.add_argument(
+        "--max-batch",
+        default=256,
+        type=int,
+        help="Maximum number of loans sent to a worker at once",
+    )
+
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Do not show the address of the server",
     )
     return parser
 
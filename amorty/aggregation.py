@@ -0,0 +1,192 @@
+"""Aggregation of cash flows into date buckets.
+
+The principal, the interest and the payments of the schedules are summed
+into preallocated arrays with a bucket per day or per month of a date
+range. The bucket of a payment is found by the ordinal of its date in a
+table built once for the range, so the rows are added as they are streamed
+and the memory depends on the number of buckets, not on the number of rows.
+
+Buckets with the same range and frequency can be merged, so that worker
+processes sum their chunks of a portfolio and send back only the arrays.
+"""
+
+import datetime
+from array import array
+from collections import namedtuple
+from typing import Iterable, Iterator, List, Tuple, Union
+
+from amorty import utils
+from amorty.loan import Loan, LoanDetails
+
+CashFlow = namedtuple("CashFlow", "principal interest payment")
+
+FREQUENCIES = ("day", "month")
+
+
+class CashFlowBuckets:
+    """Sums of the cash flows by day or by month of a date range.
+
+    Attributes
+    ----------
+    start: str or datetime.date
+        First day of the range (the first day of its month for months)
+    end: str or datetime.date
+        Last day of the range (the last day of its month for months)
+    frequency: str, optional
+        Bucket size, "day" or "month"
+    principal, interest, payment: array
+        Sums of the bucket with the same index
+    outside: CashFlow
+        Sums of the payments outside of the range
+    rows: int
+        Number of the added payments
+
+    Methods
+    -------
+    add(date, principal, interest, payment)
+        Adds a payment to its bucket
+    add_rows(rows)
+        Adds the rows of a schedule
+    add_loan(loan)
+        Adds the schedule of the loan without creating its rows
+    merge(other)
+        Adds the sums of buckets with the same range and frequency
+    get_date(index)
+        Returns the first day of the bucket
+    items()
+        Yields the first day and the CashFlow of every bucket
+    total()
+        Returns the sums of all payments, including the ones outside
+    """
+
+    def __init__(
+        self,
+        start: Union[str, datetime.date],
+        end: Union[str, datetime.date],
+        frequency: str = "month",
+    ) -> None:
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Invalid frequency: {frequency}")
+        start, end = utils.convert_date(start), utils.convert_date(end)
+        if start > end:
+            raise ValueError("Start date must not be later than end date")
+        if frequency == "month":
+            start = start.replace(day=1)
+            end = get_next_month(end) - datetime.timedelta(days=1)
+        self.start = start
+        self.end = end
+        self.frequency = frequency
+        self._first = start.toordinal()
+        self._bucket_dates, self._buckets = self._build_buckets()
+        size = len(self._bucket_dates)
+        self.principal = array("d", [0.0]) * size
+        self.interest = array("d", [0.0]) * size
+        self.payment = array("d", [0.0]) * size
+        self._outside = [0.0, 0.0, 0.0]
+        self.rows = 0
+
+    def __len__(self) -> int:
+        return len(self._bucket_dates)
+
+    def _build_buckets(self) -> Tuple[List[datetime.date], array]:
+        """Creates the first days of the buckets and the bucket of every day."""
+        days = self.end.toordinal() - self._first + 1
+        if self.frequency == "day":
+            dates = [self.start + datetime.timedelta(days=day) for day in range(days)]
+            return dates, array("i", range(days))
+        dates = []
+        buckets = array("i")
+        month = self.start
+        while month <= self.end:
+            next_month = get_next_month(month)
+            buckets.extend([len(dates)] * (next_month - month).days)
+            dates.append(month)
+            month = next_month
+        return dates, buckets
+
+    @property
+    def outside(self) -> CashFlow:
+        return CashFlow(*self._outside)
+
+    def add(
+        self, date: datetime.date, principal: float, interest: float, payment: float
+    ) -> None:
+        self._add_payments([(date, principal, interest, payment)])
+
+    def add_rows(self, rows: Iterable[LoanDetails]) -> None:
+        """Adds the principal, the interest and the payment of the rows."""
+        self._add_payments(
+            (row.date, row.principal, row.interest, row.payment) for row in rows
+        )
+
+    def add_loan(self, loan: Loan) -> None:
+        """Adds the payments of the loan directly from its amortization."""
+        plan = loan.date.get_schedule_plan()
+        self._add_payments(
+            (date, principal, interest, payment)
+            for date, (payment, _, principal, interest) in zip(
+                plan.dates, loan.amortize(plan)
+            )
+        )
+
+    def _add_payments(
+        self, payments: Iterable[Tuple[datetime.date, float, float, float]]
+    ) -> None:
+        buckets, first, size = self._buckets, self._first, len(self._buckets)
+        principal_sums, interest_sums = self.principal, self.interest
+        payment_sums, outside = self.payment, self._outside
+        rows = 0
+        for date, principal, interest, payment in payments:
+            rows += 1
+            day = date.toordinal() - first
+            if 0 <= day < size:
+                bucket = buckets[day]
+                principal_sums[bucket] += principal
+                interest_sums[bucket] += interest
+                payment_sums[bucket] += payment
+            else:
+                outside[0] += principal
+                outside[1] += interest
+                outside[2] += payment
+        self.rows += rows
+
+    def merge(self, other: "CashFlowBuckets") -> None:
+        """Adds the sums of other buckets of the same range and frequency."""
+        if (other.start, other.end, other.frequency) != (
+            self.start,
+            self.end,
+            self.frequency,
+        ):
+            raise ValueError("Buckets must have the same range and frequency")
+        for sums, other_sums in (
+            (self.principal, other.principal),
+            (self.interest, other.interest),
+            (self.payment, other.payment),
+            (self._outside, other._outside),
+        ):
+            for index, value in enumerate(other_sums):
+                sums[index] += value
+        self.rows += other.rows
+
+    def get_date(self, index: int) -> datetime.date:
+        return self._bucket_dates[index]
+
+    def items(self) -> Iterator[Tuple[datetime.date, CashFlow]]:
+        for index, date in enumerate(self._bucket_dates):
+            yield date, CashFlow(
+                self.principal[index], self.interest[index], self.payment[index]
+            )
+
+    def total(self) -> CashFlow:
+        return CashFlow(
+            sum(self.principal) + self._outside[0],
+            sum(self.interest) + self._outside[1],
+            sum(self.payment) + self._outside[2],
+        )
+
+
+def get_next_month(date: datetime.date) -> datetime.date:
+    """Returns the first day of the month after the date."""
+    if date.month == 12:
+        return datetime.date(date.year + 1, 1, 1)
+    return datetime.date(date.year, date.month + 1, 1)
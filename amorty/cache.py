@@ -0,0 +1,165 @@
+"""Cache of loan schedules.
+
+Loans with the same parameters have the same schedule, so the schedules of
+repeated requests (for example, quotes of the same product) are taken from
+a bounded LRU cache in memory and, optionally, from an SQLite database.
+"""
+
+import datetime
+import json
+import sqlite3
+from collections import OrderedDict, namedtuple
+from typing import Hashable, Optional, Tuple
+
+from amorty import profiling
+from amorty.loan import Loan, LoanDetails
+
+CacheInfo = namedtuple("CacheInfo", "hits misses maxsize currsize")
+
+Schedule = Tuple[LoanDetails, ...]
+
+
+def make_key(loan: Loan) -> Tuple[Hashable, ...]:
+    """Returns the parameters that define the schedule of the loan."""
+    return (
+        type(loan).__name__,
+        float(loan.amount),
+        loan.period,
+        float(loan.rate),
+        loan.date.date.isoformat(),
+        loan.date.calendar.version,
+        loan.date.day_count.name,
+        loan.round_to_cents,
+        tuple((reset.period, float(reset.rate)) for reset in loan.rate_resets),
+    )
+
+
+class SQLiteScheduleStore:
+    """Persistent storage of schedules in an SQLite database.
+
+    The schedules are kept between the runs and can be shared by processes.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS schedules "
+                "(key TEXT PRIMARY KEY, rows TEXT NOT NULL)"
+            )
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[Schedule]:
+        row = self._connection.execute(
+            "SELECT rows FROM schedules WHERE key = ?", (json.dumps(key),)
+        ).fetchone()
+        if row is None:
+            return None
+        return tuple(
+            LoanDetails(datetime.date.fromisoformat(date), *values)
+            for date, *values in json.loads(row[0])
+        )
+
+    def set(self, key: Tuple[Hashable, ...], schedule: Schedule) -> None:
+        rows = [(row.date.isoformat(), *row[1:]) for row in schedule]
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO schedules VALUES (?, ?)",
+                (json.dumps(key), json.dumps(rows)),
+            )
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class ScheduleCache:
+    """LRU cache of loan schedules.
+
+    Attributes
+    ----------
+    maxsize: int, optional
+        Number of schedules kept in memory, the least recently used schedule
+        is evicted when the cache is full
+    store: SQLiteScheduleStore, optional
+        Persistent storage looked up on the cache misses in memory
+
+    Methods
+    -------
+    get_schedule(loan)
+        Returns the schedule of the loan from the cache or creates it
+    lookup(key), add(key, schedule)
+        Look up and add the schedules calculated elsewhere, for example by
+        worker processes
+    cache_info()
+        Returns the hits, the misses and the size of the cache
+    clear()
+        Removes the schedules from memory and resets the counters
+    """
+
+    def __init__(
+        self, maxsize: int = 1024, store: Optional[SQLiteScheduleStore] = None
+    ) -> None:
+        if not (isinstance(maxsize, int) and maxsize > 0):
+            raise ValueError("Cache size must be integer type and positive number")
+        self.maxsize = maxsize
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._schedules: "OrderedDict[Tuple[Hashable, ...], Schedule]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._schedules)
+
+    def get_schedule(self, loan: Loan) -> Schedule:
+        """Returns the immutable schedule of the loan."""
+        key = make_key(loan)
+        schedule = self.lookup(key)
+        if schedule is None:
+            schedule = tuple(loan.create_loan())
+            self.add(key, schedule)
+        return schedule
+
+    def lookup(self, key: Tuple[Hashable, ...]) -> Optional[Schedule]:
+        """Returns the schedule with the key (see make_key) or None.
+
+        The schedules are looked up in memory and then in the store.
+        """
+        schedule = self._schedules.get(key)
+        if schedule is not None:
+            self._schedules.move_to_end(key)
+            self.hits += 1
+            profiling.count("schedule cache hits")
+            return schedule
+
+        schedule = self._load(key)
+        if schedule is None:
+            self.misses += 1
+            profiling.count("schedule cache misses")
+            return None
+        self.hits += 1
+        profiling.count("schedule cache hits")
+        self._add(key, schedule)
+        return schedule
+
+    def add(self, key: Tuple[Hashable, ...], schedule: Schedule) -> None:
+        """Adds the schedule calculated elsewhere to the cache and the store."""
+        if self.store is not None:
+            self.store.set(key, schedule)
+        self._add(key, schedule)
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._schedules))
+
+    def clear(self) -> None:
+        self._schedules.clear()
+        self.hits = self.misses = 0
+
+    def _load(self, key: Tuple[Hashable, ...]) -> Optional[Schedule]:
+        if self.store is None:
+            return None
+        return self.store.get(key)
+
+    def _add(self, key: Tuple[Hashable, ...], schedule: Schedule) -> None:
+        self._schedules[key] = schedule
+        if len(self._schedules) > self.maxsize:
+            self._schedules.popitem(last=False)
@@ -2,11 +2,210 @@
 
 import calendar
 import datetime
-from typing import Union, List
+import functools
+import hashlib
+import os
+from array import array
+from collections import namedtuple
+from typing import Callable, Collection, Dict, Iterable, List, Optional, Union
 
-import holidays
+from amorty import daycount, profiling, utils
 
-from amorty import utils
+DEFAULT_START_YEAR = 1991
+DEFAULT_END_YEAR = 2100
+WEEKEND = (5, 6)
+
+SchedulePlan = namedtuple(
+    "SchedulePlan", "dates days year_fractions year_fraction_numerators"
+)
+
+
+class BusinessCalendar:
+    """BusinessCalendar implements the working days of a range of years.
+
+    The non-working days are computed once, when the calendar is created, into
+    a bit set and a table of distances to the next business day, so a single
+    instance can be shared by every loan in the process. Outside of the
+    covered years only the weekend days are taken into account.
+
+    Attributes
+    ----------
+    start_year: int, optional
+        First year covered by the precomputed tables
+    end_year: int, optional
+        Last year covered by the precomputed tables
+    holiday_dates: iterable of datetime.date, optional
+        Non-working holidays (Russian holidays by default)
+    weekend: collection of int, optional
+        Weekday numbers of the days off (Saturday and Sunday by default)
+
+    Methods
+    -------
+    is_working_day(date)
+        Checks whether the date is a business day
+    next_working_day(date)
+        Returns the first business day on or after the date
+    version
+        Fingerprint of the days off, that changes with the calendar
+    """
+
+    def __init__(
+        self,
+        start_year: int = DEFAULT_START_YEAR,
+        end_year: int = DEFAULT_END_YEAR,
+        holiday_dates: Optional[Iterable[datetime.date]] = None,
+        weekend: Collection[int] = WEEKEND,
+    ) -> None:
+        if start_year > end_year:
+            raise ValueError("Start year must not be greater than end year")
+        with profiling.timer("calendar"):
+            if holiday_dates is None:
+                # holidays is slow to import, so it is imported only when needed
+                import holidays
+
+                holiday_dates = holidays.RUS(years=range(start_year, end_year + 1))
+            self.start_year = start_year
+            self.end_year = end_year
+            self.weekend = frozenset(weekend)
+            self._first = datetime.date(start_year, 1, 1).toordinal()
+            self._last = datetime.date(end_year, 12, 31).toordinal()
+            self._holidays = frozenset(
+                date.toordinal()
+                for date in holiday_dates
+                if self._first <= date.toordinal() <= self._last
+            )
+            self.non_working_days = array(
+                "i",
+                (
+                    ordinal
+                    for ordinal in range(self._first, self._last + 1)
+                    if self._is_day_off(ordinal)
+                ),
+            )
+            self._offsets = self._build_offsets()
+            self._days_off = self._build_bitset()
+        profiling.count("calendars built")
+
+    @functools.cached_property
+    def version(self) -> str:
+        """Returns a fingerprint of the covered range and the days off.
+
+        Calendars with the same days off have the same version in every
+        process, so it can be a part of the persistent cache keys.
+        """
+        fingerprint = hashlib.sha1()
+        fingerprint.update(f"{self._first}:{self._last}:".encode())
+        fingerprint.update(self.non_working_days.tobytes())
+        return fingerprint.hexdigest()[:16]
+
+    def _is_day_off(self, ordinal: int) -> bool:
+        """Checks the day off without using the precomputed tables."""
+        weekday = (ordinal + 6) % 7
+        return weekday in self.weekend or ordinal in self._holidays
+
+    def _build_offsets(self) -> array:
+        """Creates a table of distances to the next business day.
+
+        Walks the covered range backwards, so that every day off gets the
+        distance of the following day plus one.
+        """
+        offsets = array("i", [0]) * (self._last - self._first + 2)
+        for ordinal in reversed(self.non_working_days):
+            index = ordinal - self._first
+            offsets[index] = offsets[index + 1] + 1
+        return offsets
+
+    def _build_bitset(self) -> bytes:
+        """Creates a bit set of the days off, a bit for every covered day."""
+        bits = bytearray((self._last - self._first) // 8 + 1)
+        for ordinal in self.non_working_days:
+            index = ordinal - self._first
+            bits[index >> 3] |= 1 << (index & 7)
+        return bytes(bits)
+
+    def is_working_day(self, date: datetime.date) -> bool:
+        """Checks whether the date is a business day."""
+        ordinal = date.toordinal()
+        if self._first <= ordinal <= self._last:
+            index = ordinal - self._first
+            return not self._days_off[index >> 3] >> (index & 7) & 1
+        return date.weekday() not in self.weekend
+
+    def next_working_day(self, date: datetime.date) -> datetime.date:
+        """Returns the date itself or the first business day after it."""
+        ordinal = date.toordinal()
+        if self._first <= ordinal <= self._last:
+            offset = self._offsets[ordinal - self._first]
+            if offset:
+                return date + datetime.timedelta(days=offset)
+            return date
+        while date.weekday() in self.weekend:
+            date += datetime.timedelta(days=1)
+        return date
+
+
+@functools.lru_cache(maxsize=None)
+def get_default_calendar() -> BusinessCalendar:
+    """Returns the calendar shared by all loans of the process."""
+    return BusinessCalendar()
+
+
+CALENDARS: Dict[str, Callable[[], BusinessCalendar]] = {
+    "RU": get_default_calendar,
+    "WEEKEND": lambda: BusinessCalendar(holiday_dates=()),
+}
+
+
+def register_calendar(name: str, factory: Callable[[], BusinessCalendar]) -> None:
+    """Makes the calendar created by the factory available by the name."""
+    CALENDARS[name.upper()] = factory
+    _create_calendar.cache_clear()
+
+
+def get_calendar(name: str) -> BusinessCalendar:
+    """Returns the registered calendar or the calendar loaded from the file.
+
+    The names of the registered calendars are case-insensitive. The calendar
+    is created once and shared by all loans of the process.
+    """
+    if name.upper() in CALENDARS:
+        return _create_calendar(name.upper())
+    if os.path.isfile(name):
+        return _create_calendar(os.path.abspath(name))
+    raise ValueError(f"Invalid calendar: {name}")
+
+
+@functools.lru_cache(maxsize=None)
+def _create_calendar(name: str) -> BusinessCalendar:
+    if name in CALENDARS:
+        return CALENDARS[name]()
+    return load_calendar(name)
+
+
+def load_calendar(path: str) -> BusinessCalendar:
+    """Loads a calendar from a text file.
+
+    Every line contains a holiday in format "yyyy-mm-dd", or the weekday
+    numbers of the weekend (Monday is 0) after "weekend:". The blank lines
+    and the text after "#" are ignored. The weekend is Saturday and Sunday,
+    if it is not specified.
+    """
+    holiday_dates = []
+    weekend: Collection[int] = WEEKEND
+    with open(path) as file:
+        for line in file:
+            line = line.split("#", 1)[0].strip()
+            if line.lower().startswith("weekend:"):
+                weekend = [int(day) for day in line[8:].replace(",", " ").split()]
+            elif line:
+                holiday_dates.append(utils.convert_date(line))
+    years = [date.year for date in holiday_dates]
+    return BusinessCalendar(
+        min(years + [DEFAULT_START_YEAR]),
+        max(years + [DEFAULT_END_YEAR]),
+        holiday_dates,
+        weekend,
+    )
 
 
 class LoanDate:
@@ -18,18 +217,40 @@ class LoanDate:
         Loan term (specified in months)
     date : str, datetime.date, required
         Date of issue of the loan
+    calendar: BusinessCalendar or str, optional
+        Calendar of business days or its name (the calendar shared by the
+        process by default)
+    day_count: DayCount or str, optional
+        Day count convention or its name (Actual/Actual by default)
 
     Methods
     -------
     get_working_dates()
         Calculates the dates on which the monthly payments on the loan will be paid
-    get_count_days()
-        Calculates the number of days between monthly loan payments
+    get_schedule_plan()
+        Calculates the payment dates, the days and the year fractions at once
     """
 
-    def __init__(self, period: int, date: Union[str, datetime.date]) -> None:
+    def __init__(
+        self,
+        period: int,
+        date: Union[str, datetime.date],
+        calendar: Union[BusinessCalendar, str, None] = None,
+        day_count: Union[daycount.DayCount, str, None] = None,
+    ) -> None:
         self.period = period
         self.date = date
+        self.calendar = calendar or get_default_calendar()
+        self.day_count = day_count
+
+    @property
+    def period(self) -> int:
+        return self._period
+
+    @period.setter
+    def period(self, period: int) -> None:
+        self._period = period
+        self._plan: Optional[SchedulePlan] = None
 
     @property
     def date(self):
@@ -39,9 +260,30 @@ class LoanDate:
     def date(self, date: Union[str, datetime.date]) -> None:
         if isinstance(date, (str, datetime.date)):
             self._date = utils.convert_date(date)
+            self._plan = None
         else:
             raise ValueError("Date must be string type or datetime.date type")
 
+    @property
+    def calendar(self) -> BusinessCalendar:
+        return self._calendar
+
+    @calendar.setter
+    def calendar(self, calendar: Union[BusinessCalendar, str]) -> None:
+        if isinstance(calendar, str):
+            calendar = get_calendar(calendar)
+        self._calendar = calendar
+        self._plan = None
+
+    @property
+    def day_count(self) -> daycount.DayCount:
+        return self._day_count
+
+    @day_count.setter
+    def day_count(self, day_count: Union[daycount.DayCount, str, None]) -> None:
+        self._day_count = daycount.get_day_count(day_count)
+        self._plan = None
+
     def get_working_dates(self) -> List[datetime.date]:
         """Creates a list of dates excluding weekends."""
         dates = []
@@ -57,37 +299,40 @@ class LoanDate:
             period -= 1
         return dates
 
-    @staticmethod
-    def _set_working_date(date: datetime.date) -> datetime.date:
+    def _set_working_date(self, date: datetime.date) -> datetime.date:
         """Checks and return a date after a day off.
 
         If the payment date is a weekend of holiday, the date is transferred
         to the next business day.
         """
-        while date.weekday() in holidays.WEEKEND or date in holidays.RUS():
-            date += datetime.timedelta(days=1)
-        return date
+        return self.calendar.next_working_day(date)
 
-    def get_count_days(
-        self,
-    ) -> List[Union[datetime.timedelta, List[datetime.timedelta]]]:
-        """Calculates the difference between dates in a list."""
-        days: List[Union[datetime.timedelta, List[datetime.timedelta]]] = []
-        dates = self.get_working_dates()
-        start_date = self._date
-        days.append(dates[0] - start_date)
-
-        for date, next_date in zip(dates, dates[1:]):
-            start_year = datetime.date(next_date.year, 1, 1)
-
-            if date.month == 12 and calendar.isleap(next_date.year):
-                common_date, leap_date = start_year - date, next_date - start_year
-                days.append([common_date, leap_date])
-
-            elif date.month == 12 and calendar.isleap(date.year):
-                leap_date, common_date = start_year - date, next_date - start_year
-                days.append([common_date, leap_date])
-
-            else:
-                days.append(next_date - date)
-        return days
+    def get_schedule_plan(self) -> SchedulePlan:
+        """Walks the calendar once and collects everything the loan needs.
+
+        Returns the payment dates, the number of days in each period and the
+        fraction of a year of each period by the day count convention, as a
+        float and as an exact numerator over utils.YEAR_FRACTION_DENOMINATOR.
+        The plan is cached until the period, the date, the calendar or the
+        day count is changed.
+        """
+        if self._plan is not None:
+            profiling.count("plan cache hits")
+            return self._plan
+        with profiling.timer("calendar"):
+            self._plan = self._build_plan()
+        profiling.count("calendar lookups", self.period)
+        return self._plan
+
+    def _build_plan(self) -> SchedulePlan:
+        dates = tuple(self.get_working_dates())
+        periods = list(zip((self._date,) + dates, dates))
+        days = tuple((end - start).days for start, end in periods)
+        day_count = self._day_count
+        year_fractions = tuple(
+            day_count.year_fraction(start, end) for start, end in periods
+        )
+        numerators = tuple(
+            day_count.year_fraction_numerator(start, end) for start, end in periods
+        )
+        return SchedulePlan(dates, days, year_fractions, numerators)
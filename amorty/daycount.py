@@ -0,0 +1,190 @@
+"""Day count conventions.
+
+Actual/Actual (ISDA) is used by default: the days of a period are split by
+calendar years, and the days falling in each year are divided by the length
+of that year, so the fraction is common days / 365 + leap days / 366.
+The ordinals of the first days of the years are precomputed once, so the
+fractions are calculated by integer arithmetic on the date ordinals without
+checking every year for leap.
+
+Actual/365 Fixed, Actual/360 and 30/360 are available by their names from
+get_day_count, other conventions can be added with register_day_count.
+"""
+
+import datetime
+import functools
+from abc import ABC, abstractmethod
+from array import array
+from typing import Dict, List, Tuple, Union
+
+from amorty import utils
+
+COMMON_YEAR = utils.DAYS_IN_YEAR["common year"]
+LEAP_YEAR = utils.DAYS_IN_YEAR["leap year"]
+
+
+@functools.lru_cache(maxsize=None)
+def get_year_starts() -> array:
+    """Returns the ordinals of January 1 of the years 1 to MAXYEAR + 1.
+
+    The item with index i is the first day of the year i + 1, so the days of
+    the year y are the ordinals from year_starts[y - 1] to year_starts[y].
+    """
+    starts = array("i", [1])
+    for year in range(1, datetime.MAXYEAR + 1):
+        starts.append(starts[-1] + (LEAP_YEAR if _is_leap(year) else COMMON_YEAR))
+    return starts
+
+
+def _is_leap(year: int) -> bool:
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def split_by_years(start: datetime.date, end: datetime.date) -> List[Tuple[int, int]]:
+    """Splits the days from start to end by calendar years.
+
+    Returns
+    -------
+    list of (days, days in the year) pairs, one for every year of the period
+    """
+    year_starts = get_year_starts()
+    ordinal, end_ordinal = start.toordinal(), end.toordinal()
+    parts = []
+    for year in range(start.year, end.year + 1):
+        next_year = year_starts[year]
+        stop = min(next_year, end_ordinal)
+        parts.append((stop - ordinal, next_year - year_starts[year - 1]))
+        ordinal = stop
+    return parts
+
+
+def count_days(start: datetime.date, end: datetime.date) -> Tuple[int, int]:
+    """Counts the days from start to end falling in common and in leap years."""
+    year_starts = get_year_starts()
+    if start.year == end.year:
+        days = end.toordinal() - start.toordinal()
+        if year_starts[start.year] - year_starts[start.year - 1] == LEAP_YEAR:
+            return 0, days
+        return days, 0
+    common_days = leap_days = 0
+    for days, days_in_year in split_by_years(start, end):
+        if days_in_year == LEAP_YEAR:
+            leap_days += days
+        else:
+            common_days += days
+    return common_days, leap_days
+
+
+def year_fraction(start: datetime.date, end: datetime.date) -> float:
+    """Calculates the Actual/Actual fraction of a year between the dates."""
+    common_days, leap_days = count_days(start, end)
+    return common_days / COMMON_YEAR + leap_days / LEAP_YEAR
+
+
+def year_fraction_numerator(start: datetime.date, end: datetime.date) -> int:
+    """Calculates the Actual/Actual fraction of a year between the dates exactly.
+
+    Returns the numerator of the fraction with utils.YEAR_FRACTION_DENOMINATOR.
+    """
+    common_days, leap_days = count_days(start, end)
+    denominator = utils.YEAR_FRACTION_DENOMINATOR
+    return common_days * (denominator // COMMON_YEAR) + leap_days * (
+        denominator // LEAP_YEAR
+    )
+
+
+class DayCount(ABC):
+    """Day count convention of the accrued interest.
+
+    Calculates the fraction of a year between two dates as a float and as
+    an exact numerator over utils.YEAR_FRACTION_DENOMINATOR.
+    """
+
+    name = ""
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.name}>"
+
+    @abstractmethod
+    def year_fraction(self, start: datetime.date, end: datetime.date) -> float:
+        pass
+
+    @abstractmethod
+    def year_fraction_numerator(self, start: datetime.date, end: datetime.date) -> int:
+        pass
+
+
+class ActualActual(DayCount):
+    """Actual/Actual (ISDA): the days of every year over the length of the year."""
+
+    name = "ACT/ACT"
+
+    def year_fraction(self, start: datetime.date, end: datetime.date) -> float:
+        return year_fraction(start, end)
+
+    def year_fraction_numerator(self, start: datetime.date, end: datetime.date) -> int:
+        return year_fraction_numerator(start, end)
+
+
+class ActualFixed(DayCount):
+    """Actual days over a year of a fixed number of days (Actual/365F, Actual/360)."""
+
+    def __init__(self, name: str, days_in_year: int) -> None:
+        self.name = name
+        self.days_in_year = days_in_year
+
+    def year_fraction(self, start: datetime.date, end: datetime.date) -> float:
+        return (end.toordinal() - start.toordinal()) / self.days_in_year
+
+    def year_fraction_numerator(self, start: datetime.date, end: datetime.date) -> int:
+        days = end.toordinal() - start.toordinal()
+        return days * (utils.YEAR_FRACTION_DENOMINATOR // self.days_in_year)
+
+
+class Thirty360(DayCount):
+    """30/360 (Bond Basis): every month has 30 days and a year has 360 days.
+
+    The 31st day of the start is counted as the 30th, the 31st day of the end
+    is counted as the 30th if the start is the 30th or the 31st.
+    """
+
+    name = "30/360"
+
+    def count_days(self, start: datetime.date, end: datetime.date) -> int:
+        start_day = min(start.day, 30)
+        end_day = end.day if start_day < 30 else min(end.day, 30)
+        years, months = end.year - start.year, end.month - start.month
+        return 360 * years + 30 * months + end_day - start_day
+
+    def year_fraction(self, start: datetime.date, end: datetime.date) -> float:
+        return self.count_days(start, end) / 360
+
+    def year_fraction_numerator(self, start: datetime.date, end: datetime.date) -> int:
+        return self.count_days(start, end) * (utils.YEAR_FRACTION_DENOMINATOR // 360)
+
+
+DEFAULT_DAY_COUNT = "ACT/ACT"
+
+DAY_COUNTS: Dict[str, DayCount] = {}
+
+
+def register_day_count(day_count: DayCount, *aliases: str) -> None:
+    """Makes the day count available by its name and the aliases."""
+    for name in (day_count.name, *aliases):
+        DAY_COUNTS[name.upper()] = day_count
+
+
+def get_day_count(day_count: Union[str, DayCount, None] = None) -> DayCount:
+    """Returns the day count by its name (Actual/Actual by default)."""
+    if isinstance(day_count, DayCount):
+        return day_count
+    name = DEFAULT_DAY_COUNT if day_count is None else day_count
+    if not isinstance(name, str) or name.upper() not in DAY_COUNTS:
+        raise ValueError(f"Invalid day count: {name}")
+    return DAY_COUNTS[name.upper()]
+
+
+register_day_count(ActualActual(), "ACTUAL/ACTUAL", "ACT/ACT ISDA")
+register_day_count(ActualFixed("ACT/365F", 365), "ACTUAL/365 FIXED", "ACT/365")
+register_day_count(ActualFixed("ACT/360", 360), "ACTUAL/360")
+register_day_count(Thirty360(), "30/360 BOND BASIS")
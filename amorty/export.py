@@ -0,0 +1,179 @@
+"""Export of loan schedules to a file per loan.
+
+The schedules are calculated in the worker processes of the portfolio
+(see portfolio.amortize_portfolio), while writer threads write the finished
+ones to their files, so the calculation and the writing overlap. The
+schedules are passed to the writers through a bounded queue: when the
+writers fall behind, the queue is full and the next schedules are not
+taken from the workers until a file is written, so the memory is bounded
+by the size of the queue.
+
+The file of a loan is named by its loan_id, or by the number of the loan
+in the input, if it has no id.
+
+Usage::
+
+    from amorty.export import export_schedules
+    from amorty.portfolio import read_specs
+
+    paths = export_schedules(read_specs("loans.csv"), "statements", "excel")
+"""
+
+import os
+import queue
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Type
+
+from amorty import portfolio, utils
+from amorty.loan import LoanDetails
+from amorty.loan_format import (
+    CSVFormat,
+    ExcelFormat,
+    Format,
+    JSONLFormat,
+    ParquetFormat,
+)
+
+# Format classes and file extensions by the format names
+EXPORT_FORMATS: Dict[str, Tuple[Type[Format], str]] = {
+    "csv": (CSVFormat, "csv"),
+    "excel": (ExcelFormat, "xlsx"),
+    "jsonl": (JSONLFormat, "jsonl"),
+    "parquet": (ParquetFormat, "parquet"),
+}
+DEFAULT_WRITERS = 4
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_CHUNKSIZE = 50
+HEADER = [field.capitalize() for field in LoanDetails._fields]
+
+# Characters that are replaced in the file names
+FILE_NAME_FORBIDDEN = re.compile(r"[^\w.-]")
+
+Task = Optional[Tuple[str, Iterable[LoanDetails]]]
+
+
+def export_schedules(
+    specs: Iterable[portfolio.LoanSpec],
+    directory: str,
+    format_name: str = "csv",
+    workers: Optional[int] = None,
+    writers: int = DEFAULT_WRITERS,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    header: Optional[List[str]] = None,
+    progress: Optional[utils.Progress] = None,
+) -> List[str]:
+    """Writes the schedule of every loan to its own file in the directory.
+
+    Args:
+        specs: loan specifications
+        directory: output directory, it is created if it does not exist
+        format_name: format of the files (csv, excel, jsonl, parquet)
+        workers: number of worker processes calculating the schedules
+            (all CPUs by default)
+        writers: number of threads writing the files
+        queue_size: number of calculated schedules waiting for the writers
+        chunksize: number of loans sent to a worker at once
+        header: column names, the names of the LoanDetails fields by default
+        progress: progress advanced with every loan passed to the writers
+    Returns:
+        List of the paths of the files in the order of the specifications
+    """
+    if format_name not in EXPORT_FORMATS:
+        raise ValueError(f"Invalid format option: {format_name}")
+    if writers < 1 or queue_size < 1:
+        raise ValueError("Number of writers and queue size must be positive")
+    format_type, extension = EXPORT_FORMATS[format_name]
+    os.makedirs(directory, exist_ok=True)
+    schedules = portfolio.amortize_portfolio(specs, workers, chunksize)
+    tasks: "queue.Queue[Task]" = queue.Queue(queue_size)
+    errors: List[BaseException] = []
+    threads = [
+        threading.Thread(
+            target=_write_files,
+            args=(tasks, format_type, header or HEADER, errors),
+            daemon=True,
+        )
+        for _ in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        paths = _put_schedules(tasks, schedules, directory, extension, errors, progress)
+    finally:
+        for _ in threads:
+            tasks.put(None)
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
+    return paths
+
+
+def _put_schedules(
+    tasks: "queue.Queue[Task]",
+    schedules: Iterable[portfolio.LoanSchedule],
+    directory: str,
+    extension: str,
+    errors: List[BaseException],
+    progress: Optional[utils.Progress],
+) -> List[str]:
+    """Passes the schedules to the writers until a writer fails.
+
+    Waits while the queue is full.
+    """
+    paths: List[str] = []
+    names: Set[str] = set()
+    for number, (spec, rows) in enumerate(
+        utils.track(schedules, progress or utils.Progress()), start=1
+    ):
+        if errors:
+            break
+        name = get_file_name(spec.loan_id, number, extension, names)
+        names.add(name.lower())
+        path = os.path.join(directory, name)
+        tasks.put((path, rows))
+        paths.append(path)
+    return paths
+
+
+def _write_files(
+    tasks: "queue.Queue[Task]",
+    format_type: Type[Format],
+    header: List[str],
+    errors: List[BaseException],
+) -> None:
+    """Writes the files of the tasks until the None task.
+
+    After an error the tasks are only taken from the queue, so that the
+    schedules are not waiting for a free place in it.
+    """
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        if errors:
+            continue
+        path, rows = task
+        try:
+            format_type(rows, header, path).write()
+        except Exception as error:
+            errors.append(error)
+
+
+def get_file_name(loan_id: Any, number: int, extension: str, names: Set[str]) -> str:
+    """Creates a unique file name of the loan, allowed by the file systems.
+
+    The names are compared in lower case, as on the case-insensitive file
+    systems. A repeated name gets the number of the loan, and a counter,
+    if the name with the number is also taken.
+    """
+    name = FILE_NAME_FORBIDDEN.sub("_", str(loan_id)) if loan_id is not None else ""
+    if not name.strip("."):
+        name = f"loan-{number}"
+    unique_name, copy = name, 1
+    while f"{unique_name}.{extension}".lower() in names:
+        unique_name = f"{name}-{number}" if copy == 1 else f"{name}-{number}-{copy}"
+        copy += 1
+    return f"{unique_name}.{extension}"
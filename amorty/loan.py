@@ -1,13 +1,26 @@
 import datetime
+import functools
+import itertools
+import math
+from math import isclose
 from abc import ABC, abstractmethod
 from collections import namedtuple
-from typing import Iterator, List, Tuple, Union
+from fractions import Fraction
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Type, Union
 
-from amorty import utils
-from amorty.date import LoanDate
+from amorty import profiling, utils
+from amorty.date import BusinessCalendar, LoanDate, SchedulePlan
+from amorty.daycount import DayCount
 
 
 LoanDetails = namedtuple("LoanDetails", "date day principal interest payment balance")
+Prepayment = namedtuple("Prepayment", "period amount reduce", defaults=("term",))
+RateReset = namedtuple("RateReset", "period rate")
+RateSegment = namedtuple("RateSegment", "start rate installment")
+
+CHECKPOINT_INTERVAL = 12
+PREPAYMENT_MODES = ("term", "payment")
+ANNUITY_COEFFICIENTS_CACHE_SIZE = 4096
 
 
 class Loan(ABC):
@@ -19,6 +32,10 @@ class Loan(ABC):
         period: int,
         rate: Union[int, float],
         date: Union[datetime.date, str],
+        calendar: Union[BusinessCalendar, str, None] = None,
+        round_to_cents: bool = False,
+        day_count: Union[DayCount, str, None] = None,
+        rate_resets: Iterable[RateReset] = (),
     ) -> None:
         """Construct a new loan.
 
@@ -27,11 +44,23 @@ class Loan(ABC):
             period: loan term in months
             rate: annual percentage rate
             date: date of issue of the loan
+            calendar: calendar of business days shared between loans, or the
+                name of a registered calendar (see amorty.date.get_calendar)
+            round_to_cents: round the interest and the principal of every
+                period to cents using exact integer arithmetic
+            day_count: day count convention of the interest, or its name
+                (see amorty.daycount.get_day_count), Actual/Actual by default
+            rate_resets: RateReset events of a floating-rate loan, the rate
+                is used until the first reset
         """
+        self._resets: Dict[int, float] = {}
         self.amount = amount
         self.period = period
         self.rate = rate
-        self.date = LoanDate(period, date)
+        self.date = LoanDate(period, date, calendar, day_count)
+        self.round_to_cents = round_to_cents
+        self.rate_resets = rate_resets
+        self._reset_cache()
 
     @property
     def amount(self) -> Union[int, float]:
@@ -41,6 +70,7 @@ class Loan(ABC):
     def amount(self, amount: Union[int, float]) -> None:
         if isinstance(amount, (int, float)) and amount > 0:
             self._amount = amount
+            self._reset_cache()
         else:
             raise ValueError("Amount must be int or float type and positive number")
 
@@ -52,6 +82,7 @@ class Loan(ABC):
     def rate(self, rate: Union[int, float]) -> None:
         if isinstance(rate, (int, float)) and rate > 0:
             self._rate = rate
+            self._reset_cache()
         else:
             raise ValueError(
                 "Interest rate must be int or float type and positive number"
@@ -65,42 +96,527 @@ class Loan(ABC):
     def period(self, period: int) -> None:
         if isinstance(period, int) and period > 0:
             self._period = period
+            if hasattr(self, "date"):
+                self.date.period = period
+            self._reset_cache()
         else:
             raise ValueError("Period must be integer type and positive number")
 
+    @property
+    def round_to_cents(self) -> bool:
+        return self._round_to_cents
+
+    @round_to_cents.setter
+    def round_to_cents(self, round_to_cents: bool) -> None:
+        self._round_to_cents = round_to_cents
+        self._reset_cache()
+
+    @property
+    def rate_resets(self) -> Tuple[RateReset, ...]:
+        return tuple(
+            RateReset(index + 1, rate) for index, rate in sorted(self._resets.items())
+        )
+
+    @rate_resets.setter
+    def rate_resets(self, rate_resets: Iterable[RateReset]) -> None:
+        """Sets the rate resets of a floating-rate loan.
+
+        From the period of a reset on, the rate of the reset is used and the
+        installment is recalculated from the balance and the remaining term.
+        The payments before the earliest changed reset are kept, so only the
+        segments affected by the change are recalculated.
+        """
+        resets = {}
+        for reset in rate_resets:
+            self._check_rate_reset(reset)
+            resets[reset.period - 1] = reset.rate
+        changed = [
+            index
+            for index in resets.keys() | self._resets.keys()
+            if resets.get(index) != self._resets.get(index)
+        ]
+        self._resets = resets
+        if changed:
+            self._forget_payments_from(min(changed))
+
+    def _check_rate_reset(self, reset: RateReset) -> None:
+        self._check_payment_number(reset.period, 1)
+        if not (isinstance(reset.rate, (int, float)) and reset.rate > 0):
+            raise ValueError(
+                "Interest rate must be int or float type and positive number"
+            )
+
     def __str__(self) -> str:
         return f"\namount: {self._amount}\nrate: {self._rate}%\nperiod: {self._period} months"
 
+    def _reset_cache(self) -> None:
+        """Forgets the values calculated for the previous loan parameters."""
+        self._checkpoints: Optional[Tuple[SchedulePlan, List[float]]] = None
+        self._schedule: Optional[Tuple[SchedulePlan, Tuple[LoanDetails, ...]]] = None
+        self._reset_rows: Optional[
+            Tuple[SchedulePlan, List[Tuple[float, ...]], List[RateSegment]]
+        ] = None
+
+    def _forget_payments_from(self, index: int) -> None:
+        """Forgets the payments with resets from the index and the schedules."""
+        if self._reset_rows is not None:
+            _, rows, segments = self._reset_rows
+            del rows[index:]
+            while segments and segments[-1].start >= index:
+                segments.pop()
+        self._checkpoints = None
+        self._schedule = None
+
+    def amortize(
+        self, plan: Optional[SchedulePlan] = None
+    ) -> Iterator[Tuple[float, ...]]:
+        """Calculates amortization of the loan."""
+        plan = plan or self.date.get_schedule_plan()
+        return self._amortize_from(plan, 0, self._amount)
+
+    def _amortize_from(
+        self, plan: SchedulePlan, start: int, balance_reminder: float
+    ) -> Iterator[Tuple[float, ...]]:
+        """Calculates amortization from the payment with the start index.
+
+        Args:
+            plan: schedule plan of the loan
+            start: index of the first calculated payment (starting from 0)
+            balance_reminder: balance before the first calculated payment
+
+        The payments of a loan with rate resets are taken from its cached
+        amortization (see _get_reset_rows), which the balance always matches.
+        """
+        if self._resets:
+            amortization: Iterator[Tuple[Any, ...]] = itertools.islice(
+                self._get_reset_rows(plan)[0], start, None
+            )
+        elif not self.round_to_cents:
+            return self._amortize_floats(plan, start, balance_reminder)
+        else:
+            amortization = self._amortize_cents(
+                plan, start, utils.to_cents(balance_reminder)
+            )
+        if not self.round_to_cents:
+            return amortization
+        return (
+            (payment / 100, balance / 100, principal / 100, interest / 100)
+            for payment, balance, principal, interest in amortization
+        )
+
+    def _get_reset_rows(
+        self, plan: SchedulePlan
+    ) -> Tuple[List[Tuple[Any, ...]], List[RateSegment]]:
+        """Returns the amortization with the rate resets and its segments.
+
+        The rows are in cents, if the loan is rounded to cents. They are
+        calculated once and kept until the resets are changed. The payments
+        between two resets are calculated in a batch with the constant rate
+        and installment of their segment, starting after the kept rows.
+        """
+        if self._reset_rows is None or self._reset_rows[0] is not plan:
+            self._reset_rows = (plan, [], [])
+        _, rows, segments = self._reset_rows
+        bounds = sorted(index for index in self._resets if index < self._period)
+        bounds.append(self._period)
+        amortize_segment = (
+            self._amortize_segment_cents
+            if self.round_to_cents
+            else self._amortize_segment_floats
+        )
+        index = len(rows)
+        while index < self._period:
+            balance = rows[-1][1] if rows else self._to_units(self._amount)
+            if index in self._resets or not segments:
+                segments.append(self._start_segment(index, balance))
+            stop = next(bound for bound in bounds if bound > index)
+            rows.extend(amortize_segment(plan, segments[-1], index, stop, balance))
+            index = stop
+        return rows, segments
+
+    def _start_segment(self, index: int, balance: float) -> RateSegment:
+        """Recalculates the installment from the balance and the remaining term."""
+        profiling.count("rate segments computed")
+        rate = self._resets.get(index, self._rate)
+        amount = (
+            balance / (100 if self.round_to_cents else 1) if index else self._amount
+        )
+        installment = self._calculate_installment(amount, self._period - index, rate)
+        return RateSegment(index, rate, self._to_units(installment))
+
+    def _amortize_segment_floats(
+        self,
+        plan: SchedulePlan,
+        segment: RateSegment,
+        start: int,
+        stop: int,
+        balance_reminder: float,
+    ) -> List[Tuple[float, ...]]:
+        """Calculates the payments of the segment from start to stop."""
+        interest_rate = segment.rate / 100
+        installment = segment.installment
+        year_fractions = plan.year_fractions
+        get_principal = self._get_principal
+        last = self._period - 1
+        rows: List[Tuple[float, ...]] = []
+        for index in range(start, stop):
+            accrued_interest = balance_reminder * interest_rate * year_fractions[index]
+            principal = get_principal(installment, accrued_interest)
+            if index == last:
+                principal = balance_reminder
+            balance_reminder -= principal
+            rows.append(
+                (
+                    principal + accrued_interest,
+                    balance_reminder,
+                    principal,
+                    accrued_interest,
+                )
+            )
+        return rows
+
+    def _amortize_segment_cents(
+        self,
+        plan: SchedulePlan,
+        segment: RateSegment,
+        start: int,
+        stop: int,
+        balance_reminder: float,
+    ) -> List[Tuple[float, ...]]:
+        """Calculates the payments of the segment from start to stop in cents."""
+        rate = Fraction(repr(segment.rate))
+        installment = segment.installment
+        numerators = plan.year_fraction_numerators
+        get_principal = self._get_principal
+        last = self._period - 1
+        rows: List[Tuple[float, ...]] = []
+        for index in range(start, stop):
+            accrued_interest = self._calculate_accrued_interest_cents(
+                int(balance_reminder), numerators[index], rate
+            )
+            principal = min(
+                get_principal(installment, accrued_interest), balance_reminder
+            )
+            if index == last:
+                principal = balance_reminder
+            balance_reminder -= principal
+            rows.append(
+                (
+                    principal + accrued_interest,
+                    balance_reminder,
+                    principal,
+                    accrued_interest,
+                )
+            )
+        return rows
+
+    @abstractmethod
+    def _amortize_floats(
+        self, plan: SchedulePlan, start: int, balance_reminder: float
+    ) -> Iterator[Tuple[float, ...]]:
+        pass
+
     @abstractmethod
-    def amortize(self) -> Iterator[Tuple[float, ...]]:
+    def _amortize_cents(
+        self, plan: SchedulePlan, start: int, balance_reminder: int
+    ) -> Iterator[Tuple[int, ...]]:
         pass
 
+    def _calculate_accrued_interest_cents(
+        self, balance_reminder: int, year_fraction_numerator: int, rate: Fraction
+    ) -> int:
+        """Calculates accrued interest in the current period in cents.
+
+        Args:
+            balance_reminder: balance in the current period in cents
+            year_fraction_numerator: numerator of the fraction of a year of the
+                current period over utils.YEAR_FRACTION_DENOMINATOR
+            rate: exact annual percentage rate
+        Returns:
+            int
+        """
+        return utils.divide_half_up(
+            balance_reminder * rate.numerator * year_fraction_numerator,
+            rate.denominator * 100 * utils.YEAR_FRACTION_DENOMINATOR,
+        )
+
+    def balance_at(self, k: int) -> float:
+        """Returns the balance after the k-th payment.
+
+        The balance is replayed from the nearest checkpoint, the checkpoints
+        are calculated once for every CHECKPOINT_INTERVAL payments.
+        """
+        self._check_payment_number(k, 0)
+        plan = self.date.get_schedule_plan()
+        checkpoint, steps = divmod(k, CHECKPOINT_INTERVAL)
+        balance_reminder = self._get_checkpoints(plan)[checkpoint]
+        start = checkpoint * CHECKPOINT_INTERVAL
+        amortization = self._amortize_from(plan, start, balance_reminder)
+        for _, balance, _, _ in itertools.islice(amortization, steps):
+            balance_reminder = balance
+        return balance_reminder
+
+    def row_at(self, k: int) -> LoanDetails:
+        """Returns the schedule row of the k-th payment (starting from 1)."""
+        self._check_payment_number(k, 1)
+        return next(self.rows(k, k + 1))
+
+    def rows(self, start: int = 1, stop: Optional[int] = None) -> Iterator[LoanDetails]:
+        """Returns the schedule rows of the payments from start to stop.
+
+        The payments are numbered from 1, the stop payment is excluded.
+        The rows before start are not calculated.
+        """
+        stop = self._period + 1 if stop is None else stop
+        self._check_payment_number(start, 1)
+        self._check_payment_number(stop - 1, start - 1)
+        plan = self.date.get_schedule_plan()
+        balance_reminder = self.balance_at(start - 1)
+        amortization = self._amortize_from(plan, start - 1, balance_reminder)
+        for index, (payment, balance, principal, interest) in zip(
+            range(start - 1, stop - 1), amortization
+        ):
+            date, day = plan.dates[index], plan.days[index]
+            yield LoanDetails(date, day, principal, interest, payment, balance)
+
+    def _check_payment_number(self, k: int, first: int) -> None:
+        if not (isinstance(k, int) and first <= k <= self._period):
+            raise ValueError(
+                f"Payment number must be integer from {first} to {self._period}"
+            )
+
+    def _get_checkpoints(self, plan: SchedulePlan) -> List[float]:
+        """Returns the balances before every CHECKPOINT_INTERVAL payments."""
+        if self._checkpoints is None or self._checkpoints[0] is not plan:
+            balances = [self._amount]
+            amortization = self._amortize_from(plan, 0, self._amount)
+            for number, (_, balance, _, _) in enumerate(amortization, start=1):
+                if number % CHECKPOINT_INTERVAL == 0:
+                    balances.append(balance)
+            self._checkpoints = (plan, balances)
+        return self._checkpoints[1]
+
+    def with_prepayments(
+        self, prepayments: Iterable[Prepayment]
+    ) -> Iterator[LoanDetails]:
+        """Returns the schedule of the loan with early repayments.
+
+        The amount of a prepayment is repaid together with the payment of its
+        period. After that the term is reduced keeping the installment
+        (reduce="term"), or the installment is recalculated for the rest of
+        the term (reduce="payment"). Prepayments of the same period are added up.
+
+        The rows before the earliest prepayment are taken from the schedule
+        without prepayments, which is calculated once for the loan, so only
+        the rest of the schedule is recalculated for every scenario.
+
+        Args:
+            prepayments: Prepayment events, the periods are numbered from 1
+        Returns:
+            Iterator of LoanDetails
+        """
+        events = self._group_prepayments(prepayments)
+        schedule = self._get_schedule()
+        if not events:
+            return iter(schedule)
+        start = min(events) - 1
+        balance_reminder = schedule[start - 1].balance if start else self._amount
+        return itertools.chain(
+            schedule[:start], self._prepay_from(start, balance_reminder, events)
+        )
+
+    def _group_prepayments(
+        self, prepayments: Iterable[Prepayment]
+    ) -> Dict[int, Prepayment]:
+        """Checks the prepayments and adds up the ones of the same period.
+
+        The installment is recalculated if any of them reduces the payment.
+        """
+        events: Dict[int, Prepayment] = {}
+        for prepayment in prepayments:
+            self._check_prepayment(prepayment)
+            period, amount, reduce = prepayment
+            if period in events:
+                amount += events[period].amount
+                if events[period].reduce == "payment":
+                    reduce = "payment"
+            events[period] = Prepayment(period, amount, reduce)
+        return events
+
+    def _check_prepayment(self, prepayment: Prepayment) -> None:
+        self._check_payment_number(prepayment.period, 1)
+        if not (isinstance(prepayment.amount, (int, float)) and prepayment.amount > 0):
+            raise ValueError(
+                "Prepayment amount must be int or float type and positive number"
+            )
+        if prepayment.reduce not in PREPAYMENT_MODES:
+            raise ValueError(
+                f"Prepayment must reduce {' or '.join(PREPAYMENT_MODES)}, "
+                f"not {prepayment.reduce}"
+            )
+
+    def _get_schedule(self) -> Tuple[LoanDetails, ...]:
+        """Returns the schedule without prepayments calculated once."""
+        plan = self.date.get_schedule_plan()
+        if self._schedule is None or self._schedule[0] is not plan:
+            self._schedule = (plan, tuple(self.create_loan()))
+        return self._schedule[1]
+
+    def _prepay_from(
+        self, start: int, balance_reminder: float, events: Dict[int, Prepayment]
+    ) -> Iterator[LoanDetails]:
+        """Calculates the schedule with prepayments from the start index.
+
+        The amounts are calculated in cents, if the loan is rounded to cents.
+        The schedule ends as soon as the balance is repaid, the rest of the
+        balance within the floating-point error is repaid with the installment.
+        The installment is also recalculated at every rate reset, for the
+        remaining term, which is shortened by the prepayments reducing the term.
+        """
+        plan = self.date.get_schedule_plan()
+        scale = 100 if self.round_to_cents else 1
+        balance = self._to_units(balance_reminder)
+        rate, installment = self._get_segment_terms(plan, start)
+        last = self._period - 1
+        # Index after the last payment of the remaining term, fractional
+        # after a prepayment reducing the term
+        end: float = self._period
+
+        for index in range(start, self._period):
+            if index in self._resets:
+                rate = self._resets[index]
+                installment = self._get_installment(balance, end - index, rate)
+            accrued_interest = self._calculate_interest_units(
+                balance, plan, index, rate
+            )
+            principal = self._get_principal(installment, accrued_interest)
+            if index == last or principal >= balance or isclose(principal, balance):
+                principal = balance
+            balance -= principal
+            prepayment = events.get(index + 1)
+            extra = self._get_prepayment_units(prepayment, balance)
+            principal += extra
+            balance -= extra
+            yield LoanDetails(
+                plan.dates[index],
+                plan.days[index],
+                principal / scale,
+                accrued_interest / scale,
+                (principal + accrued_interest) / scale,
+                balance / scale,
+            )
+            if not balance:
+                return
+            installment, end = self._get_terms_after_prepayment(
+                prepayment, index, balance, installment, end, rate
+            )
+
+    def _get_terms_after_prepayment(
+        self,
+        prepayment: Optional[Prepayment],
+        index: int,
+        balance: float,
+        installment: float,
+        end: float,
+        rate: float,
+    ) -> Tuple[float, float]:
+        """Returns the installment and the end of the term after the prepayment.
+
+        The installment is recalculated for the rest of the term, if the
+        prepayment reduces the payment, otherwise the term is shortened to the
+        number of the installments that repay the balance. The term is not
+        rounded, so the installment recalculated for it at a reset is the
+        same, if the rate is not changed.
+        """
+        if prepayment is None:
+            return installment, end
+        if prepayment.reduce == "payment":
+            return self._get_installment(balance, end - index - 1, rate), end
+        term = self._get_remaining_term(balance, installment, rate, end - index - 1)
+        return installment, index + 1 + term
+
+    def _get_segment_terms(self, plan: SchedulePlan, index: int) -> Tuple[float, float]:
+        """Returns the rate and the installment in units of the payment."""
+        if not self._resets:
+            installment = self._calculate_installment(
+                self._amount, self._period, self._rate
+            )
+            return self._rate, self._to_units(installment)
+        _, segments = self._get_reset_rows(plan)
+        segment = [segment for segment in segments if segment.start <= index][-1]
+        return segment.rate, segment.installment
+
+    def _get_installment(self, balance: float, period: float, rate: float) -> float:
+        """Calculates the installment in units that repays the balance in units."""
+        amount = balance / (100 if self.round_to_cents else 1)
+        return self._to_units(self._calculate_installment(amount, period, rate))
+
+    def _get_prepayment_units(
+        self, prepayment: Optional[Prepayment], balance: float
+    ) -> float:
+        """Returns the part of the balance in units repaid by the prepayment."""
+        if prepayment is None:
+            return 0
+        return min(self._to_units(prepayment.amount), balance)
+
+    def _to_units(self, amount: float) -> float:
+        """Converts the amount to cents, if the loan is rounded to cents."""
+        return utils.to_cents(amount) if self.round_to_cents else amount
+
+    def _calculate_interest_units(
+        self, balance_reminder: float, plan: SchedulePlan, index: int, rate: float
+    ) -> float:
+        if self.round_to_cents:
+            return self._calculate_accrued_interest_cents(
+                int(balance_reminder),
+                plan.year_fraction_numerators[index],
+                Fraction(repr(rate)),
+            )
+        return balance_reminder * (rate / 100) * plan.year_fractions[index]
+
+    @abstractmethod
+    def _calculate_installment(
+        self, amount: float, period: float, rate: float
+    ) -> float:
+        """Calculates the regular installment that repays amount in period."""
+
+    @abstractmethod
+    def _get_principal(self, installment: float, accrued_interest: float) -> float:
+        """Returns the principal of the installment."""
+
+    @abstractmethod
+    def _get_remaining_term(
+        self, balance: float, installment: float, rate: float, period: float
+    ) -> float:
+        """Returns the fractional number of the installments repaying the balance.
+
+        The term is not longer than period.
+        """
+
     def _calculate_accrued_interest(
         self,
         balance_reminder: Union[float, int],
-        day: Union[datetime.timedelta, List[datetime.timedelta]],
-        date: datetime.date,
+        year_fraction: float,
     ) -> float:
         """Calculates accrued interest in the current period.
 
         Args:
             balance_reminder: balance in the current period
-            day: number of days in the current period
-            date: payment date
+            year_fraction: fraction of a year of the current period by the day count
         Returns:
             float
         """
         interest_rate = self._rate / 100
-        days_to_year_ratio = utils.convert_days_to_year(day, date)
-        return balance_reminder * interest_rate * days_to_year_ratio
+        return balance_reminder * interest_rate * year_fraction
 
     def create_loan(self) -> Iterator[LoanDetails]:
-        loan_amortization = self.amortize()
-        dates = self.date.get_working_dates()
-        days = utils.clear_days(self.date.get_count_days())
+        plan = self.date.get_schedule_plan()
+        loan_amortization = profiling.timed(
+            "amortization", self.amortize(plan), "periods computed"
+        )
 
         for date, day, (payment, balance, principal, interest) in zip(
-            dates, days, loan_amortization
+            plan.dates, plan.days, loan_amortization
         ):
             loan_details = LoanDetails(date, day, principal, interest, payment, balance)
             yield loan_details
@@ -116,37 +632,80 @@ class Annuity(Loan):
         """Calculates monthly interest rate"""
         return self._rate / 1200
 
-    def _get_annuity_coefficient(self) -> float:
-        monthly_rate = self._calculate_monthly_interest()
-        numerator = monthly_rate * (1 + monthly_rate) ** self._period
-        denominator = (1 + monthly_rate) ** self._period - 1
-        return numerator / denominator
+    def _reset_cache(self) -> None:
+        super()._reset_cache()
+        self._annuity_payment: Optional[float] = None
+
+    def _get_annuity_coefficient(self, period: Optional[int] = None) -> float:
+        period = self._period if period is None else period
+        return get_annuity_coefficient_by_rate(self._rate, period)
 
     def get_annuity_payment(self) -> float:
-        return self._amount * self._get_annuity_coefficient()
+        """Returns the annuity payment calculated once for the loan parameters."""
+        if self._annuity_payment is None:
+            self._annuity_payment = self._amount * self._get_annuity_coefficient()
+        return self._annuity_payment
+
+    def _calculate_installment(
+        self, amount: float, period: float, rate: float
+    ) -> float:
+        return amount * get_annuity_coefficient_by_rate(rate, period)
 
-    def _calculate_principal(self, accrued_interest: float) -> float:
-        return self.get_annuity_payment() - accrued_interest
+    def _get_principal(self, installment: float, accrued_interest: float) -> float:
+        return installment - accrued_interest
 
-    def amortize(self) -> Iterator[Tuple[float, ...]]:
+    def _get_remaining_term(
+        self, balance: float, installment: float, rate: float, period: float
+    ) -> float:
+        """Solves the annuity formula for the term, as solvers.solve_period."""
+        monthly_rate = rate / 1200
+        share = balance * monthly_rate / installment
+        if share >= 1:
+            return period
+        return min(period, -math.log(1 - share) / math.log1p(monthly_rate))
+
+    def _amortize_floats(
+        self, plan: SchedulePlan, start: int, balance_reminder: float
+    ) -> Iterator[Tuple[float, ...]]:
         """Calculates amortization for an annuity repayment scheme."""
-        balance_reminder = self._amount
-        period = self._period
-        date = (x for x in self.date.get_working_dates())
-        day = (x for x in self.date.get_count_days())
+        annuity_payment = self.get_annuity_payment()
+        last = self._period - 1
 
-        while period:
+        for index in range(start, self._period):
             accrued_interest = self._calculate_accrued_interest(
-                balance_reminder, next(day), next(date)
+                balance_reminder, plan.year_fractions[index]
             )
-            principal = self._calculate_principal(accrued_interest)
+            principal = annuity_payment - accrued_interest
             balance_reminder -= principal
-            if period <= 1:
+            if index == last:
                 principal += balance_reminder
                 balance_reminder -= balance_reminder
             payment = accrued_interest + principal
             yield payment, balance_reminder, principal, accrued_interest
-            period -= 1
+
+    def _amortize_cents(
+        self, plan: SchedulePlan, start: int, balance_reminder: int
+    ) -> Iterator[Tuple[int, ...]]:
+        """Calculates amortization for an annuity repayment scheme in cents.
+
+        The annuity payment is rounded to cents, the last payment repays
+        the rest of the balance. When the rounded payments repay the balance
+        before the last period, the rest of the payments are zero.
+        """
+        rate = Fraction(repr(self._rate))
+        annuity_payment = utils.to_cents(self.get_annuity_payment())
+        last = self._period - 1
+
+        for index in range(start, self._period):
+            accrued_interest = self._calculate_accrued_interest_cents(
+                balance_reminder, plan.year_fraction_numerators[index], rate
+            )
+            principal = min(annuity_payment - accrued_interest, balance_reminder)
+            if index == last:
+                principal = balance_reminder
+            balance_reminder -= principal
+            payment = accrued_interest + principal
+            yield payment, balance_reminder, principal, accrued_interest
 
 
 class StraightLine(Loan):
@@ -161,24 +720,124 @@ class StraightLine(Loan):
     Methods
     --------
     amortize(): Calculates amortization on a straight-line method
+    balance_at(k): Calculates the balance after the k-th payment in closed form
+    with_prepayments(prepayments): Calculates the schedule with early repayments
     """
 
     def _calculate_principal(self) -> float:
         return self._amount / self._period
 
-    def amortize(self) -> Iterator[Tuple[float, ...]]:
-        """Calculates amortization fon a straight-line method."""
-        balance_reminder = self._amount
-        period = self._period
-        date = (x for x in self.date.get_working_dates())
-        day = (x for x in self.date.get_count_days())
+    def _calculate_installment(
+        self, amount: float, period: float, rate: float
+    ) -> float:
+        return amount / period
+
+    def _get_principal(self, installment: float, accrued_interest: float) -> float:
+        return installment
 
-        while period:
+    def _get_remaining_term(
+        self, balance: float, installment: float, rate: float, period: float
+    ) -> float:
+        return min(period, balance / installment)
+
+    def _amortize_floats(
+        self, plan: SchedulePlan, start: int, balance_reminder: float
+    ) -> Iterator[Tuple[float, ...]]:
+        """Calculates amortization fon a straight-line method."""
+        for index in range(start, self._period):
             accrued_interest = self._calculate_accrued_interest(
-                balance_reminder, next(day), next(date)
+                balance_reminder, plan.year_fractions[index]
             )
             principal = self._calculate_principal()
             payment = principal + accrued_interest
             balance_reminder -= principal
             yield payment, balance_reminder, principal, accrued_interest
-            period -= 1
+
+    def _amortize_cents(
+        self, plan: SchedulePlan, start: int, balance_reminder: int
+    ) -> Iterator[Tuple[int, ...]]:
+        """Calculates amortization on a straight-line method in cents.
+
+        The installments are rounded to cents, the last payment repays
+        the rest of the balance. When the rounded installments repay the
+        balance before the last period, the rest of the payments are zero.
+        """
+        rate = Fraction(repr(self._rate))
+        installment = utils.to_cents(self._calculate_principal())
+        last = self._period - 1
+
+        for index in range(start, self._period):
+            accrued_interest = self._calculate_accrued_interest_cents(
+                balance_reminder, plan.year_fraction_numerators[index], rate
+            )
+            if index == last:
+                principal = balance_reminder
+            else:
+                principal = min(installment, balance_reminder)
+            payment = principal + accrued_interest
+            balance_reminder -= principal
+            yield payment, balance_reminder, principal, accrued_interest
+
+    def balance_at(self, k: int) -> float:
+        """Returns the balance after the k-th payment.
+
+        The principal is repaid in equal installments, so the balance does
+        not depend on the previous payments, unless the rate is reset.
+        """
+        if self._resets:
+            return super().balance_at(k)
+        self._check_payment_number(k, 0)
+        if self.round_to_cents:
+            installment = utils.to_cents(self._calculate_principal())
+            balance = max(utils.to_cents(self._amount) - k * installment, 0)
+            return (balance if k < self._period else 0) / 100
+        return self._amount - k * self._calculate_principal()
+
+
+def get_annuity_coefficient(monthly_rate: Any, period: Any) -> Any:
+    """Calculates the share of the loan amount paid every month.
+
+    Works with floats and with NumPy arrays of rates and periods.
+
+    Args:
+        monthly_rate: monthly interest rate as a fraction (rate / 1200)
+        period: loan term in months
+    """
+    numerator = monthly_rate * (1 + monthly_rate) ** period
+    denominator = (1 + monthly_rate) ** period - 1
+    return numerator / denominator
+
+
+@functools.lru_cache(maxsize=ANNUITY_COEFFICIENTS_CACHE_SIZE)
+def get_annuity_coefficient_by_rate(rate: float, period: float) -> float:
+    """Returns the annuity coefficient of the annual percentage rate.
+
+    The coefficients are cached, so the loans of the same product terms
+    share them.
+    """
+    return get_annuity_coefficient(rate / 1200, period)
+
+
+def get_annuity_coefficient_derivative(monthly_rate: Any, period: Any) -> Any:
+    """Calculates the derivative of the annuity coefficient by the monthly rate.
+
+    The coefficient is r + r / D, where D = (1 + r) ** n - 1, so the
+    derivative is 1 + 1 / D - r * n * (1 + r) ** (n - 1) / D ** 2.
+    """
+    growth = (1 + monthly_rate) ** (period - 1)
+    denominator = growth * (1 + monthly_rate) - 1
+    slope = monthly_rate * period * growth / (denominator * denominator)
+    return 1 + 1 / denominator - slope
+
+
+ANNUITY_METHODS = ("a", "ann", "annuity")
+STRAIGHT_LINE_METHODS = ("s", "straight-line", "str", "sl")
+
+
+def get_loan_type(method: str) -> Union[Type[Annuity], Type[StraightLine]]:
+    """Returns the loan type by the name of the amortization method."""
+    if method in ANNUITY_METHODS:
+        return Annuity
+    elif method in STRAIGHT_LINE_METHODS:
+        return StraightLine
+    raise ValueError(f"Invalid method option: {method}")
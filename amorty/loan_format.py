@@ -1,20 +1,85 @@
+import contextlib
+import csv
+import itertools
+import json
 import os
+import sys
 from abc import ABC, abstractmethod
-from typing import Iterator, List
-
-import xlsxwriter
-from tabulate import tabulate
+from typing import (
+    IO,
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 from amorty import utils
 from amorty.loan import LoanDetails
 
+if TYPE_CHECKING:
+    from amorty.portfolio import LoanSchedule
+
+EXCEL_MAX_ROWS = 1_048_576
+EXCEL_SHEET_NAME_LENGTH = 31
+EXCEL_SHEET_NAME_FORBIDDEN = str.maketrans(dict.fromkeys("[]:*?/\\", "_"))
+# Limit of the open files, if the limit of the process is not known (as on
+# Windows), and the files left for the rest of the process
+DEFAULT_OPEN_FILES_LIMIT = 512
+RESERVED_OPEN_FILES = 64
+
+# Widths of the date and the days of a period in the table
+DATE_WIDTH = len("yyyy-mm-dd")
+DAYS_WIDTH = len("366")
+# Size of the output buffer of the text formats in bytes
+WRITE_BUFFER_SIZE = 1024 * 1024
+# Number of rows in a record batch of Parquet
+PARQUET_BATCH_SIZE = 65_536
+# Path of the output file or the file object to write to
+Output = Union[str, "os.PathLike[str]", IO[Any]]
+# JSON object of a schedule row, float repr is the same as in json.dumps
+JSONL_ROW = (
+    '{"date": "%s", "day": %d, "principal": %r, '
+    '"interest": %r, "payment": %r, "balance": %r}\n'
+)
+# JSON object of a schedule row with the JSON of the loan id
+JSONL_LOAN_ROW = '{"loan_id": %s, ' + JSONL_ROW[1:]
+
+
+def get_default_excel_path() -> str:
+    """Returns the path of loan.xlsx in the Downloads folder."""
+    return get_default_path("xlsx")
+
+
+def get_default_path(extension: str) -> str:
+    """Returns the path of the loan file with the extension in Downloads."""
+    return os.path.join(os.path.expanduser("~"), "Downloads", f"loan.{extension}")
+
 
 class Format(ABC):
-    """Abstract class for building different format of loan schedule."""
+    """Abstract class for building different format of loan schedule.
 
-    def __init__(self, loan: Iterator[LoanDetails], header: List[str]) -> None:
+    The output is a path or an open file object, which is written to but
+    not closed: a text stream for the text formats and a binary one for
+    Excel and Parquet.
+    """
+
+    def __init__(
+        self,
+        loan: Iterable[Any],
+        header: List[str],
+        output: Optional[Output] = None,
+        progress: Optional[utils.Progress] = None,
+    ) -> None:
         self.loan = loan
         self.header = header
+        self.output = output
+        self.progress = progress or utils.Progress()
 
     @abstractmethod
     def write(self) -> None:
@@ -22,50 +87,396 @@ class Format(ABC):
 
 
 class TableFormat(Format):
-    """Builds a loan schedule in table format."""
+    """Builds a loan schedule in table format.
+
+    The table has the simple layout of reStructuredText and is written row by
+    row, while the schedule is being generated, so the output starts at once
+    and no rows are kept in memory. The column widths are fixed before the
+    first row: the amount of the loan with the interest of the first period
+    bounds the payments and the balances. A wider value widens its row only.
+    """
 
     def write(self) -> None:
-        """Output the loan amortization schedule in table format to the terminal."""
-        table = self.loan
-        print(
-            tabulate(
-                table,
-                headers=self.header,
-                floatfmt=",.2f",
-                numalign="right",
-                tablefmt="rst",
+        """Output the loan amortization schedule in table format to the terminal.
+
+        The table is written to the output file instead, if it is set.
+        """
+        rows = iter(utils.track(self.loan, self.progress))
+        first_row = next(rows, None)
+        widths = get_column_widths(self.header, first_row)
+        border = "  ".join("=" * width for width in widths) + "\n"
+        header = [f"{self.header[0]:<{widths[0]}}"] + [
+            f"{name:>{width}}" for name, width in zip(self.header[1:], widths[1:])
+        ]
+        with open_output(self.output) as file:
+            file.write(border + "  ".join(header) + "\n" + border)
+            if first_row is not None:
+                row_format = get_row_format(widths)
+                file.write(format_table_row(row_format, first_row))
+                file.flush()
+                file.writelines(format_table_row(row_format, row) for row in rows)
+            file.write(border)
+
+
+class CSVFormat(Format):
+    """Builds a loan schedule in CSV format with the header row.
+
+    The rows are written to stdout, or to the output file if it is set.
+    With loan_ids, the loan is an iterable of LoanSchedule and the id of
+    the loan is written in the first column of its rows.
+    """
+
+    def __init__(
+        self,
+        loan: Iterable[Any],
+        header: List[str],
+        output: Optional[Output] = None,
+        progress: Optional[utils.Progress] = None,
+        loan_ids: bool = False,
+    ) -> None:
+        super().__init__(loan, header, output, progress)
+        self.loan_ids = loan_ids
+
+    def write(self) -> None:
+        """Writes the rows, the progress is advanced with every loan or row."""
+        items = utils.track(self.loan, self.progress)
+        with open_output(self.output) as file:
+            writer = csv.writer(file)
+            writer.writerow(self.header)
+            if not self.loan_ids:
+                writer.writerows((row.date.isoformat(), *row[1:]) for row in items)
+                return
+            writer.writerows(
+                (spec.loan_id, row.date.isoformat(), *row[1:])
+                for spec, rows in items
+                for row in rows
             )
+
+
+class JSONLFormat(Format):
+    """Builds a loan schedule in JSON Lines format.
+
+    Every row is an object with the fields of LoanDetails, the rows are
+    written to stdout, or to the output file if it is set. With loan_ids,
+    the loan is an iterable of LoanSchedule and the objects start with the
+    loan_id field.
+    """
+
+    def __init__(
+        self,
+        loan: Iterable[Any],
+        header: List[str],
+        output: Optional[Output] = None,
+        progress: Optional[utils.Progress] = None,
+        loan_ids: bool = False,
+    ) -> None:
+        super().__init__(loan, header, output, progress)
+        self.loan_ids = loan_ids
+
+    def write(self) -> None:
+        """Writes the rows, the progress is advanced with every loan or row."""
+        items = utils.track(self.loan, self.progress)
+        with open_output(self.output) as file:
+            if not self.loan_ids:
+                file.writelines(
+                    JSONL_ROW % (row.date.isoformat(), *row[1:]) for row in items
+                )
+                return
+            for spec, rows in items:
+                loan_id = json.dumps(spec.loan_id)
+                file.writelines(
+                    JSONL_LOAN_ROW % (loan_id, row.date.isoformat(), *row[1:])
+                    for row in rows
+                )
+
+
+class ParquetFormat(Format):
+    """Builds a loan schedule in Parquet format, requires pyarrow.
+
+    The columns have the names of the fields of LoanDetails. The rows are
+    converted to columns and written in record batches of
+    PARQUET_BATCH_SIZE rows, so the memory does not depend on the length
+    of the schedule.
+    """
+
+    def __init__(
+        self,
+        loan: Iterable[LoanDetails],
+        header: List[str],
+        output: Optional[Output] = None,
+        progress: Optional[utils.Progress] = None,
+    ) -> None:
+        super().__init__(loan, header, progress=progress)
+        self.output: Output = (
+            get_default_path("parquet") if output is None else output
+        )
+
+    def write(self) -> None:
+        pa, pq = import_pyarrow()
+        schema = pa.schema(
+            [
+                ("date", pa.date32()),
+                ("day", pa.int32()),
+                ("principal", pa.float64()),
+                ("interest", pa.float64()),
+                ("payment", pa.float64()),
+                ("balance", pa.float64()),
+            ]
         )
+        rows = utils.track(self.loan, self.progress)
+        with pq.ParquetWriter(self.output, schema) as writer:
+            for batch in iter_batches(rows, PARQUET_BATCH_SIZE):
+                writer.write_batch(pa.record_batch(list(zip(*batch)), schema=schema))
 
 
 class ExcelFormat(Format):
-    """Builds a loan schedule in excel format."""
+    """Builds a loan schedule in excel format.
 
-    @utils.show_progress
-    def write(self) -> None:
-        """Creates and saves the loan amortization schedule in Excel."""
-        loan_details = self.loan
-        headers = self.header
+    The workbook is written in the constant memory mode of xlsxwriter: every
+    row is flushed to disk as soon as the next one is started.
+    """
 
-        home_path = os.path.expanduser("~")
-        filename = "loan.xlsx"
-        file_path = os.path.join(home_path, "Downloads", filename)
+    def __init__(
+        self,
+        loan: Iterable[LoanDetails],
+        header: List[str],
+        output: Optional[Output] = None,
+        progress: Optional[utils.Progress] = None,
+    ) -> None:
+        super().__init__(loan, header, progress=progress)
+        self.output: Output = get_default_excel_path() if output is None else output
+
+    def write(self) -> None:
+        """Creates and saves the loan amortization schedule in Excel.
 
-        with xlsxwriter.Workbook(file_path) as workbook:
+        The progress is advanced with every written row.
+        """
+        with create_workbook(self.output) as workbook:
+            formats = add_formats(workbook)
             ws = workbook.add_worksheet()
-            bold_font = workbook.add_format({"bold": True})
-            date_format = workbook.add_format({"num_format": "DD.MM.YYYY"})
-            money_format = workbook.add_format({"num_format": "#,##0.00"})
-
-            # Iterate over the headers and write it out column by column
-            for col, header in enumerate(headers):
-                ws.write_string(0, col, header, bold_font)
-
-            # Iterate over the data and write it out row by row
-            for row, loan in enumerate(loan_details, start=1):
-                ws.write(row, 0, loan.date, date_format)
-                ws.write(row, 1, loan.day)
-                ws.write(row, 2, loan.principal, money_format)
-                ws.write(row, 3, loan.interest, money_format)
-                ws.write(row, 4, loan.payment, money_format)
-                ws.write(row, 5, loan.balance, money_format)
+            write_header(ws, self.header, formats)
+            write_rows(ws, utils.track(self.loan, self.progress), formats)
+
+
+class ExcelPortfolioFormat(Format):
+    """Builds the loan schedules of a portfolio in excel format.
+
+    The loan schedules are written either to a worksheet per loan ("sheets"
+    layout) or one after another to a long worksheet with the loan id in the
+    first column ("long" layout). A long worksheet is continued on a new one
+    when it reaches the row limit of Excel.
+
+    Every worksheet keeps its temporary file open until the workbook is
+    saved, so the number of loans of the "sheets" layout is limited by the
+    open files of the process (see get_max_sheets).
+    """
+
+    layouts = ("sheets", "long")
+
+    def __init__(
+        self,
+        loan: Iterable["LoanSchedule"],
+        header: List[str],
+        output: Optional[Output] = None,
+        layout: str = "long",
+        progress: Optional[utils.Progress] = None,
+    ) -> None:
+        if layout not in self.layouts:
+            raise ValueError(f"Invalid layout option: {layout}")
+        super().__init__(loan, header, progress=progress)
+        self.output: Output = get_default_excel_path() if output is None else output
+        self.layout = layout
+
+    def write(self) -> None:
+        """Creates and saves the loan amortization schedules in Excel.
+
+        The progress is advanced with every written loan. The workbook is
+        saved, when it is closed, even after an error, so the output file
+        with the loans written before the error is removed.
+        """
+        try:
+            with create_workbook(self.output) as workbook:
+                formats = add_formats(workbook)
+                if self.layout == "sheets":
+                    self._write_sheets(workbook, formats)
+                else:
+                    self._write_long_sheet(workbook, formats)
+        except Exception:
+            if isinstance(self.output, (str, os.PathLike)):
+                with contextlib.suppress(OSError):
+                    os.remove(self.output)
+            raise
+
+    def _write_sheets(self, workbook: Any, formats: Dict[str, Any]) -> None:
+        names: Set[str] = set()
+        max_sheets = get_max_sheets()
+        schedules = utils.track(self.loan, self.progress)
+        for number, (spec, rows) in enumerate(schedules, start=1):
+            if number > max_sheets:
+                raise ValueError(
+                    f"A worksheet per loan is limited to {max_sheets} loans by the "
+                    "limit of the open files, use the long layout"
+                )
+            name = get_sheet_name(spec.loan_id, number, names)
+            names.add(name.lower())
+            ws = workbook.add_worksheet(name)
+            write_header(ws, self.header, formats)
+            write_rows(ws, rows, formats)
+
+    def _write_long_sheet(self, workbook: Any, formats: Dict[str, Any]) -> None:
+        header = ["Loan", *self.header]
+        ws, row = workbook.add_worksheet(), 1
+        write_header(ws, header, formats)
+        for spec, rows in utils.track(self.loan, self.progress):
+            for loan in rows:
+                if row == EXCEL_MAX_ROWS:
+                    ws, row = workbook.add_worksheet(), 1
+                    write_header(ws, header, formats)
+                ws.write(row, 0, spec.loan_id)
+                write_row(ws, row, loan, formats, first_col=1)
+                row += 1
+
+
+@contextlib.contextmanager
+def open_output(output: Optional[Output]) -> Iterator[IO[str]]:
+    """Opens the output file with a large buffer or uses stdout.
+
+    A file object is used as it is and is not closed.
+    """
+    if output is None:
+        yield sys.stdout
+        return
+    if not isinstance(output, (str, os.PathLike)):
+        yield output
+        return
+    with open(output, "w", newline="", buffering=WRITE_BUFFER_SIZE) as file:
+        yield file
+
+
+def iter_batches(rows: Iterable[Any], size: int) -> Iterator[Tuple[Any, ...]]:
+    """Splits the rows into tuples of the size, the last one may be shorter."""
+    iterator = iter(rows)
+    batch = tuple(itertools.islice(iterator, size))
+    while batch:
+        yield batch
+        batch = tuple(itertools.islice(iterator, size))
+
+
+def import_pyarrow() -> Tuple[Any, Any]:
+    """Imports pyarrow and its Parquet module."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError(
+            "Parquet format requires pyarrow, install it with "
+            "'pip install amorty[parquet]'"
+        ) from error
+    return pyarrow, pyarrow.parquet
+
+
+def get_column_widths(
+    header: List[str], first_row: Optional[LoanDetails]
+) -> List[int]:
+    """Calculates the widths of the table columns before the rows are known.
+
+    The headers of the number columns are padded by two spaces. The money
+    values are bounded by the amount of the loan (the balance and the
+    principal of the first row) plus the first interest.
+    """
+    money_width = 0
+    if first_row is not None:
+        bound = first_row.balance + first_row.principal + first_row.interest
+        money_width = len(f"{bound:,.2f}")
+    value_widths = [DATE_WIDTH, DAYS_WIDTH] + [money_width] * (len(header) - 2)
+    return [
+        max(len(name) + (2 if col else 0), value_width)
+        for col, (name, value_width) in enumerate(zip(header, value_widths))
+    ]
+
+
+def get_row_format(widths: List[int]) -> str:
+    """Creates the format string of a table row with the column widths."""
+    date, days, *money = widths
+    return "  ".join(
+        [f"{{:<{date}}}", f"{{:>{days}}}", *(f"{{:>{width},.2f}}" for width in money)]
+    )
+
+
+def format_table_row(row_format: str, row: LoanDetails) -> str:
+    return row_format.format(row.date.isoformat(), *row[1:]) + "\n"
+
+
+def create_workbook(output: Output) -> Any:
+    """Creates a workbook that does not keep the written rows in memory."""
+    import xlsxwriter
+
+    return xlsxwriter.Workbook(output, {"constant_memory": True})
+
+
+def add_formats(workbook: Any) -> Dict[str, Any]:
+    """Adds the cell formats of the schedule to the workbook."""
+    return {
+        "bold": workbook.add_format({"bold": True}),
+        "date": workbook.add_format({"num_format": "DD.MM.YYYY"}),
+        "money": workbook.add_format({"num_format": "#,##0.00"}),
+    }
+
+
+def write_header(ws: Any, header: List[str], formats: Dict[str, Any]) -> None:
+    """Writes the headers to the first row of the worksheet."""
+    for col, name in enumerate(header):
+        ws.write_string(0, col, name, formats["bold"])
+
+
+def write_rows(
+    ws: Any, loan_details: Iterable[LoanDetails], formats: Dict[str, Any]
+) -> None:
+    """Writes the loan schedule row by row after the headers."""
+    for row, loan in enumerate(loan_details, start=1):
+        write_row(ws, row, loan, formats)
+
+
+def write_row(
+    ws: Any,
+    row: int,
+    loan: LoanDetails,
+    formats: Dict[str, Any],
+    first_col: int = 0,
+) -> None:
+    """Writes a row of the loan schedule starting from the first column."""
+    ws.write(row, first_col, loan.date, formats["date"])
+    ws.write(row, first_col + 1, loan.day)
+    ws.write(row, first_col + 2, loan.principal, formats["money"])
+    ws.write(row, first_col + 3, loan.interest, formats["money"])
+    ws.write(row, first_col + 4, loan.payment, formats["money"])
+    ws.write(row, first_col + 5, loan.balance, formats["money"])
+
+
+def get_max_sheets() -> int:
+    """Returns the number of the worksheets that can be kept open at once."""
+    try:
+        import resource
+    except ImportError:
+        limit = DEFAULT_OPEN_FILES_LIMIT
+    else:
+        limit = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+        if limit == resource.RLIM_INFINITY:
+            limit = DEFAULT_OPEN_FILES_LIMIT
+    return max(1, limit - RESERVED_OPEN_FILES)
+
+
+def get_sheet_name(loan_id: Any, number: int, names: Iterable[str]) -> str:
+    """Creates a unique worksheet name allowed by Excel for the loan.
+
+    A repeated name gets the number of the loan, and a counter, if the name
+    with the number is also taken.
+    """
+    name = str(loan_id if loan_id is not None else f"Loan {number}")
+    name = name.translate(EXCEL_SHEET_NAME_FORBIDDEN)[:EXCEL_SHEET_NAME_LENGTH]
+    unique_name, copy = name, 1
+    while not unique_name.strip("'") or unique_name.lower() in names:
+        suffix = f" ({number})" if copy == 1 else f" ({number}-{copy})"
+        unique_name = name[: EXCEL_SHEET_NAME_LENGTH - len(suffix)] + suffix
+        copy += 1
+    return unique_name
@@ -0,0 +1,263 @@
+"""Amortization of loan portfolios.
+
+The loan specifications are read lazily from CSV, JSON Lines or Python
+objects, split into chunks and amortized in a pool of worker processes.
+The calendar and the day count of a loan are given by their names, so that
+every worker process compiles a calendar only once.
+"""
+
+import csv
+import datetime
+import functools
+import itertools
+import json
+import os
+from collections import deque, namedtuple
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+from amorty import utils
+from amorty.aggregation import CashFlowBuckets
+from amorty.loan import Loan, get_loan_type
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+    from amorty.cache import ScheduleCache
+
+LoanSpec = namedtuple(
+    "LoanSpec",
+    "amount period rate date method loan_id calendar day_count",
+    defaults=("annuity", None, None, None),
+)
+LoanSchedule = namedtuple("LoanSchedule", "spec rows")
+
+T = TypeVar("T")
+
+DEFAULT_CHUNKSIZE = 500
+
+SCHEDULE_FIELDS = (
+    "loan_id",
+    "date",
+    "day",
+    "principal",
+    "interest",
+    "payment",
+    "balance",
+)
+
+
+def make_spec(fields: Mapping[str, Any]) -> LoanSpec:
+    """Creates a loan specification from a mapping of fields.
+
+    The values may be strings, as they are read from a CSV file.
+    """
+    return LoanSpec(
+        amount=float(fields["amount"]),
+        period=int(fields["period"]),
+        rate=float(fields["rate"]),
+        date=utils.convert_date(fields["date"]),
+        method=fields.get("method") or "annuity",
+        loan_id=fields.get("loan_id"),
+        calendar=fields.get("calendar") or None,
+        day_count=fields.get("day_count") or None,
+    )
+
+
+def read_csv(lines: Iterable[str]) -> Iterator[LoanSpec]:
+    """Reads loan specifications from CSV lines with a header row."""
+    for row in csv.DictReader(lines):
+        yield make_spec(row)
+
+
+def read_jsonl(lines: Iterable[str]) -> Iterator[LoanSpec]:
+    """Reads loan specifications from JSON Lines, skipping blank lines."""
+    for line in lines:
+        if line.strip():
+            yield make_spec(json.loads(line))
+
+
+def read_specs(path: str) -> Iterator[LoanSpec]:
+    """Reads loan specifications from a .csv or a .jsonl file."""
+    readers = {".csv": read_csv, ".jsonl": read_jsonl}
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in readers:
+        raise ValueError(f"Unsupported file type: {path}")
+    with open(path, newline="") as file:
+        yield from readers[extension](file)
+
+
+def make_loan(spec: LoanSpec) -> Loan:
+    """Creates the loan of the specification."""
+    loan_type = get_loan_type(spec.method)
+    return loan_type(
+        spec.amount,
+        spec.period,
+        spec.rate,
+        spec.date,
+        calendar=spec.calendar,
+        day_count=spec.day_count,
+    )
+
+
+def create_schedule(
+    spec: LoanSpec, cache: Optional["ScheduleCache"] = None
+) -> LoanSchedule:
+    """Builds the schedule of the loan, or takes it from the cache."""
+    loan = make_loan(spec)
+    if cache is not None:
+        return LoanSchedule(spec, cache.get_schedule(loan))
+    return LoanSchedule(spec, tuple(loan.create_loan()))
+
+
+def amortize_portfolio(
+    specs: Iterable[LoanSpec],
+    workers: Optional[int] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    ordered: bool = True,
+) -> Iterator[LoanSchedule]:
+    """Builds the schedules of all loans of the portfolio.
+
+    Args:
+        specs: loan specifications
+        workers: number of worker processes, the loans are amortized in the
+            current process if it is 1 (all CPUs by default)
+        chunksize: number of loans sent to a worker at once
+        ordered: yield the schedules in the order of the specifications,
+            otherwise as soon as their chunk is finished
+    Returns:
+        Iterator of LoanSchedule
+    """
+    chunks = _map_chunks(_amortize_chunk, specs, workers, chunksize, ordered)
+    for schedules in chunks:
+        yield from schedules
+
+
+def aggregate_cash_flows(
+    specs: Iterable[LoanSpec],
+    start: Union[str, datetime.date],
+    end: Union[str, datetime.date],
+    frequency: str = "month",
+    workers: Optional[int] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> CashFlowBuckets:
+    """Sums the payments of the portfolio into buckets of days or months.
+
+    The schedules are streamed into the buckets without creating their rows,
+    the workers return the buckets of their chunks, which are merged.
+
+    Args:
+        specs: loan specifications
+        start: first day of the buckets
+        end: last day of the buckets
+        frequency: "day" or "month"
+        workers: number of worker processes (all CPUs by default)
+        chunksize: number of loans sent to a worker at once
+    Returns:
+        CashFlowBuckets with the sums of every bucket
+    """
+    buckets = CashFlowBuckets(start, end, frequency)
+    aggregate = functools.partial(
+        _aggregate_chunk, start=buckets.start, end=buckets.end, frequency=frequency
+    )
+    for chunk_buckets in _map_chunks(aggregate, specs, workers, chunksize, False):
+        buckets.merge(chunk_buckets)
+    return buckets
+
+
+def _amortize_chunk(specs: List[LoanSpec]) -> List[LoanSchedule]:
+    return [create_schedule(spec) for spec in specs]
+
+
+def _aggregate_chunk(
+    specs: List[LoanSpec],
+    start: datetime.date,
+    end: datetime.date,
+    frequency: str,
+) -> CashFlowBuckets:
+    buckets = CashFlowBuckets(start, end, frequency)
+    for spec in specs:
+        buckets.add_loan(make_loan(spec))
+    return buckets
+
+
+def _split(specs: Iterable[LoanSpec], chunksize: int) -> Iterator[List[LoanSpec]]:
+    """Splits the specifications into lists of chunksize items."""
+    iterator = iter(specs)
+    chunk = list(itertools.islice(iterator, chunksize))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(iterator, chunksize))
+
+
+def _map_chunks(
+    func: Callable[[List[LoanSpec]], T],
+    specs: Iterable[LoanSpec],
+    workers: Optional[int],
+    chunksize: int,
+    ordered: bool,
+) -> Iterator[T]:
+    """Applies func to the chunks of the specifications.
+
+    Only a couple of chunks per worker are submitted ahead, so the
+    specifications are read lazily and the results are streamed back.
+    """
+    chunks = _split(specs, chunksize)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(func, chunks)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(workers) as executor:
+        if ordered:
+            yield from _map_ordered(executor, func, chunks, 2 * workers)
+        else:
+            yield from _map_unordered(executor, func, chunks, 2 * workers)
+
+
+def _map_ordered(
+    executor: "Executor",
+    func: Callable[[List[LoanSpec]], T],
+    chunks: Iterator[List[LoanSpec]],
+    limit: int,
+) -> Iterator[T]:
+    pending: Deque[Any] = deque(
+        executor.submit(func, chunk) for chunk in itertools.islice(chunks, limit)
+    )
+    while pending:
+        result = pending.popleft().result()
+        for chunk in itertools.islice(chunks, 1):
+            pending.append(executor.submit(func, chunk))
+        yield result
+
+
+def _map_unordered(
+    executor: "Executor",
+    func: Callable[[List[LoanSpec]], T],
+    chunks: Iterator[List[LoanSpec]],
+    limit: int,
+) -> Iterator[T]:
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    pending = {
+        executor.submit(func, chunk) for chunk in itertools.islice(chunks, limit)
+    }
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            for chunk in itertools.islice(chunks, 1):
+                pending.add(executor.submit(func, chunk))
+            yield future.result()
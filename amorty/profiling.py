@@ -0,0 +1,205 @@
+"""Instrumentation of the schedule pipeline.
+
+The stages of the pipeline (the calendar, the amortization and the rendering)
+report their time and counters to the Stats of the process, when profiling
+is enabled. When it is disabled, the hooks return at once: the iterators are
+returned as they are and nothing is done per row.
+
+The time of a stage does not include the time of the stages nested in it,
+for example the rendering does not include the amortization of the rows it
+writes, so the times of the stages add up to the time of the pipeline.
+The stages are measured in the current process only, the worker processes
+of a portfolio are not measured.
+
+Usage::
+
+    from amorty import profiling
+
+    with profiling.profile() as stats:
+        list(Annuity(1000, 12, 10, "2021-05-15").create_loan())
+    stats.as_dict()  # {"times": {...}, "counters": {...}, "elapsed": ...}
+"""
+
+import contextlib
+import time
+from collections import Counter, defaultdict
+from typing import (
+    Any,
+    ContextManager,
+    DefaultDict,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+STAGES = ("calendar", "amortization", "rendering")
+
+
+class Stats:
+    """Timers and counters of the schedule pipeline.
+
+    Attributes
+    ----------
+    times: dict
+        Seconds spent in every stage, without the nested stages
+    counters: Counter
+        Number of the events: calendar lookups, periods computed, rows
+        written, cache hits and misses
+
+    Methods
+    -------
+    start(stage), stop()
+        Start and stop the timer of the stage, the stages may be nested
+    count(name, n=1)
+        Adds n to the counter
+    as_dict()
+        Returns the times, the counters and the elapsed time for exporting
+    format_summary()
+        Returns the table of the times and the counters
+    """
+
+    def __init__(self) -> None:
+        self.times: DefaultDict[str, float] = defaultdict(float)
+        self.counters: Counter = Counter()
+        self.started = time.perf_counter()
+        # Running stages: [stage, start time, time of the nested stages]
+        self._stack: List[List[Any]] = []
+
+    def start(self, stage: str) -> None:
+        self._stack.append([stage, time.perf_counter(), 0.0])
+
+    def stop(self) -> None:
+        stage, start, nested = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.times[stage] += elapsed - nested
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "times": dict(self.times),
+            "counters": dict(self.counters),
+            "elapsed": time.perf_counter() - self.started,
+        }
+
+    def format_summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        stages = [stage for stage in STAGES if stage in self.times]
+        stages += sorted(set(self.times) - set(STAGES))
+        times = [(stage, self.times[stage]) for stage in stages]
+        times.append(("other", elapsed - sum(self.times.values())))
+        lines = [f"{'Stage':<24}{'Time, ms':>12}{'Share':>9}"]
+        for stage, seconds in times:
+            share = seconds / elapsed
+            lines.append(f"{stage:<24}{seconds * 1000:>12.2f}{share:>9.1%}")
+        lines.append(f"{'total':<24}{elapsed * 1000:>12.2f}")
+        lines.append("")
+        lines.append(f"{'Counter':<24}{'Value':>12}")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"{name:<24}{value:>12,}")
+        return "\n".join(lines)
+
+
+_stats: Optional[Stats] = None
+
+
+def enable(stats: Optional[Stats] = None) -> Stats:
+    """Starts collecting the stats of the process into new or given Stats."""
+    global _stats
+    _stats = stats or Stats()
+    return _stats
+
+
+def disable() -> Optional[Stats]:
+    """Stops collecting the stats, returns the collected ones."""
+    global _stats
+    stats, _stats = _stats, None
+    return stats
+
+
+def get_stats() -> Optional[Stats]:
+    """Returns the stats being collected, None if profiling is disabled."""
+    return _stats
+
+
+@contextlib.contextmanager
+def profile(stats: Optional[Stats] = None) -> Iterator[Stats]:
+    """Collects the stats of the block, the previous stats are restored."""
+    previous = _stats
+    try:
+        yield enable(stats)
+    finally:
+        if previous is None:
+            disable()
+        else:
+            enable(previous)
+
+
+def count(name: str, n: int = 1) -> None:
+    if _stats is not None:
+        _stats.count(name, n)
+
+
+def timer(stage: str) -> ContextManager[None]:
+    """Measures the block as the stage."""
+    if _stats is None:
+        return contextlib.nullcontext()
+    return _timer(_stats, stage)
+
+
+@contextlib.contextmanager
+def _timer(stats: Stats, stage: str) -> Iterator[None]:
+    stats.start(stage)
+    try:
+        yield
+    finally:
+        stats.stop()
+
+
+def timed(stage: str, items: Iterable[T], counter: Optional[str] = None) -> Iterator[T]:
+    """Measures taking the items from the iterable as the stage.
+
+    The items are counted with the counter, if it is set. The iterator of
+    the items is returned as it is, if profiling is disabled.
+    """
+    if _stats is None:
+        return iter(items)
+    return _timed(_stats, stage, items, counter)
+
+
+def _timed(
+    stats: Stats, stage: str, items: Iterable[T], counter: Optional[str]
+) -> Iterator[T]:
+    iterator = iter(items)
+    while True:
+        stats.start(stage)
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            stats.stop()
+        if counter is not None:
+            stats.count(counter)
+        yield item
+
+
+def counted(name: str, items: Iterable[T]) -> Iterator[T]:
+    """Counts the items taken from the iterable, if profiling is enabled."""
+    if _stats is None:
+        return iter(items)
+    return _counted(_stats, name, items)
+
+
+def _counted(stats: Stats, name: str, items: Iterable[T]) -> Iterator[T]:
+    for item in items:
+        stats.count(name)
+        yield item
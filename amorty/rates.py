@@ -0,0 +1,87 @@
+"""Floating rates.
+
+The rate of a floating-rate loan follows a rate curve, for example the key
+rate: at every reset the rate is fixed to the rate of the curve in effect
+at the start of the period plus the spread of the loan, and the payment is
+recalculated from the balance and the remaining term (see Loan.rate_resets).
+
+When the curve is changed, only the loans whose resets are changed get new
+resets, and their payments are recalculated from the earliest changed
+reset, the payments before it are kept.
+
+Usage::
+
+    from amorty.rates import apply_rate_curve
+
+    curve = {"2024-01-01": 16.0, "2024-07-29": 18.0}
+    changed = apply_rate_curve(loans, curve, spread=2.5)
+"""
+
+import bisect
+import datetime
+from typing import Iterable, List, Mapping, Tuple, Union
+
+from amorty import utils
+from amorty.loan import Loan, RateReset
+
+RateCurve = Mapping[Union[str, datetime.date], float]
+
+
+def get_rate_resets(
+    loan: Loan, curve: RateCurve, spread: float = 0.0, reset_every: int = 1
+) -> List[RateReset]:
+    """Returns the resets of the loan rate to the curve plus the spread.
+
+    The rate is fixed every reset_every periods to the rate of the latest
+    date of the curve on or before the start of the period. The rate of the
+    loan is used before the first date of the curve. A reset is returned only
+    when the rate is changed.
+    """
+    return _get_rate_resets(loan, _sort_curve(curve), spread, reset_every)
+
+
+def apply_rate_curve(
+    loans: Iterable[Loan],
+    curve: RateCurve,
+    spread: float = 0.0,
+    reset_every: int = 1,
+) -> List[Loan]:
+    """Sets the resets of the loans to the curve, returns the changed loans.
+
+    The schedules of the other loans are kept, the changed loans recalculate
+    only the payments from their earliest changed reset.
+    """
+    sorted_curve = _sort_curve(curve)
+    changed = []
+    for loan in loans:
+        resets = _get_rate_resets(loan, sorted_curve, spread, reset_every)
+        if tuple(resets) != loan.rate_resets:
+            loan.rate_resets = resets
+            changed.append(loan)
+    return changed
+
+
+def _sort_curve(curve: RateCurve) -> Tuple[List[datetime.date], List[float]]:
+    points = sorted((utils.convert_date(date), rate) for date, rate in curve.items())
+    return [date for date, _ in points], [rate for _, rate in points]
+
+
+def _get_rate_resets(
+    loan: Loan,
+    curve: Tuple[List[datetime.date], List[float]],
+    spread: float,
+    reset_every: int,
+) -> List[RateReset]:
+    if not (isinstance(reset_every, int) and reset_every > 0):
+        raise ValueError("Reset interval must be integer type and positive number")
+    dates, rates = curve
+    plan = loan.date.get_schedule_plan()
+    period_starts = (loan.date.date,) + plan.dates[:-1]
+    resets = []
+    rate = loan.rate
+    for index in range(0, loan.period, reset_every):
+        position = bisect.bisect_right(dates, period_starts[index])
+        if position and rates[position - 1] + spread != rate:
+            rate = rates[position - 1] + spread
+            resets.append(RateReset(index + 1, rate))
+    return resets
@@ -0,0 +1,140 @@
+"""Compact columnar storage of loan schedules."""
+
+import datetime
+from array import array
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Union, overload
+
+from amorty.loan import Loan, LoanDetails
+
+INT_COLUMNS = ("date", "day")
+FLOAT_COLUMNS = ("principal", "interest", "payment", "balance")
+
+
+class Schedule(Sequence):
+    """Schedule of a loan stored by columns.
+
+    Every column is an array of machine numbers: the dates are stored as
+    ordinals (see datetime.date.toordinal), the days as integers and the
+    amounts as doubles. A row takes 40 bytes instead of the 200-230 bytes
+    of a LoanDetails with its float and date objects.
+
+    The rows are still available as LoanDetails, which are created on access.
+    The columns can be exported without copying through the buffer protocol.
+
+    Methods
+    -------
+    from_rows(rows)
+        Creates a schedule from LoanDetails
+    from_loan(loan)
+        Calculates the schedule of the loan without creating LoanDetails
+    column(name)
+        Returns a read-only memoryview of the column
+    to_numpy()
+        Returns the columns as NumPy arrays sharing the memory of the schedule
+    """
+
+    fields = LoanDetails._fields
+
+    def __init__(self, columns: Optional[Dict[str, array]] = None) -> None:
+        if columns is None:
+            columns = {name: _create_column(name) for name in self.fields}
+        if set(columns) != set(self.fields):
+            raise ValueError(f"Schedule columns must be {', '.join(self.fields)}")
+        if len({len(column) for column in columns.values()}) > 1:
+            raise ValueError("Schedule columns must have the same length")
+        self._columns = columns
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[LoanDetails]) -> "Schedule":
+        schedule = cls()
+        for row in rows:
+            schedule.append(row)
+        return schedule
+
+    @classmethod
+    def from_loan(cls, loan: Loan) -> "Schedule":
+        plan = loan.date.get_schedule_plan()
+        columns = {
+            "date": array("i", (date.toordinal() for date in plan.dates)),
+            "day": array("i", plan.days),
+        }
+        columns.update((name, array("d")) for name in FLOAT_COLUMNS)
+        for payment, balance, principal, interest in loan.amortize(plan):
+            columns["principal"].append(principal)
+            columns["interest"].append(interest)
+            columns["payment"].append(payment)
+            columns["balance"].append(balance)
+        return cls(columns)
+
+    def append(self, row: LoanDetails) -> None:
+        """Adds a row to the end of the schedule."""
+        self._columns["date"].append(row.date.toordinal())
+        for name, value in zip(self.fields[1:], row[1:]):
+            self._columns[name].append(value)
+
+    def __len__(self) -> int:
+        return len(self._columns["date"])
+
+    @overload
+    def __getitem__(self, index: int) -> LoanDetails:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "Schedule":
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            columns = self._columns
+            return type(self)({name: columns[name][index] for name in self.fields})
+        return self._get_row(index)
+
+    def __iter__(self) -> Iterator[LoanDetails]:
+        for index in range(len(self)):
+            yield self._get_row(index)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Schedule):
+            return NotImplemented
+        return self._columns == other._columns
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} of {len(self)} rows>"
+
+    def _get_row(self, index: int) -> LoanDetails:
+        columns = self._columns
+        return LoanDetails(
+            datetime.date.fromordinal(columns["date"][index]),
+            columns["day"][index],
+            columns["principal"][index],
+            columns["interest"][index],
+            columns["payment"][index],
+            columns["balance"][index],
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Returns the size of the column buffers in bytes."""
+        return sum(len(column) * column.itemsize for column in self._columns.values())
+
+    def column(self, name: str) -> memoryview:
+        """Returns a read-only view of the column buffer."""
+        if name not in self._columns:
+            raise ValueError(f"Invalid column name: {name}")
+        return memoryview(self._columns[name]).toreadonly()
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """Returns the columns as NumPy arrays without copying them.
+
+        The arrays are read-only views of the schedule, the dates are ordinals.
+        """
+        import numpy as np
+
+        return {
+            name: np.frombuffer(self.column(name), dtype=self._columns[name].typecode)
+            for name in self.fields
+        }
+
+
+def _create_column(name: str) -> array:
+    return array("i" if name in INT_COLUMNS else "d")
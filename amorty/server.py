@@ -0,0 +1,346 @@
+"""Local HTTP service of loan schedules.
+
+``amorty serve`` keeps a process running with the calendars compiled and the
+schedules cached, so a request does not pay for the interpreter startup, the
+imports and the calendar construction.
+
+The loan specifications are posted as JSON to ``/schedules``: an object with
+the fields of portfolio.LoanSpec returns a schedule, a list of objects returns
+a list of schedules. ``/health`` returns the cache statistics.
+
+The concurrent requests are batched: the loans that are not cached wait in a
+queue, while the worker pool is busy, and are sent to a worker together.
+So the batches are small under a light load and grow with the load. The same
+loan requested several times is calculated once.
+"""
+
+import asyncio
+import json
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from amorty import portfolio
+from amorty.cache import Schedule, ScheduleCache, make_key
+from amorty.date import CALENDARS, get_default_calendar
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+DEFAULT_CACHE_SIZE = 4096
+DEFAULT_MAX_BATCH = 256
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+Key = Tuple[Hashable, ...]
+
+
+class HTTPError(Exception):
+    """Error returned to the client with the status code."""
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(status, message)
+        self.status = status
+        self.message = message
+
+
+class ScheduleServer:
+    """Asyncio server of loan schedules.
+
+    Attributes
+    ----------
+    workers: int, optional
+        Number of worker processes (all CPUs by default), the schedules are
+        calculated in a thread of the server process if it is 1
+    cache_size: int, optional
+        Number of schedules kept in memory
+    max_batch: int, optional
+        Maximum number of loans sent to a worker at once
+
+    Methods
+    -------
+    start(host, port, path=None)
+        Warms up the calendar and the workers and starts listening on the
+        TCP port or on the Unix socket path
+    get_schedules(specs)
+        Returns the schedules of the loan specifications
+    close()
+        Stops the workers
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        max_batch: int = DEFAULT_MAX_BATCH,
+    ) -> None:
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = ScheduleCache(cache_size)
+        self.max_batch = max_batch
+        self._executor: Optional[Executor] = None
+        self._queue: "asyncio.Queue[Tuple[Key, portfolio.LoanSpec]]"
+        self._slots: asyncio.Semaphore
+        self._pending: Dict[Key, "asyncio.Future[Schedule]"] = {}
+        self._batcher: Optional["asyncio.Future[None]"] = None
+
+    async def start(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        path: Optional[str] = None,
+    ) -> asyncio.AbstractServer:
+        get_default_calendar()
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(self.workers, initializer=warm_up)
+        else:
+            self._executor = ThreadPoolExecutor(1)
+        # Starts the workers and compiles their calendars before the requests
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(self._executor, warm_up)
+                for _ in range(self.workers)
+            )
+        )
+
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(2 * self.workers)
+        self._batcher = asyncio.ensure_future(self._run_batches())
+        if path is not None:
+            return await asyncio.start_unix_server(self._handle_connection, path)
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def close(self) -> None:
+        if self._batcher is not None:
+            self._batcher.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    async def get_schedules(self, specs: List[portfolio.LoanSpec]) -> List[Schedule]:
+        return await asyncio.gather(*(self._submit(spec) for spec in specs))
+
+    def _submit(self, spec: portfolio.LoanSpec) -> "asyncio.Future[Schedule]":
+        """Returns the future schedule of the loan.
+
+        The cached schedules are returned at once, the other loans are queued,
+        unless the same loan is already being calculated.
+        """
+        key = make_key(portfolio.make_loan(spec))
+        if key in self._pending:
+            return self._pending[key]
+        future = asyncio.get_running_loop().create_future()
+        schedule = self.cache.lookup(key)
+        if schedule is not None:
+            future.set_result(schedule)
+            return future
+        self._pending[key] = future
+        self._queue.put_nowait((key, spec))
+        return future
+
+    async def _run_batches(self) -> None:
+        """Takes the queued loans in batches, as soon as a worker is free."""
+        while True:
+            batch = [await self._queue.get()]
+            await self._slots.acquire()
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            asyncio.ensure_future(self._amortize_batch(batch))
+
+    async def _amortize_batch(
+        self, batch: List[Tuple[Key, portfolio.LoanSpec]]
+    ) -> None:
+        keys = [key for key, _ in batch]
+        specs = [spec for _, spec in batch]
+        loop = asyncio.get_running_loop()
+        try:
+            schedules = await loop.run_in_executor(self._executor, amortize, specs)
+        except Exception as error:
+            for key in keys:
+                self._pending.pop(key).set_exception(error)
+            return
+        finally:
+            self._slots.release()
+        for key, schedule in zip(keys, schedules):
+            self.cache.add(key, schedule)
+            self._pending.pop(key).set_result(schedule)
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serves the requests of a connection until it is closed."""
+        try:
+            keep_alive = True
+            while keep_alive:
+                response = await self._handle_request(reader)
+                if response is None:
+                    break
+                data, keep_alive = response
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[bytes, bool]]:
+        """Returns the response and whether to keep the connection alive."""
+        try:
+            request = await read_request(reader)
+            if request is None:
+                return None
+            method, path, headers, body = request
+            keep_alive = headers.get("connection", "").lower() != "close"
+            payload = await self._dispatch(method, path, body)
+        except HTTPError as error:
+            return make_response(error.status, {"error": error.message}, False), False
+        except Exception as error:
+            message = f"Internal server error: {error!r}"
+            return make_response(500, {"error": message}, False), False
+        return make_response(200, payload, keep_alive), keep_alive
+
+    async def _dispatch(self, method: str, path: str, body: bytes) -> Any:
+        if path == "/health":
+            return {"status": "ok", "cache": self.cache.cache_info()._asdict()}
+        if path != "/schedules":
+            raise HTTPError(404, f"Unknown path: {path}")
+        if method != "POST":
+            raise HTTPError(405, "Schedules must be requested with POST")
+
+        fields = parse_json(body)
+        many = isinstance(fields, list)
+        try:
+            specs = [make_spec(item) for item in (fields if many else [fields])]
+            schedules = await self.get_schedules(specs)
+        except (ValueError, TypeError, KeyError, AttributeError) as error:
+            raise HTTPError(400, f"Invalid loan: {error}") from error
+        results = [
+            serialize_schedule(spec, rows) for spec, rows in zip(specs, schedules)
+        ]
+        return results if many else results[0]
+
+
+def make_spec(fields: Any) -> portfolio.LoanSpec:
+    """Creates the loan specification of a request.
+
+    Only the registered calendars are allowed, the calendar files of the
+    server are not read for the requests.
+    """
+    spec = portfolio.make_spec(fields)
+    if spec.calendar is not None and str(spec.calendar).upper() not in CALENDARS:
+        raise ValueError(
+            f"Invalid calendar: {spec.calendar}, use one of {', '.join(CALENDARS)}"
+        )
+    return spec
+
+
+def warm_up() -> None:
+    """Compiles the default calendar of the worker process."""
+    get_default_calendar()
+
+
+def amortize(specs: List[portfolio.LoanSpec]) -> List[Schedule]:
+    """Calculates the schedules of the loans in a worker."""
+    return [tuple(portfolio.make_loan(spec).create_loan()) for spec in specs]
+
+
+def serialize_schedule(spec: portfolio.LoanSpec, rows: Schedule) -> Dict[str, Any]:
+    return {
+        "loan_id": spec.loan_id,
+        "rows": [
+            {
+                "date": row.date.isoformat(),
+                "day": row.day,
+                "principal": row.principal,
+                "interest": row.interest,
+                "payment": row.payment,
+                "balance": row.balance,
+            }
+            for row in rows
+        ],
+    }
+
+
+def parse_json(body: bytes) -> Any:
+    try:
+        return json.loads(body)
+    except ValueError as error:
+        raise HTTPError(400, f"Invalid JSON: {error}") from error
+
+
+async def read_request(
+    reader: asyncio.StreamReader,
+) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """Reads an HTTP/1.1 request, returns None if the connection is closed."""
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, path, _ = request_line.decode("latin-1").split()
+    except ValueError as error:
+        raise HTTPError(400, "Invalid request line") from error
+
+    headers = await read_headers(reader)
+    length = get_content_length(headers)
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, headers, body
+
+
+def get_content_length(headers: Dict[str, str]) -> int:
+    """Returns the checked length of the request body."""
+    value = headers.get("content-length", "0")
+    if not (value.isascii() and value.isdigit()):
+        raise HTTPError(400, f"Invalid Content-Length: {value}")
+    length = int(value)
+    if length > MAX_BODY_SIZE:
+        raise HTTPError(413, f"Request body must not exceed {MAX_BODY_SIZE} bytes")
+    return length
+
+
+async def read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+    """Reads the header lines up to the empty line, the names are lowercase."""
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return headers
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+
+def make_response(status: int, payload: Any, keep_alive: bool = True) -> bytes:
+    body = json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+async def serve(
+    server: ScheduleServer,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    path: Optional[str] = None,
+    quiet: bool = False,
+) -> None:
+    """Runs the server until it is interrupted."""
+    listener = await server.start(host, port, path)
+    if not quiet:
+        address = path or f"http://{host}:{port}"
+        print(f"Serving loan schedules on {address}", flush=True)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.close()
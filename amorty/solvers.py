@@ -0,0 +1,180 @@
+"""Inverse calculations of annuity loans.
+
+The solvers find the rate, the term or the amount of an annuity loan that
+gives the target monthly payment, using the annuity coefficient of Annuity.
+They accept floats or NumPy arrays of the same shape, the arrays are solved
+element-wise at once.
+
+The rate is found by the Newton method with the analytic derivative of the
+annuity coefficient. The payment is a convex increasing function of the rate,
+so the iterations started above the root decrease monotonically to it and
+converge in a few steps without bracketing.
+"""
+
+import math
+from typing import Any, List
+
+from amorty import daycount
+from amorty.loan import (
+    Loan,
+    get_annuity_coefficient,
+    get_annuity_coefficient_derivative,
+)
+
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-12
+
+
+def solve_amount(payment: Any, period: Any, rate: Any) -> Any:
+    """Calculates the loan amount repaid by the monthly payment.
+
+    Args:
+        payment: monthly annuity payment
+        period: loan term in months
+        rate: annual percentage rate
+    """
+    payment, period, rate = _as_arrays(payment, period, rate)
+    _check_positive(payment=payment, period=period, rate=rate)
+    return payment / get_annuity_coefficient(rate / 1200, period)
+
+
+def solve_period(payment: Any, amount: Any, rate: Any) -> Any:
+    """Calculates the shortest term with the payment not exceeding the target.
+
+    Args:
+        payment: maximum monthly annuity payment
+        amount: loan amount
+        rate: annual percentage rate
+    Returns:
+        Loan term in months
+    """
+    payment, amount, rate = _as_arrays(payment, amount, rate)
+    _check_positive(payment=payment, amount=amount, rate=rate)
+    monthly_rate = rate / 1200
+    if not _all(payment > amount * monthly_rate):
+        raise ValueError("Payment must be greater than the monthly interest")
+    module = _get_module(payment)
+    period = -module.log(1 - amount * monthly_rate / payment) / module.log1p(
+        monthly_rate
+    )
+    # The payment of the exact term must not exceed the target because of
+    # the rounding error of the logarithms
+    return _as_int(module.ceil(period * (1 - TOLERANCE)))
+
+
+def solve_rate(payment: Any, amount: Any, period: Any) -> Any:
+    """Calculates the annual percentage rate of the monthly payment.
+
+    Args:
+        payment: monthly annuity payment
+        amount: loan amount
+        period: loan term in months
+    Returns:
+        Annual percentage rate
+    """
+    payment, amount, period = _as_arrays(payment, amount, period)
+    _check_positive(payment=payment, amount=amount, period=period)
+    if not _all(payment * period > amount):
+        raise ValueError("Payments must exceed the loan amount")
+
+    target = payment / amount
+    # The coefficient is greater than the rate, so the start is above the root
+    monthly_rate = target
+    for _ in range(MAX_ITERATIONS):
+        step = (
+            get_annuity_coefficient(monthly_rate, period) - target
+        ) / get_annuity_coefficient_derivative(monthly_rate, period)
+        monthly_rate = monthly_rate - step
+        # The steps are positive until the rounding errors of the coefficient
+        # prevail, which happens for the rates close to zero
+        if _all(step <= TOLERANCE * monthly_rate):
+            break
+    return monthly_rate * 1200
+
+
+def get_effective_rate(loan: Loan, fees: float = 0.0) -> float:
+    """Calculates the effective annual rate (APR) of the loan schedule.
+
+    The rate discounts all payments of the schedule to the loan amount less
+    the fees: amount - fees = sum(payment / (1 + APR) ** t), where t is the
+    Actual/Actual time from the date of issue to the payment in years.
+
+    Args:
+        loan: Annuity or StraightLine loan
+        fees: fees paid at the date of issue
+    Returns:
+        Effective annual percentage rate
+    """
+    if not (0 <= fees < loan.amount):
+        raise ValueError("Fees must be non-negative and less than the loan amount")
+    plan = loan.date.get_schedule_plan()
+    # The times do not depend on the day count of the interest of the loan
+    times = [daycount.year_fraction(loan.date.date, date) for date in plan.dates]
+    payments = [payment for payment, _, _, _ in loan.amortize(plan)]
+    return _solve_discount_rate(loan.amount - fees, payments, times) * 100
+
+
+def _solve_discount_rate(
+    amount: float, payments: List[float], times: List[float]
+) -> float:
+    """Solves amount = sum(payments / (1 + rate) ** times) by the Newton method.
+
+    The present value is a convex decreasing function of the rate, so the
+    iterations after the first one increase monotonically to the root.
+    """
+    rate = 0.0
+    for _ in range(MAX_ITERATIONS):
+        value = -amount
+        derivative = 0.0
+        for payment, time in zip(payments, times):
+            discounted = payment * (1 + rate) ** -time
+            value += discounted
+            derivative -= time * discounted / (1 + rate)
+        step = value / derivative
+        rate -= step
+        if abs(step) <= TOLERANCE * max(abs(rate), 1):
+            break
+    return rate
+
+
+def get_annuity_payment(amount: Any, period: Any, rate: Any) -> Any:
+    """Calculates the monthly payment, the inverse of the solvers."""
+    amount, period, rate = _as_arrays(amount, period, rate)
+    return amount * get_annuity_coefficient(rate / 1200, period)
+
+
+def _as_arrays(*values: Any) -> Any:
+    """Converts the values to float arrays, if any of them is not a number."""
+    if all(isinstance(value, (int, float)) for value in values):
+        return values
+    import numpy as np
+
+    return np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in values))
+
+
+def _get_module(value: Any) -> Any:
+    """Returns the module with the math functions for the value."""
+    if isinstance(value, (int, float)):
+        return math
+    import numpy as np
+
+    return np
+
+
+def _as_int(value: Any) -> Any:
+    if isinstance(value, (int, float)):
+        return int(value)
+    return value.astype(int)
+
+
+def _all(condition: Any) -> bool:
+    """Checks the condition of a number or of all elements of an array."""
+    if hasattr(condition, "all"):
+        return bool(condition.all())
+    return bool(condition)
+
+
+def _check_positive(**values: Any) -> None:
+    for name, value in values.items():
+        if not _all(value > 0):
+            raise ValueError(f"{name.capitalize()} must be positive number")
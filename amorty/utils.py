@@ -1,17 +1,17 @@
-import calendar
 import datetime
-import functools
-import time
-from typing import Any, Callable, Iterator, List, Sequence, TypeVar, Union
-from typing import cast
-
-from progress.bar import IncrementalBar
+import sys
+from fractions import Fraction
+from typing import Any, Iterable, Iterator, Optional, TypeVar, Union
 
 DAYS_IN_YEAR = {
     "common year": 365,
     "leap year": 366,
 }
 
+# The least common multiple of 360, 365 and 366 days, so the fractions of
+# a year of all day count conventions are exact
+YEAR_FRACTION_DENOMINATOR = 1_603_080
+
 
 def convert_date(date: Union[str, datetime.date]) -> datetime.date:
     """Convert string to datetime.date object."""
@@ -20,48 +20,98 @@ def convert_date(date: Union[str, datetime.date]) -> datetime.date:
     return date
 
 
-def convert_days_to_year(
-    day: Union[datetime.timedelta, List[datetime.timedelta]], date: datetime.date
-) -> float:
-    """Calculate the ratio of days to year depending on its type."""
-    if isinstance(day, list):
-        return (day[0].days / DAYS_IN_YEAR["common year"]) + (
-            day[1].days / DAYS_IN_YEAR["leap year"]
-        )
-    return day.days / set_year_type(date)
+def to_cents(amount: Union[int, float]) -> int:
+    """Rounds the amount half up to an integer number of cents.
+
+    The amount is taken as it is written, so 0.125 is rounded to 13 cents.
+    """
+    cents = Fraction(repr(amount)) * 100
+    return divide_half_up(cents.numerator, cents.denominator)
+
+
+def divide_half_up(numerator: int, denominator: int) -> int:
+    """Divides non-negative integers rounding half up."""
+    return (2 * numerator + denominator) // (2 * denominator)
+
+
+T = TypeVar("T")
+
+
+class Progress:
+    """Progress reporting that is turned off.
+
+    Formatters advance the progress with every written row. The subclasses
+    report it, this class does nothing.
+    """
 
+    enabled = False
 
-def set_year_type(date: datetime.date) -> int:
-    """Checks the number of days in a year for a specific date."""
-    if calendar.isleap(date.year):
-        return DAYS_IN_YEAR["leap year"]
-    return DAYS_IN_YEAR["common year"]
+    def start(self) -> None:
+        pass
 
+    def next(self, n: int = 1) -> None:
+        pass
 
-def clear_days(
-    days: Sequence[Union[datetime.timedelta, List[datetime.timedelta]]]
-) -> Iterator[int]:
-    """Search for a nested list of days and add those values."""
-    for day in days:
-        if isinstance(day, list):
-            yield (day[0] + day[1]).days
+    def finish(self) -> None:
+        pass
+
+
+class BarProgress(Progress):
+    """Progress bar in the terminal.
+
+    Shows the percentage if the total number of rows is known, otherwise
+    only counts the rows.
+    """
+
+    enabled = True
+
+    def __init__(self, message: str, total: Optional[int] = None) -> None:
+        self.message = message
+        self.total = total
+        self._bar: Any = None
+
+    def start(self) -> None:
+        from progress.bar import IncrementalBar
+        from progress.counter import Counter
+
+        if self.total:
+            self._bar = IncrementalBar(
+                self.message, max=self.total, suffix="%(percent)d%%"
+            )
         else:
-            yield day.days
+            self._bar = Counter(f"{self.message}: ")
+
+    def next(self, n: int = 1) -> None:
+        self._bar.next(n)  # noqa: B305
+
+    def finish(self) -> None:
+        self._bar.finish()
+
 
+def create_progress(
+    message: str, total: Optional[int] = None, quiet: bool = False
+) -> Progress:
+    """Creates a progress bar, if it is not quiet and stdout is a terminal."""
+    if quiet or not sys.stdout.isatty():
+        return Progress()
+    return BarProgress(message, total)
 
-F = TypeVar("F", bound=Callable[..., Any])
 
+def track(items: Iterable[T], progress: Progress) -> Iterable[T]:
+    """Advances the progress with every item.
 
-def show_progress(func: F) -> F:
-    """Makes progress bar."""
+    Returns the items as they are, if the progress is turned off.
+    """
+    if not progress.enabled:
+        return items
+    return _track(items, progress)
 
-    @functools.wraps(func)
-    def wrapper(arg: Any) -> None:
-        func(arg)
-        with IncrementalBar("Downloading", suffix="%(percent)d%%") as bar:
-            for _ in range(100):
-                time.sleep(0.01)
-                bar.next()  # noqa: B305
-        print("The file has been downloaded to 'Downloads' folder")
 
-    return cast(F, wrapper)
+def _track(items: Iterable[T], progress: Progress) -> Iterator[T]:
+    progress.start()
+    try:
+        for item in items:
+            yield item
+            progress.next()
+    finally:
+        progress.finish()
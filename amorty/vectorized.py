@@ -0,0 +1,221 @@
+"""Vectorized amortization of many loans at once.
+
+The engine computes the schedules of a whole batch of loans with NumPy and
+returns loans x periods matrices. The payment dates and the year fractions
+are calculated only once for every distinct date of issue, so the results
+follow the same calendar and day count as the scalar Loan classes.
+
+The amounts produced by the engine match the ones of Annuity and StraightLine
+within TOLERANCE (relative to the loan amount): the same floating point
+operations are applied in the same order, the difference can only come from
+the platform implementation of the power function.
+
+NumPy is an optional dependency, install it with ``pip install amorty[vectorized]``.
+"""
+
+from collections import namedtuple
+from typing import Any, Iterator, Tuple, Type, Union
+
+from amorty.date import BusinessCalendar, LoanDate
+from amorty.daycount import DayCount
+from amorty.loan import Annuity, Loan, StraightLine, get_annuity_coefficient
+
+try:
+    import numpy as np
+except ImportError as error:  # pragma: no cover
+    raise ImportError(
+        "amorty.vectorized requires NumPy, install it with "
+        "'pip install amorty[vectorized]'"
+    ) from error
+
+TOLERANCE = 1e-9
+
+VectorSchedule = namedtuple(
+    "VectorSchedule", "dates days principal interest payment balance mask"
+)
+
+
+def amortize(
+    amounts: Any,
+    rates: Any,
+    periods: Any,
+    dates: Any,
+    loan_type: Type[Loan] = Annuity,
+    calendar: Union[BusinessCalendar, str, None] = None,
+    day_count: Union[DayCount, str, None] = None,
+) -> VectorSchedule:
+    """Calculates the amortization schedules of a batch of loans.
+
+    Args:
+        amounts: loan amounts
+        rates: annual percentage rates
+        periods: loan terms in months
+        dates: dates of issue of the loans (ISO strings, datetime.date
+            or numpy.datetime64)
+        loan_type: Annuity or StraightLine
+        calendar: calendar of business days shared between loans or its name
+        day_count: day count convention or its name (Actual/Actual by default)
+    Returns:
+        VectorSchedule of loans x periods matrices. The periods after the end
+        of a shorter loan are masked out: ``mask`` is False there, the amounts
+        and the days are zeros and the dates are NaT.
+    """
+    amounts = np.asarray(amounts, dtype=np.float64)
+    rates = np.asarray(rates, dtype=np.float64)
+    periods = np.asarray(periods, dtype=np.int64)
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    _check_arguments(amounts, rates, periods, dates)
+
+    max_period = int(periods.max())
+    payment_dates, days, year_fractions = _get_schedule_plans(
+        dates, periods, max_period, calendar, day_count
+    )
+    active = np.arange(max_period)[:, np.newaxis] < periods
+    payment_dates[~active] = np.datetime64("NaT")
+    days *= active
+
+    if issubclass(loan_type, Annuity):
+        amounts_matrices = _amortize_annuity(amounts, rates, periods, year_fractions)
+    elif issubclass(loan_type, StraightLine):
+        amounts_matrices = _amortize_straight_line(
+            amounts, rates, periods, year_fractions
+        )
+    else:
+        raise ValueError(f"Unsupported loan type: {loan_type.__name__}")
+    for matrix in amounts_matrices:
+        matrix *= active
+    principal, interest, payment, balance = amounts_matrices
+    return VectorSchedule(
+        payment_dates.T,
+        days.T,
+        principal.T,
+        interest.T,
+        payment.T,
+        balance.T,
+        active.T,
+    )
+
+
+def amortize_chunks(
+    amounts: Any,
+    rates: Any,
+    periods: Any,
+    dates: Any,
+    loan_type: Type[Loan] = Annuity,
+    calendar: Union[BusinessCalendar, str, None] = None,
+    chunksize: int = 100_000,
+    day_count: Union[DayCount, str, None] = None,
+) -> Iterator[VectorSchedule]:
+    """Calculates the schedules chunk by chunk to keep the matrices small.
+
+    Yields a VectorSchedule for every ``chunksize`` consecutive loans.
+    """
+    amounts, rates, periods, dates = (
+        np.asarray(amounts),
+        np.asarray(rates),
+        np.asarray(periods),
+        np.asarray(dates),
+    )
+    for start in range(0, len(amounts), chunksize):
+        chunk = slice(start, start + chunksize)
+        yield amortize(
+            amounts[chunk],
+            rates[chunk],
+            periods[chunk],
+            dates[chunk],
+            loan_type,
+            calendar,
+            day_count,
+        )
+
+
+def _check_arguments(amounts, rates, periods, dates) -> None:
+    """Validates the arguments the same way the Loan properties do."""
+    if not amounts.ndim == rates.ndim == periods.ndim == dates.ndim == 1:
+        raise ValueError("Loan parameters must be one-dimensional arrays")
+    if not len(amounts) == len(rates) == len(periods) == len(dates) > 0:
+        raise ValueError("Loan parameters must be non-empty arrays of equal length")
+    if (amounts <= 0).any():
+        raise ValueError("Amount must be positive number")
+    if (rates <= 0).any():
+        raise ValueError("Interest rate must be positive number")
+    if (periods <= 0).any():
+        raise ValueError("Period must be positive number")
+
+
+def _get_schedule_plans(
+    dates,
+    periods,
+    max_period: int,
+    calendar: Union[BusinessCalendar, str, None],
+    day_count: Union[DayCount, str, None],
+) -> Tuple[Any, Any, Any]:
+    """Builds the payment dates, the days and the year fractions matrices.
+
+    The schedule plan is calculated once for every distinct date of issue,
+    using the longest term among the loans issued on that date. The matrices
+    are periods x loans, so that every period is a contiguous row.
+    """
+    unique_dates, inverse = np.unique(dates, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    longest_periods = np.zeros(len(unique_dates), dtype=np.int64)
+    np.maximum.at(longest_periods, inverse, periods)
+
+    shape = (max_period, len(unique_dates))
+    plan_dates = np.full(shape, np.datetime64("NaT"), dtype="datetime64[D]")
+    plan_days = np.zeros(shape, dtype=np.int64)
+    plan_year_fractions = np.zeros(shape, dtype=np.float64)
+    for index, (date, period) in enumerate(zip(unique_dates, longest_periods)):
+        loan_date = LoanDate(int(period), date.item(), calendar, day_count)
+        plan = loan_date.get_schedule_plan()
+        plan_dates[:period, index] = plan.dates
+        plan_days[:period, index] = plan.days
+        plan_year_fractions[:period, index] = plan.year_fractions
+    return (
+        plan_dates[:, inverse],
+        plan_days[:, inverse],
+        plan_year_fractions[:, inverse],
+    )
+
+
+def _amortize_annuity(amounts, rates, periods, year_fractions) -> Tuple[Any, ...]:
+    """Calculates the annuity schedules period by period for all loans."""
+    annuity_payments = amounts * get_annuity_coefficient(rates / 1200, periods)
+    interest_rates = rates / 100
+
+    principal, interest, payment, balance = _allocate(year_fractions.shape, 4)
+    balance_reminder = amounts.copy()
+    for row, year_fraction in enumerate(year_fractions):
+        accrued_interest = balance_reminder * interest_rates * year_fraction
+        current_principal = annuity_payments - accrued_interest
+        balance_reminder -= current_principal
+        last = periods == row + 1
+        current_principal[last] += balance_reminder[last]
+        balance_reminder[last] = 0
+        principal[row] = current_principal
+        interest[row] = accrued_interest
+        payment[row] = accrued_interest + current_principal
+        balance[row] = balance_reminder
+    return principal, interest, payment, balance
+
+
+def _amortize_straight_line(amounts, rates, periods, year_fractions) -> Tuple[Any, ...]:
+    """Calculates the straight-line schedules period by period for all loans."""
+    current_principal = amounts / periods
+    interest_rates = rates / 100
+
+    principal, interest, payment, balance = _allocate(year_fractions.shape, 4)
+    balance_reminder = amounts.copy()
+    for row, year_fraction in enumerate(year_fractions):
+        accrued_interest = balance_reminder * interest_rates * year_fraction
+        balance_reminder -= current_principal
+        principal[row] = current_principal
+        interest[row] = accrued_interest
+        payment[row] = current_principal + accrued_interest
+        balance[row] = balance_reminder
+    return principal, interest, payment, balance
+
+
+def _allocate(shape: Tuple[int, int], count: int) -> Tuple[Any, ...]:
+    """Allocates the periods x loans matrices filled period by period."""
+    return tuple(np.empty(shape, dtype=np.float64) for _ in range(count))
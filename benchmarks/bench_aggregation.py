@@ -0,0 +1,67 @@
+"""Benchmark of summing the cash flows of a portfolio by month and by day.
+
+Compares grouping the materialized schedule rows with the date buckets of
+amorty.aggregation, in the current process. Prints the time and the peak memory traced by tracemalloc.
+
+Run with ``python -m benchmarks.bench_aggregation [number of loans]``.
+"""
+
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+from amorty.portfolio import LoanSpec, aggregate_cash_flows, amortize_portfolio
+from benchmarks.bench_portfolio import create_portfolio
+
+DEFAULT_LOANS = 5_000
+START = "2015-01-01"
+END = "2046-12-31"
+
+
+def group_rows(specs: List[LoanSpec]) -> Dict[Any, List[float]]:
+    """Materializes all rows first, as a data frame would, then groups them."""
+    rows = [
+        row
+        for schedule in amortize_portfolio(specs, workers=1)
+        for row in schedule.rows
+    ]
+    totals: Dict[Any, List[float]] = defaultdict(lambda: [0.0, 0.0, 0.0])
+    for row in rows:
+        month_totals = totals[row.date.replace(day=1)]
+        month_totals[0] += row.principal
+        month_totals[1] += row.interest
+        month_totals[2] += row.payment
+    return totals
+
+
+def measure(name: str, function: Callable[[], Any]) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:28} {seconds:8.2f} s {peak / 1024**2:10.1f} MiB peak")
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LOANS
+    specs = create_portfolio(size)
+    # Builds the calendar before measuring
+    aggregate_cash_flows(specs[:1], START, END, workers=1)
+    print(f"{size:,} loans, {sum(spec.period for spec in specs):,} rows")
+    measure("materialized rows by month", lambda: group_rows(specs))
+    measure(
+        "buckets by month",
+        lambda: aggregate_cash_flows(specs, START, END, "month", workers=1),
+    )
+    measure(
+        "buckets by day",
+        lambda: aggregate_cash_flows(specs, START, END, "day", workers=1),
+    )
+
+
+if __name__ == "__main__":
+    main()
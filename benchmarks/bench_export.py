@@ -0,0 +1,73 @@
+"""Benchmark of exporting the schedules of a portfolio to a file per loan.
+
+Compares calculating and writing the files one after another with
+amorty.export, where the writer threads write the files while the next
+schedules are calculated. The files are written to a temporary directory.
+
+Run with ``python -m benchmarks.bench_export [number of loans] [format]``.
+"""
+
+import functools
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, List
+
+from amorty import export
+from amorty.portfolio import LoanSpec, amortize_portfolio
+from benchmarks.bench_portfolio import create_portfolio
+
+DEFAULT_LOANS = 1_000
+DEFAULT_FORMAT = "csv"
+
+
+def write_sequentially(specs: List[LoanSpec], directory: str, format_name: str) -> None:
+    format_type, extension = export.EXPORT_FORMATS[format_name]
+    for number, (_, rows) in enumerate(amortize_portfolio(specs, workers=1), 1):
+        path = os.path.join(directory, f"loan-{number}.{extension}")
+        format_type(rows, export.HEADER, path).write()
+
+
+def export_to(specs: List[LoanSpec], directory: str, **options: Any) -> None:
+    export.export_schedules(specs, directory, **options)
+
+
+def measure(name: str, size: int, function: Callable[[str], None]) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        function(directory)
+        seconds = time.perf_counter() - start
+    print(f"{name:32} {seconds:8.2f} s {size / seconds:10,.0f} files/s")
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LOANS
+    format_name = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_FORMAT
+    specs = create_portfolio(size)
+    # Builds the calendar before measuring
+    with tempfile.TemporaryDirectory() as directory:
+        write_sequentially(specs[:1], directory, format_name)
+    print(f"{size:,} loans to {format_name}, {os.cpu_count()} CPUs")
+    measure(
+        "sequential",
+        size,
+        lambda directory: write_sequentially(specs, directory, format_name),
+    )
+    cpus = os.cpu_count() or 1
+    for workers, writers in dict.fromkeys([(1, 1), (1, 4), (cpus, 4)]):
+        measure(
+            f"export, {workers} workers, {writers} writers",
+            size,
+            functools.partial(
+                export_to,
+                specs,
+                format_name=format_name,
+                workers=workers,
+                writers=writers,
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark of the output formats on a long stream of schedule rows.
+
+Writes ROWS schedule rows (the rows of a 360-month mortgage repeated) to a
+temporary file in every format and prints the time, the rows per second and
+the file size. Excel is measured on EXCEL_ROWS rows, since a worksheet is
+limited to about a million rows.
+
+Run with ``python -m benchmarks.bench_formats [rows]``.
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+import time
+from typing import Iterator, List, Type
+
+from amorty.loan import Annuity, LoanDetails
+from amorty.loan_format import (
+    CSVFormat,
+    ExcelFormat,
+    Format,
+    JSONLFormat,
+    ParquetFormat,
+    TableFormat,
+)
+
+ROWS = 10_000_000
+EXCEL_ROWS = 100_000
+HEADER = ["Date", "Days", "Principal", "Interest", "Payment", "Balance"]
+FORMATS = [
+    ("csv", CSVFormat, ROWS),
+    ("jsonl", JSONLFormat, ROWS),
+    ("parquet", ParquetFormat, ROWS),
+    ("table", TableFormat, ROWS),
+    ("xlsx", ExcelFormat, EXCEL_ROWS),
+]
+
+
+def get_rows(count: int, schedule: List[LoanDetails]) -> Iterator[LoanDetails]:
+    return itertools.islice(itertools.cycle(schedule), count)
+
+
+def measure(
+    format_type: Type[Format], path: str, count: int, schedule: List[LoanDetails]
+) -> float:
+    """Returns the time of writing the rows in seconds."""
+    start = time.perf_counter()
+    format_type(get_rows(count, schedule), HEADER, path).write()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    schedule = list(Annuity(5_000_000, 360, 7.5, "2021-08-16").create_loan())
+    with tempfile.TemporaryDirectory() as directory:
+        for name, format_type, count in FORMATS:
+            count = min(count, rows)
+            path = os.path.join(directory, f"schedule.{name}")
+            try:
+                seconds = measure(format_type, path, count, schedule)
+            except ImportError as error:
+                print(f"{name:8} skipped: {error}")
+                continue
+            size = os.path.getsize(path) / 1024**2
+            print(
+                f"{name:8} {count:>11,} rows {seconds:8.2f} s "
+                f"{count / seconds:>12,.0f} rows/s {size:9.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
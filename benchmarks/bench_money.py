@@ -0,0 +1,33 @@
+"""Benchmark of the cents mode against the float mode on 360-period loans.
+
+Run with ``python -m benchmarks.bench_money``.
+"""
+
+import timeit
+
+from amorty.loan import Annuity, StraightLine
+
+AMOUNT = 5_000_000
+PERIOD = 360
+RATE = 7.9
+DATE = "2021-08-16"
+REPEAT = 200
+
+
+def main() -> None:
+    for loan_type in (Annuity, StraightLine):
+        results = {}
+        for round_to_cents in (False, True):
+            loan = loan_type(AMOUNT, PERIOD, RATE, DATE, round_to_cents=round_to_cents)
+            loan.date.get_schedule_plan()
+            seconds = timeit.timeit(lambda: list(loan.create_loan()), number=REPEAT)
+            results[round_to_cents] = seconds / REPEAT * 1000
+        print(
+            f"{loan_type.__name__}, {PERIOD} periods: "
+            f"floats {results[False]:.3f} ms, cents {results[True]:.3f} ms "
+            f"({results[True] / results[False]:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark of amortizing a synthetic loan portfolio with worker processes.
+
+Prints the throughput for 1, 2, 4, ... workers up to the number of CPUs.
+
+Run with ``python -m benchmarks.bench_portfolio [number of loans]``.
+"""
+
+import datetime
+import os
+import random
+import sys
+import time
+from typing import List
+
+from amorty.portfolio import LoanSpec, amortize_portfolio
+
+DEFAULT_LOANS = 20_000
+
+
+def create_portfolio(size: int, seed: int = 0) -> List[LoanSpec]:
+    """Creates a reproducible portfolio of random loans."""
+    generator = random.Random(seed)
+    first_date = datetime.date(2015, 1, 1)
+    return [
+        LoanSpec(
+            amount=generator.randrange(10_000, 10_000_000),
+            period=generator.choice([12, 36, 60, 120, 240, 360]),
+            rate=generator.choice([5.5, 7.5, 9.9, 12.9, 20]),
+            date=first_date + datetime.timedelta(days=generator.randrange(3650)),
+            method=generator.choice(["annuity", "straight-line"]),
+            loan_id=index,
+        )
+        for index in range(size)
+    ]
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LOANS
+    portfolio = create_portfolio(size)
+    workers = 1
+    single = 0.0
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        for _ in amortize_portfolio(portfolio, workers=workers):
+            pass
+        seconds = time.perf_counter() - start
+        single = single or seconds
+        print(
+            f"{workers} workers: {size / seconds:,.0f} loans/s, "
+            f"speedup {single / seconds:.2f}x"
+        )
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
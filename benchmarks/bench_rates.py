@@ -0,0 +1,68 @@
+"""Benchmark of revaluing a book of floating-rate loans after a curve change.
+
+The loans of the synthetic portfolio follow a monthly key rate curve. The
+last point of the curve is changed, and the schedules are recalculated by
+apply_rate_curve, which keeps the payments before the changed resets,
+and from scratch for comparison.
+
+Run with ``python -m benchmarks.bench_rates [number of loans]``.
+"""
+
+import datetime
+import sys
+import time
+from typing import Dict, List
+
+from amorty.loan import Loan, get_loan_type
+from amorty.rates import apply_rate_curve
+from benchmarks.bench_portfolio import create_portfolio
+
+DEFAULT_LOANS = 2_000
+SPREAD = 2.5
+
+
+def create_curve(months: int = 240) -> Dict[datetime.date, float]:
+    """Creates a key rate curve with a point on the first day of every month."""
+    return {
+        datetime.date(2015 + month // 12, month % 12 + 1, 1): 7.5 + month % 24 / 4
+        for month in range(months)
+    }
+
+
+def create_loans(size: int) -> List[Loan]:
+    return [
+        get_loan_type(spec.method)(spec.amount, spec.period, spec.rate, spec.date)
+        for spec in create_portfolio(size)
+    ]
+
+
+def get_schedules(loans: List[Loan]) -> int:
+    return sum(len(list(loan.create_loan())) for loan in loans)
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_LOANS
+    curve = create_curve()
+    loans = create_loans(size)
+    apply_rate_curve(loans, curve, SPREAD)
+    start = time.perf_counter()
+    rows = get_schedules(loans)
+    print(f"{size:,} loans, {rows:,} rows: {time.perf_counter() - start:.2f} s")
+
+    last_date = max(curve)
+    changed_curve = {**curve, last_date: curve[last_date] + 1}
+    start = time.perf_counter()
+    changed = apply_rate_curve(loans, changed_curve, SPREAD)
+    get_schedules(loans)
+    seconds = time.perf_counter() - start
+    print(f"revalued {len(changed):,} changed loans: {seconds:.2f} s")
+
+    fresh_loans = create_loans(size)
+    start = time.perf_counter()
+    apply_rate_curve(fresh_loans, changed_curve, SPREAD)
+    get_schedules(fresh_loans)
+    print(f"recalculated from scratch: {time.perf_counter() - start:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
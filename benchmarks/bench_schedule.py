@@ -0,0 +1,55 @@
+"""Benchmark of building the schedule of a 360-month mortgage.
+
+Counts how many times the calendar is walked while the schedule is built and
+measures the time per loan.
+
+Run with ``python -m benchmarks.bench_schedule``.
+"""
+
+import timeit
+from collections import Counter
+from typing import Any, Callable
+
+from amorty.date import BusinessCalendar, LoanDate
+from amorty.loan import Annuity, StraightLine
+
+AMOUNT = 5_000_000
+PERIOD = 360
+RATE = 7.5
+DATE = "2021-08-16"
+REPEAT = 50
+
+
+def count_calls(counter: Counter, owner: Any, name: str) -> Callable[[], None]:
+    """Wraps the method to count its calls and returns a function restoring it."""
+    method = getattr(owner, name)
+
+    def counted(*args, **kwargs):
+        counter[f"{owner.__name__}.{name}"] += 1
+        return method(*args, **kwargs)
+
+    setattr(owner, name, counted)
+    return lambda: setattr(owner, name, method)
+
+
+def main() -> None:
+    for loan_type in (Annuity, StraightLine):
+        loan = loan_type(AMOUNT, PERIOD, RATE, DATE)
+        counter: Counter = Counter()
+        restore = [
+            count_calls(counter, LoanDate, "get_working_dates"),
+            count_calls(counter, BusinessCalendar, "next_working_day"),
+        ]
+        list(loan.create_loan())
+        for restore_method in restore:
+            restore_method()
+
+        seconds = timeit.timeit(lambda: list(loan.create_loan()), number=REPEAT)
+        print(f"{loan_type.__name__}, {PERIOD} months")
+        for name, calls in sorted(counter.items()):
+            print(f"  {name}: {calls} calls")
+        print(f"  {seconds / REPEAT * 1000:.3f} ms per loan")
+
+
+if __name__ == "__main__":
+    main()
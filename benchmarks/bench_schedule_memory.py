@@ -0,0 +1,44 @@
+"""Benchmark of the memory taken by a row of a loan schedule.
+
+Compares a tuple of LoanDetails with the columnar Schedule for a portfolio of
+360-month loans.
+
+Run with ``python -m benchmarks.bench_schedule_memory``.
+"""
+
+import tracemalloc
+from typing import Any, Callable, List
+
+from amorty.loan import Annuity
+from amorty.schedule import Schedule
+
+LOANS = 200
+PERIOD = 360
+
+
+def measure(create: Callable[[Annuity], Any], loans: List[Annuity]) -> int:
+    """Returns the bytes allocated by the schedules of the loans."""
+    tracemalloc.start()
+    schedules = [create(loan) for loan in loans]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del schedules
+    return size
+
+
+def main() -> None:
+    loans = [
+        Annuity(1_000_000 + index, PERIOD, 7.5, "2021-08-16") for index in range(LOANS)
+    ]
+    for loan in loans:
+        loan.date.get_schedule_plan()
+    rows = LOANS * PERIOD
+
+    details = measure(lambda loan: tuple(loan.create_loan()), loans)
+    columns = measure(Schedule.from_loan, loans)
+    print(f"tuple of LoanDetails: {details / rows:.1f} bytes per row")
+    print(f"Schedule:             {columns / rows:.1f} bytes per row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Load test of the schedule server.
+
+Starts ``amorty serve`` in a subprocess and sends the loans from CLIENTS
+concurrent keep-alive connections, with REPEATED_SHARE of the requests
+repeating the loans of the previous ones. Prints the latency percentiles
+and the throughput, and compares them with a CLI run per loan.
+
+Run with ``python -m benchmarks.bench_server``.
+"""
+
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+PORT = 8765
+CLIENTS = 16
+REQUESTS_PER_CLIENT = 100
+REPEATED_SHARE = 0.5
+CLI_RUNS = 5
+
+
+def make_loan(number: int) -> dict:
+    return {
+        "loan_id": str(number),
+        "amount": 10_000 + number,
+        "period": 60,
+        "rate": 12.5,
+        "date": "2021-05-15",
+    }
+
+
+async def send(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, loan: dict
+) -> float:
+    """Returns the latency of a request in milliseconds."""
+    body = json.dumps(loan).encode()
+    start = time.perf_counter()
+    writer.write(
+        f"POST /schedules HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+    status_line = await reader.readline()
+    length = 0
+    line = await reader.readline()
+    while line != b"\r\n":
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+        line = await reader.readline()
+    await reader.readexactly(length)
+    if status_line.split()[1] != b"200":
+        raise RuntimeError(status_line.decode())
+    return (time.perf_counter() - start) * 1000
+
+
+async def run_client(counter: List[int]) -> List[float]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+    latencies = []
+    for _ in range(REQUESTS_PER_CLIENT):
+        counter[0] += 1
+        if counter[0] > 1 and random.random() < REPEATED_SHARE:
+            number = random.randrange(counter[0])
+        else:
+            number = counter[0]
+        latencies.append(await send(reader, writer, make_loan(number)))
+    writer.close()
+    return latencies
+
+
+async def run_load() -> Tuple[List[float], float]:
+    counter = [0]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_client(counter) for _ in range(CLIENTS)))
+    elapsed = time.perf_counter() - start
+    return [latency for latencies in results for latency in latencies], elapsed
+
+
+def measure_cli() -> float:
+    """Returns the time of the CLI printing a schedule in milliseconds."""
+    arguments = ["-a", "10000", "-p", "60", "-r", "12.5", "-d", "2021-05-15"]
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "amorty", *arguments], capture_output=True, check=True
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def percentile(latencies: List[float], share: float) -> float:
+    return sorted(latencies)[min(int(share * len(latencies)), len(latencies) - 1)]
+
+
+def main() -> None:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "amorty", "serve", "--port", str(PORT)],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        # The server prints the address when it is ready
+        assert server.stdout is not None
+        server.stdout.readline()
+        latencies, elapsed = asyncio.run(run_load())
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(
+        f"{len(latencies)} requests from {CLIENTS} clients in {elapsed:.2f} s: "
+        f"{len(latencies) / elapsed:.0f} requests/s"
+    )
+    print(
+        f"latency p50 {percentile(latencies, 0.5):.2f} ms, "
+        f"p95 {percentile(latencies, 0.95):.2f} ms, "
+        f"p99 {percentile(latencies, 0.99):.2f} ms"
+    )
+    cli = statistics.median(measure_cli() for _ in range(CLI_RUNS))
+    print(f"CLI run per loan: {cli:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
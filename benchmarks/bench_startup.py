@@ -0,0 +1,82 @@
+"""Benchmark of the startup time of the package and of the CLI.
+
+Measures the import time of the entry points with ``python -X importtime``
+and the time of a whole CLI run printing a table. The heavy dependencies
+(xlsxwriter, progress, holidays) are imported only by the formats
+and the calendars that need them, so the imports must stay within
+IMPORT_BUDGET_MS.
+
+Run with ``python -m benchmarks.bench_startup``.
+"""
+
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+# Budget of the cumulative import time of a module, in milliseconds
+IMPORT_BUDGET_MS = 100
+MODULES = ("amorty", "amorty.__main__")
+HEAVY_MODULES = ("xlsxwriter", "progress", "holidays", "numpy")
+CLI_ARGUMENTS = ["-a", "1000", "-p", "5", "-r", "20", "-d", "2021-05-15"]
+REPEAT = 7
+
+
+def measure_import(module: str) -> float:
+    """Returns the cumulative import time of the module in milliseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # The lines are "import time: self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        _, cumulative, name = line.split("|")
+        if name.strip() == module:
+            return int(cumulative) / 1000
+    raise RuntimeError(f"{module} is not found in the import times")
+
+
+def get_imported_heavy_modules(module: str) -> List[str]:
+    """Returns the heavy dependencies imported together with the module."""
+    code = f"import sys, {module}; print(' '.join(sorted(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    modules = result.stdout.split()
+    return [name for name in HEAVY_MODULES if name in modules]
+
+
+def measure_cli() -> float:
+    """Returns the time of the CLI printing a table in milliseconds."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-m", "amorty", *CLI_ARGUMENTS],
+        capture_output=True,
+        check=True,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    exceeded = False
+    for module in MODULES:
+        milliseconds = statistics.median(measure_import(module) for _ in range(REPEAT))
+        heavy = get_imported_heavy_modules(module)
+        status = "ok" if milliseconds <= IMPORT_BUDGET_MS else "over budget"
+        exceeded = exceeded or milliseconds > IMPORT_BUDGET_MS
+        print(
+            f"import {module}: {milliseconds:.1f} ms "
+            f"(budget {IMPORT_BUDGET_MS} ms, {status}), "
+            f"heavy modules: {', '.join(heavy) or 'none'}"
+        )
+    cli = statistics.median(measure_cli() for _ in range(REPEAT))
+    print(f"amorty {' '.join(CLI_ARGUMENTS)}: {cli:.1f} ms")
+    if exceeded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Benchmark suite of the calendar, amortization and formatting hot paths.
+
+Every benchmark is a function registered with @benchmark that prepares its
+data and returns the callable to time; a benchmark with parameters is run
+once for every combination, as "name[key=value]". The time of a run is the
+best of REPEAT measurements of timeit, the benchmarks slower than
+SLOW_BENCHMARK seconds are measured once.
+
+The results are compared with the baseline stored in baseline.json: a run
+slower than the baseline by more than the threshold is measured again and,
+if it is still slower, reported as a regression making the exit status 1.
+The baseline depends on the machine, so it is to be saved again with --save
+on the machine running the suite.
+
+Run with ``python -m benchmarks.suite [-k pattern] [--save] [--threshold 0.2]``.
+"""
+
+import argparse
+import datetime
+import functools
+import itertools
+import json
+import os
+import platform
+import sys
+import timeit
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from amorty.__main__ import FORMATS
+from amorty.date import LoanDate
+from amorty.loan import Annuity, StraightLine
+from amorty.portfolio import aggregate_cash_flows, amortize_portfolio
+from benchmarks.bench_portfolio import create_portfolio
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 0.2
+REPEAT = 5
+SLOW_BENCHMARK = 5.0
+
+AMOUNT = 5_000_000
+RATE = 7.5
+DATE = "2021-08-16"
+PERIODS = [12, 60, 360]
+FORMAT_ROWS = [10_000]
+HEADER = ["Date", "Days", "Principal", "Interest", "Payment", "Balance"]
+
+Benchmark = namedtuple("Benchmark", "name function params")
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str, **params: List[Any]) -> Callable[[Callable], Callable]:
+    """Registers the function preparing the benchmark with the parameters."""
+
+    def register(function: Callable) -> Callable:
+        BENCHMARKS.append(Benchmark(name, function, params))
+        return function
+
+    return register
+
+
+@benchmark("calendar.working_dates", period=PERIODS)
+def working_dates(period: int) -> Callable[[], Any]:
+    return lambda: LoanDate(period, DATE).get_working_dates()
+
+
+@benchmark("calendar.schedule_plan", period=PERIODS)
+def schedule_plan(period: int) -> Callable[[], Any]:
+    return lambda: LoanDate(period, DATE).get_schedule_plan()
+
+
+@benchmark("loan.annuity", period=PERIODS)
+def annuity(period: int) -> Callable[[], Any]:
+    return lambda: list(Annuity(AMOUNT, period, RATE, DATE).create_loan())
+
+
+@benchmark("loan.straight_line", period=PERIODS)
+def straight_line(period: int) -> Callable[[], Any]:
+    return lambda: list(StraightLine(AMOUNT, period, RATE, DATE).create_loan())
+
+
+@benchmark("loan.annuity_cents", period=PERIODS)
+def annuity_cents(period: int) -> Callable[[], Any]:
+    return lambda: list(
+        Annuity(AMOUNT, period, RATE, DATE, round_to_cents=True).create_loan()
+    )
+
+
+@benchmark("portfolio.amortize", loans=[100_000])
+def portfolio(loans: int) -> Callable[[], Any]:
+    specs = create_portfolio(loans)
+
+    def run() -> None:
+        for _ in amortize_portfolio(specs, workers=1):
+            pass
+
+    return run
+
+
+@benchmark("portfolio.cash_flows", loans=[10_000])
+def cash_flows(loans: int) -> Callable[[], Any]:
+    specs = create_portfolio(loans)
+    return lambda: aggregate_cash_flows(specs, "2015-01-01", "2046-12-31", workers=1)
+
+
+@benchmark("format.write", format=["table", "excel", "csv"], rows=FORMAT_ROWS)
+def write_format(format: str, rows: int) -> Callable[[], Any]:
+    schedule = list(Annuity(AMOUNT, 360, RATE, DATE).create_loan())
+
+    def run() -> None:
+        loan = itertools.islice(itertools.cycle(schedule), rows)
+        FORMATS[format](loan, HEADER, os.devnull).write()
+
+    return run
+
+
+def iter_cases(pattern: Optional[str] = None) -> Iterator[Any]:
+    """Yields the names of the benchmark runs with the functions to time."""
+    for bench in BENCHMARKS:
+        keys = list(bench.params)
+        for values in itertools.product(*bench.params.values()):
+            arguments = dict(zip(keys, values))
+            labels = ",".join(f"{key}={value}" for key, value in arguments.items())
+            name = f"{bench.name}[{labels}]" if labels else bench.name
+            if pattern is None or pattern in name:
+                yield name, functools.partial(bench.function, **arguments)
+
+
+def measure(run: Callable[[], Any]) -> float:
+    """Returns the best time of a run in seconds."""
+    timer = timeit.Timer(run)
+    number, seconds = timer.autorange()
+    if seconds >= SLOW_BENCHMARK:
+        return seconds / number
+    return min(timer.repeat(REPEAT, number)) / number
+
+
+def load_baseline(path: str) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)["results"]
+
+
+def save_baseline(path: str, results: Dict[str, float]) -> None:
+    """Writes the results merged into the baseline with the machine info."""
+    merged = {**load_baseline(path), **results}
+    baseline = {
+        "saved": datetime.date.today().isoformat(),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "results": dict(sorted(merged.items())),
+    }
+    with open(path, "w") as file:
+        json.dump(baseline, file, indent=2)
+        file.write("\n")
+
+
+def compare(seconds: float, baseline: Optional[float], threshold: float) -> str:
+    if baseline is None:
+        return "new"
+    ratio = seconds / baseline
+    if ratio > 1 + threshold:
+        return f"{ratio:.2f}x REGRESSION"
+    if ratio < 1 - threshold:
+        return f"{ratio:.2f}x faster"
+    return f"{ratio:.2f}x"
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="pattern", help="Run the benchmarks matching it")
+    parser.add_argument("--save", action="store_true", help="Save the baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Share of slowdown reported as a regression (0.2 by default)",
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = create_parser().parse_args(argv)
+    baseline = load_baseline(args.baseline)
+    results = {}
+    regressions = 0
+    for name, prepare in iter_cases(args.pattern):
+        run = prepare()
+        seconds = measure(run)
+        previous = baseline.get(name)
+        if previous and seconds > previous * (1 + args.threshold):
+            # Measures a regression again not to report the noise
+            seconds = min(seconds, measure(run))
+        results[name] = seconds
+        status = compare(seconds, previous, args.threshold)
+        regressions += status.endswith("REGRESSION")
+        print(
+            f"{name:45} {format_time(seconds):>10} "
+            f"{format_time(previous) if previous else '-':>10}  {status}",
+            flush=True,
+        )
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"The baseline has been saved to '{args.baseline}'")
+    elif regressions:
+        print(f"{regressions} regressions over {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import datetime
+
+import pytest
+
+from amorty.aggregation import CashFlowBuckets
+from amorty.loan import Annuity
+from amorty.portfolio import LoanSpec, aggregate_cash_flows, amortize_portfolio
+
+
+@pytest.fixture
+def specs():
+    return [
+        LoanSpec(1000 + index, 5 + index % 7, 20, "2020-05-15", method, index)
+        for index, method in enumerate(["annuity", "straight-line"] * 10)
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_monthly_buckets(specs, workers):
+    buckets = aggregate_cash_flows(
+        specs, "2020-01-10", "2021-06-30", workers=workers, chunksize=3
+    )
+    totals = {}
+    for schedule in amortize_portfolio(specs, workers=1):
+        for row in schedule.rows:
+            month = totals.setdefault(row.date.replace(day=1), [0.0, 0.0, 0.0])
+            for index, value in enumerate((row.principal, row.interest, row.payment)):
+                month[index] += value
+    assert len(buckets) == 18
+    assert buckets.start == datetime.date(2020, 1, 1)
+    assert buckets.rows == sum(spec.period for spec in specs)
+    for month, cash_flow in buckets.items():
+        expected = totals.get(month, (0.0, 0.0, 0.0))
+        assert cash_flow == pytest.approx(expected)
+
+
+def test_daily_buckets():
+    loan = Annuity(1000, 5, 20, "2020-05-15", round_to_cents=True)
+    buckets = CashFlowBuckets("2020-05-15", "2020-12-31", frequency="day")
+    buckets.add_loan(loan)
+    rows = list(loan.create_loan())
+    assert len(buckets) == 231
+    assert [
+        (date, cash_flow.payment)
+        for date, cash_flow in buckets.items()
+        if cash_flow.payment
+    ] == [(row.date, row.payment) for row in rows]
+
+    from_rows = CashFlowBuckets("2020-05-15", "2020-12-31", frequency="day")
+    from_rows.add_rows(rows)
+    assert from_rows.interest == buckets.interest
+
+
+def test_payments_outside_of_range():
+    loan = Annuity(1000, 5, 20, "2020-05-15")
+    buckets = CashFlowBuckets("2020-07-01", "2020-08-31")
+    buckets.add_loan(loan)
+    rows = list(loan.create_loan())
+    assert buckets.outside.principal == pytest.approx(
+        sum(row.principal for row in rows if row.date.month not in (7, 8))
+    )
+    assert buckets.total().principal == pytest.approx(1000)
+    assert buckets.rows == 5
+
+
+def test_merge():
+    first = CashFlowBuckets("2020-01-01", "2020-12-31")
+    second = CashFlowBuckets("2020-01-01", "2020-12-31")
+    first.add(datetime.date(2020, 3, 5), 1.0, 2.0, 3.0)
+    second.add(datetime.date(2020, 3, 31), 1.0, 2.0, 3.0)
+    second.add(datetime.date(2021, 1, 1), 1.0, 1.0, 2.0)
+    first.merge(second)
+    assert dict(first.items())[datetime.date(2020, 3, 1)] == (2.0, 4.0, 6.0)
+    assert first.outside == (1.0, 1.0, 2.0)
+    assert first.rows == 3
+    with pytest.raises(ValueError):
+        first.merge(CashFlowBuckets("2020-01-01", "2020-12-31", frequency="day"))
+
+
+@pytest.mark.parametrize(
+    "start, end, frequency",
+    [("2021-01-01", "2020-01-01", "month"), ("2020-01-01", "2021-01-01", "week")],
+)
+def test_wrong_buckets(start, end, frequency):
+    with pytest.raises(ValueError):
+        CashFlowBuckets(start, end, frequency)
@@ -1,6 +1,12 @@
+import timeit
+
 import pytest
 
-from amorty.loan import Annuity
+from amorty.loan import (
+    Annuity,
+    get_annuity_coefficient,
+    get_annuity_coefficient_by_rate,
+)
 
 
 @pytest.fixture
@@ -59,3 +65,116 @@ def test_wrong_period(loan, expected):
 def test_wrong_rate(loan, expected):
     with pytest.raises(ValueError):
         loan.rate = expected
+
+
+@pytest.fixture
+def mortgage():
+    return Annuity(amount=3_000_000, period=360, rate=7.5, date="2020-05-15")
+
+
+@pytest.mark.parametrize("k", [1, 11, 12, 13, 200, 359, 360])
+def test_row_at(mortgage, k):
+    rows = list(mortgage.create_loan())
+    assert mortgage.row_at(k) == rows[k - 1]
+    assert mortgage.balance_at(k) == rows[k - 1].balance
+
+
+def test_balance_at_start(mortgage):
+    assert mortgage.balance_at(0) == 3_000_000
+
+
+def test_rows(mortgage):
+    rows = list(mortgage.create_loan())
+    assert list(mortgage.rows(25, 40)) == rows[24:39]
+    assert list(mortgage.rows(350)) == rows[349:]
+
+
+@pytest.mark.parametrize("k", [-1, 361, 1.5])
+def test_wrong_balance_at(mortgage, k):
+    with pytest.raises(ValueError):
+        mortgage.balance_at(k)
+
+
+def test_wrong_row_at(mortgage):
+    with pytest.raises(ValueError):
+        mortgage.row_at(0)
+
+
+def test_checkpoints_are_recalculated(loan):
+    balance = loan.balance_at(3)
+    loan.amount = 2000
+    assert loan.balance_at(3) == pytest.approx(2 * balance)
+    loan.period = 10
+    assert loan.balance_at(10) == 0
+    assert len(list(loan.create_loan())) == 10
+
+
+def test_loan_in_cents():
+    loan = Annuity(
+        amount=1000, period=5, rate=20, date="2020-05-15", round_to_cents=True
+    )
+    rows = list(loan.create_loan())
+    assert [row.payment for row in rows] == [210.11] * 4 + [210.64]
+    assert [row.interest for row in rows] == [16.94, 13.23, 11.00, 6.51, 3.40]
+    assert round(sum(row.principal for row in rows), 2) == 1000
+    assert rows[-1].balance == 0
+
+
+def test_mortgage_in_cents():
+    loan = Annuity(3_000_000, 360, 7.5, "2020-05-15", round_to_cents=True)
+    rows = list(loan.create_loan())
+    for row in rows:
+        for value in row[2:]:
+            assert value == round(value, 2)
+        assert round(row.principal + row.interest, 2) == row.payment
+    assert loan.row_at(200) == rows[199]
+    assert loan.balance_at(359) == rows[358].balance
+
+
+def test_annuity_payment_is_calculated_once(mortgage, monkeypatch):
+    payment = mortgage.get_annuity_payment()
+    monkeypatch.setattr(mortgage, "_get_annuity_coefficient", None)
+    assert len(list(mortgage.create_loan())) == 360
+    assert mortgage.get_annuity_payment() == payment
+
+
+@pytest.mark.parametrize(
+    "attribute, value", [("amount", 1000), ("rate", 10), ("period", 12)]
+)
+def test_annuity_payment_is_recalculated(mortgage, attribute, value):
+    mortgage.get_annuity_payment()
+    setattr(mortgage, attribute, value)
+    expected = Annuity(
+        mortgage.amount, mortgage.period, mortgage.rate, "2020-05-15"
+    ).get_annuity_payment()
+    assert mortgage.get_annuity_payment() == expected
+
+
+def test_annuity_coefficients_are_shared():
+    get_annuity_coefficient_by_rate.cache_clear()
+    for amount in range(1000, 2000):
+        Annuity(amount, 36, 12.9, "2021-05-15").get_annuity_payment()
+    info = get_annuity_coefficient_by_rate.cache_info()
+    assert (info.hits, info.misses) == (999, 1)
+    assert get_annuity_coefficient_by_rate(12.9, 36) == get_annuity_coefficient(
+        12.9 / 1200, 36
+    )
+
+
+def test_annuity_payment_benchmark(mortgage):
+    """The memoized payment is faster than the calculation for every period."""
+    plan = mortgage.date.get_schedule_plan()
+
+    def amortize_recalculating():
+        for year_fraction in plan.year_fractions:
+            get_annuity_coefficient(mortgage.rate / 1200, mortgage.period)
+            mortgage._calculate_accrued_interest(mortgage.amount, year_fraction)
+
+    def amortize_memoized():
+        for year_fraction in plan.year_fractions:
+            mortgage.get_annuity_payment()
+            mortgage._calculate_accrued_interest(mortgage.amount, year_fraction)
+
+    recalculating = min(timeit.repeat(amortize_recalculating, number=20, repeat=5))
+    memoized = min(timeit.repeat(amortize_memoized, number=20, repeat=5))
+    assert memoized < recalculating
@@ -1,8 +1,235 @@
 import pytest
 
-from amorty.loan import Loan
+from amorty.date import LoanDate
+from amorty import profiling
+from amorty.loan import Annuity, Loan, Prepayment, RateReset, StraightLine
 
 
 def test_create_instance_abstract_class():
     with pytest.raises(TypeError):
         Loan(amount=1000, period=5, rate=5, date="2021-08-01")
+
+
+@pytest.mark.parametrize("loan_type", [Annuity, StraightLine])
+def test_create_loan_walks_calendar_once(monkeypatch, loan_type):
+    calls = []
+    get_working_dates = LoanDate.get_working_dates
+
+    def counted_get_working_dates(self):
+        calls.append(self)
+        return get_working_dates(self)
+
+    monkeypatch.setattr(LoanDate, "get_working_dates", counted_get_working_dates)
+    loan = loan_type(amount=1000, period=360, rate=5, date="2021-08-01")
+    assert len(list(loan.create_loan())) == 360
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("loan_type", [Annuity, StraightLine])
+@pytest.mark.parametrize("round_to_cents", [False, True])
+@pytest.mark.parametrize("reduce", ["term", "payment"])
+def test_prepayment(loan_type, round_to_cents, reduce):
+    loan = loan_type(1_000_000, 360, 9.5, "2021-01-15", round_to_cents=round_to_cents)
+    rows = list(loan.create_loan())
+    prepaid = list(loan.with_prepayments([Prepayment(40, 200_000, reduce)]))
+    assert prepaid[:39] == rows[:39]
+    assert prepaid[39].principal == pytest.approx(rows[39].principal + 200_000)
+    assert prepaid[-1].balance == 0
+    assert sum(row.principal for row in prepaid) == pytest.approx(1_000_000)
+    if reduce == "term":
+        assert len(prepaid) < 360
+    else:
+        assert len(prepaid) == 360
+        assert prepaid[40].payment < rows[40].payment
+
+
+def test_prepayment_reduces_term():
+    loan = Annuity(amount=1000, period=5, rate=20, date="2021-05-15")
+    rows = list(loan.create_loan())
+    prepaid = list(loan.with_prepayments([Prepayment(1, 500)]))
+    assert len(prepaid) == 3
+    assert prepaid[0].payment == pytest.approx(rows[0].payment + 500)
+    assert prepaid[1].payment == pytest.approx(rows[0].payment)
+    assert prepaid[2].payment < rows[0].payment
+
+
+def test_prepayments_of_same_period_are_added_up():
+    loan = StraightLine(amount=5000, period=5, rate=20, date="2021-05-15")
+    once = list(loan.with_prepayments([Prepayment(2, 1000, "payment")]))
+    twice = list(
+        loan.with_prepayments([Prepayment(2, 400), Prepayment(2, 600, "payment")])
+    )
+    assert once == twice
+    assert [row.principal for row in once] == pytest.approx(
+        [1000, 2000, 2000 / 3, 2000 / 3, 2000 / 3]
+    )
+
+
+def test_prepayment_repays_loan():
+    loan = Annuity(amount=1000, period=5, rate=20, date="2021-05-15")
+    prepaid = list(loan.with_prepayments([Prepayment(2, 5000), Prepayment(4, 100)]))
+    assert len(prepaid) == 2
+    assert prepaid[-1].balance == 0
+    assert list(loan.with_prepayments([])) == list(loan.create_loan())
+
+
+def test_prepayment_reuses_schedule(monkeypatch):
+    loan = Annuity(amount=3_000_000, period=360, rate=7.5, date="2020-05-15")
+    list(loan.with_prepayments([Prepayment(100, 1000)]))
+    monkeypatch.setattr(loan, "create_loan", None)
+    list(loan.with_prepayments([Prepayment(200, 1000, "payment")]))
+
+
+@pytest.mark.parametrize(
+    "prepayment",
+    [
+        Prepayment(0, 100),
+        Prepayment(6, 100),
+        Prepayment(1, -100),
+        Prepayment(1, 100, "rate"),
+    ],
+)
+def test_wrong_prepayment(prepayment):
+    loan = Annuity(amount=1000, period=5, rate=20, date="2021-05-15")
+    with pytest.raises(ValueError):
+        loan.with_prepayments([prepayment])
+
+
+@pytest.mark.parametrize("loan_type", [Annuity, StraightLine])
+@pytest.mark.parametrize("round_to_cents", [False, True])
+def test_rate_reset(loan_type, round_to_cents):
+    loan = loan_type(
+        1_000_000,
+        120,
+        9.5,
+        "2021-01-15",
+        round_to_cents=round_to_cents,
+        rate_resets=[RateReset(61, 14)],
+    )
+    fixed = loan_type(1_000_000, 120, 9.5, "2021-01-15", round_to_cents=round_to_cents)
+    rows, fixed_rows = list(loan.create_loan()), list(fixed.create_loan())
+    assert [row.balance for row in rows[:60]] == pytest.approx(
+        [row.balance for row in fixed_rows[:60]]
+    )
+    # The rest of the balance is repaid in the remaining term at the new rate
+    rest = loan_type(rows[59].balance, 60, 14, "2026-01-15")
+    assert rows[60].payment - rows[60].interest == pytest.approx(
+        next(rest.create_loan()).principal, abs=0.01
+    )
+    assert rows[60].interest > fixed_rows[60].interest
+    assert rows[-1].balance == 0
+    assert sum(row.principal for row in rows) == pytest.approx(1_000_000)
+    assert loan.balance_at(70) == pytest.approx(rows[69].balance)
+    assert list(loan.rows(59, 63)) == rows[58:62]
+
+
+@pytest.mark.parametrize("loan_type, period", [(Annuity, 360), (StraightLine, 40)])
+@pytest.mark.parametrize("rate_resets", [[], [RateReset(20, 6)]])
+def test_small_amount_in_cents(loan_type, period, rate_resets):
+    loan = loan_type(
+        1, period, 5, "2021-01-15", round_to_cents=True, rate_resets=rate_resets
+    )
+    rows = list(loan.create_loan())
+    assert len(rows) == period
+    assert all(min(row[2:]) >= 0 for row in rows)
+    assert sum(row.principal for row in rows) == pytest.approx(1)
+    assert loan.balance_at(period - 1) == rows[-2].balance
+
+
+@pytest.mark.parametrize("rate_resets", [[], [RateReset(4, 14)]])
+def test_changed_rounding_recalculates_schedule(rate_resets):
+    loan = Annuity(1000, 12, 9.5, "2021-01-15", rate_resets=rate_resets)
+    rows = list(loan.create_loan())
+    loan.round_to_cents = True
+    rounded = list(loan.create_loan())
+    assert loan.round_to_cents
+    # The last payment repays the rounding differences of the previous ones
+    assert [row.principal for row in rounded[:-1]] == pytest.approx(
+        [row.principal for row in rows[:-1]], abs=0.01
+    )
+    assert sum(row.principal for row in rounded) == pytest.approx(1000)
+    assert rounded[-1].balance == 0
+
+
+def test_reset_to_same_rate_keeps_schedule():
+    loan = Annuity(1000, 12, 20, "2021-05-15", rate_resets=[RateReset(1, 20)])
+    fixed = Annuity(1000, 12, 20, "2021-05-15")
+    for row, fixed_row in zip(loan.create_loan(), fixed.create_loan()):
+        assert row.payment == pytest.approx(fixed_row.payment)
+        assert row.balance == pytest.approx(fixed_row.balance, abs=1e-9)
+
+
+def test_rate_resets_are_sorted():
+    loan = Annuity(1000, 12, 20, "2021-05-15")
+    loan.rate_resets = [RateReset(9, 10), RateReset(3, 15), RateReset(9, 12)]
+    assert loan.rate_resets == (RateReset(3, 15), RateReset(9, 12))
+
+
+def test_changed_reset_recalculates_later_segments():
+    loan = Annuity(1_000_000, 360, 9.5, "2021-01-15")
+    loan.rate_resets = [RateReset(period, 10) for period in range(13, 361, 12)]
+    rows = list(loan.create_loan())
+    with profiling.profile() as stats:
+        loan.rate_resets = [
+            RateReset(period, 10 if period < 300 else 12)
+            for period in range(13, 361, 12)
+        ]
+        changed_rows = list(loan.create_loan())
+    assert stats.counters["rate segments computed"] == 5
+    assert changed_rows[:300] == rows[:300]
+    assert changed_rows[300].payment > rows[300].payment
+    assert changed_rows[-1].balance == 0
+
+
+@pytest.mark.parametrize("round_to_cents", [False, True])
+def test_prepayment_with_rate_resets(round_to_cents):
+    loan = Annuity(
+        1_000_000,
+        120,
+        9.5,
+        "2021-01-15",
+        round_to_cents=round_to_cents,
+        rate_resets=[RateReset(13, 12), RateReset(61, 8)],
+    )
+    rows = list(loan.create_loan())
+    prepaid = list(loan.with_prepayments([Prepayment(30, 100_000)]))
+    assert prepaid[:29] == rows[:29]
+    assert [row.payment for row in prepaid[30:60]] == pytest.approx(
+        [row.payment for row in rows[30:60]]
+    )
+    # The installment is recalculated for the shortened term at the reset
+    assert len(prepaid) < 110
+    assert rows[60].payment < prepaid[60].payment < prepaid[59].payment
+    assert prepaid[-1].balance == 0
+    reduced = list(loan.with_prepayments([Prepayment(30, 100_000, "payment")]))
+    assert len(reduced) == 120
+    assert reduced[60].payment < rows[60].payment
+    assert reduced[-1].balance == 0
+
+
+@pytest.mark.parametrize("loan_type", [Annuity, StraightLine])
+@pytest.mark.parametrize("round_to_cents", [False, True])
+def test_reset_keeps_term_reduced_by_prepayment(loan_type, round_to_cents):
+    prepayments = [Prepayment(10, 40_000)]
+    fixed = loan_type(100_000, 60, 10, "2021-01-15", round_to_cents=round_to_cents)
+    loan = loan_type(
+        100_000,
+        60,
+        10,
+        "2021-01-15",
+        round_to_cents=round_to_cents,
+        rate_resets=[RateReset(30, 10.0001)],
+    )
+    fixed_rows = list(fixed.with_prepayments(prepayments))
+    rows = list(loan.with_prepayments(prepayments))
+    assert len(rows) == len(fixed_rows) < 60
+    assert rows[29].payment == pytest.approx(fixed_rows[29].payment, rel=1e-3)
+    assert rows[-1].balance == 0
+
+
+@pytest.mark.parametrize(
+    "reset", [RateReset(0, 10), RateReset(6, 10), RateReset(2, 0), RateReset(2, "1")]
+)
+def test_wrong_rate_reset(reset):
+    with pytest.raises(ValueError):
+        Annuity(1000, 5, 20, "2021-05-15", rate_resets=[reset])
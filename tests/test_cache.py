@@ -0,0 +1,71 @@
+import pytest
+
+from amorty.cache import ScheduleCache, SQLiteScheduleStore, make_key
+from amorty.loan import Annuity, RateReset, StraightLine
+from amorty.portfolio import LoanSpec, create_schedule
+
+
+@pytest.fixture
+def loan():
+    return Annuity(amount=1000, period=5, rate=20, date="2021-05-15")
+
+
+def test_cache_hit(loan):
+    cache = ScheduleCache()
+    schedule = cache.get_schedule(loan)
+    same_loan = Annuity(amount=1000.0, period=5, rate=20, date="2021-05-15")
+    assert cache.get_schedule(same_loan) is schedule
+    assert schedule == tuple(loan.create_loan())
+    assert cache.cache_info() == (1, 1, 1024, 1)
+
+
+def test_key_includes_loan_type(loan):
+    other_loan = StraightLine(amount=1000, period=5, rate=20, date="2021-05-15")
+    assert make_key(loan) != make_key(other_loan)
+
+
+def test_key_includes_rate_resets(loan):
+    key = make_key(loan)
+    loan.rate_resets = [RateReset(3, 10)]
+    assert make_key(loan) != key
+
+
+def test_lru_eviction():
+    cache = ScheduleCache(maxsize=2)
+    loans = [Annuity(1000 + index, 5, 20, "2021-05-15") for index in range(3)]
+    cache.get_schedule(loans[0])
+    cache.get_schedule(loans[1])
+    cache.get_schedule(loans[0])
+    cache.get_schedule(loans[2])
+    assert len(cache) == 2
+    cache.get_schedule(loans[0])
+    cache.get_schedule(loans[1])
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_clear(loan):
+    cache = ScheduleCache()
+    cache.get_schedule(loan)
+    cache.clear()
+    assert cache.cache_info() == (0, 0, 1024, 0)
+
+
+def test_sqlite_store(tmp_path, loan):
+    path = str(tmp_path / "schedules.sqlite")
+    ScheduleCache(store=SQLiteScheduleStore(path)).get_schedule(loan)
+
+    cache = ScheduleCache(store=SQLiteScheduleStore(path))
+    assert cache.get_schedule(loan) == tuple(loan.create_loan())
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_wrong_size():
+    with pytest.raises(ValueError):
+        ScheduleCache(maxsize=0)
+
+
+def test_create_schedule_from_cache():
+    cache = ScheduleCache()
+    spec = LoanSpec(1000, 5, 20, "2021-05-15")
+    assert create_schedule(spec, cache) == create_schedule(spec, cache)
+    assert cache.hits == 1
@@ -4,7 +4,15 @@ import datetime
 
 import pytest
 
-from amorty.date import LoanDate
+from amorty import date as date_module
+from amorty import daycount
+from amorty.date import (
+    BusinessCalendar,
+    LoanDate,
+    get_calendar,
+    get_default_calendar,
+    register_calendar,
+)
 
 common_dates = [
     datetime.date(2021, 8, 16),
@@ -30,27 +38,12 @@ common_dates_before_leap = [
     datetime.date(2020, 2, 17),
 ]
 
-common_days = [
-    datetime.timedelta(days=32),
-    datetime.timedelta(days=30),
-    datetime.timedelta(days=30),
-]
+# Days of the periods in common and in leap years
+common_days = [(32, 0), (30, 0), (30, 0)]
 
-leap_days_before_common = [
-    datetime.timedelta(days=30),
-    datetime.timedelta(days=32),
-    datetime.timedelta(days=29),
-    [datetime.timedelta(days=14), datetime.timedelta(days=17)],
-    datetime.timedelta(days=31),
-]
+leap_days_before_common = [(0, 30), (0, 32), (0, 29), (14, 17), (31, 0)]
 
-common_days_before_leap = [
-    datetime.timedelta(days=30),
-    datetime.timedelta(days=31),
-    datetime.timedelta(days=31),
-    [datetime.timedelta(days=16), datetime.timedelta(days=14)],
-    datetime.timedelta(days=33),
-]
+common_days_before_leap = [(30, 0), (31, 0), (31, 0), (16, 14), (0, 33)]
 
 
 def test_wrong_date_format():
@@ -104,10 +97,107 @@ def test_get_working_dates(period, date, expected):
         (5, "2019-09-15", common_days_before_leap),
     ],
 )
-def test_get_count_days(period, date, expected):
-    """Check that get_count_days returns the correct number of days.
+def test_schedule_plan_days(period, date, expected):
+    """Check that the schedule plan counts the days of the periods.
     In a common year, days during the transition from a common year to
     a leap year and from a leap year to a common year.
     """
     loan_date = LoanDate(period, date)
-    assert loan_date.get_count_days() == expected
+    plan = loan_date.get_schedule_plan()
+    periods = zip((loan_date.date,) + plan.dates, plan.dates)
+    assert [daycount.count_days(start, end) for start, end in periods] == expected
+    assert plan.days == tuple(sum(days) for days in expected)
+
+
+def test_default_calendar_is_shared():
+    """Check that loans use the same calendar instance by default."""
+    assert LoanDate(5, "2021-07-24").calendar is get_default_calendar()
+    assert LoanDate(5, "2021-07-24").calendar is LoanDate(3, "2020-01-01").calendar
+
+
+@pytest.mark.parametrize(
+    "date, expected",
+    [
+        (datetime.date(2021, 8, 2), datetime.date(2021, 8, 2)),
+        (datetime.date(2021, 7, 31), datetime.date(2021, 8, 2)),
+        (datetime.date(2021, 1, 1), datetime.date(2021, 1, 11)),
+        (datetime.date(2020, 6, 12), datetime.date(2020, 6, 15)),
+    ],
+)
+def test_next_working_day(date, expected):
+    """Check that next_working_day skips weekends and holidays."""
+    assert get_default_calendar().next_working_day(date) == expected
+
+
+def test_custom_calendar():
+    """Check that LoanDate uses the holidays of the passed calendar."""
+    holiday = datetime.date(2021, 8, 16)
+    calendar = BusinessCalendar(2021, 2022, holiday_dates=[holiday])
+    loan_date = LoanDate(1, datetime.date(2021, 7, 15), calendar)
+    assert not calendar.is_working_day(holiday)
+    assert loan_date.get_working_dates() == [datetime.date(2021, 8, 17)]
+
+
+def test_calendar_outside_of_range():
+    """Check that only weekends are skipped outside of the covered years."""
+    calendar = BusinessCalendar(2021, 2021)
+    assert calendar.next_working_day(datetime.date(2022, 1, 1)) == datetime.date(
+        2022, 1, 3
+    )
+
+
+def test_wrong_calendar_range():
+    """Check that BusinessCalendar raises an error on an empty range."""
+    with pytest.raises(ValueError):
+        BusinessCalendar(2022, 2021)
+
+
+def test_is_working_day():
+    """Check the bit set of the days off against the holidays."""
+    calendar = get_default_calendar()
+    days_off = set(calendar.non_working_days)
+    start = datetime.date(2020, 1, 1).toordinal()
+    for ordinal in range(start, start + 800):
+        date = datetime.date.fromordinal(ordinal)
+        assert calendar.is_working_day(date) == (ordinal not in days_off)
+    assert calendar.is_working_day(datetime.date(2200, 1, 1))
+    assert not calendar.is_working_day(datetime.date(2200, 1, 4))
+
+
+def test_get_calendar():
+    """Check that the registered calendars are created once."""
+    assert get_calendar("ru") is get_default_calendar()
+    weekend = get_calendar("WEEKEND")
+    assert weekend is get_calendar("weekend")
+    assert weekend.is_working_day(datetime.date(2021, 1, 1))
+    assert LoanDate(5, "2021-07-24", "WEEKEND").calendar is weekend
+
+
+def test_register_calendar(monkeypatch):
+    """Check that a registered calendar is available by its name."""
+    monkeypatch.setattr(date_module, "CALENDARS", dict(date_module.CALENDARS))
+    calendar = BusinessCalendar(2021, 2021, holiday_dates=())
+    register_calendar("test", lambda: calendar)
+    assert get_calendar("TEST") is calendar
+
+
+def test_load_calendar(tmp_path):
+    """Check that the holidays and the weekend are loaded from a file."""
+    path = tmp_path / "calendar.txt"
+    path.write_text(
+        "# Test calendar\nweekend: 4, 5\n\n2021-08-15\n2021-08-16  # Sunday\n"
+    )
+    calendar = get_calendar(str(path))
+    assert calendar is get_calendar(str(path))
+    assert calendar.weekend == {4, 5}
+    assert not calendar.is_working_day(datetime.date(2021, 8, 16))
+    assert not calendar.is_working_day(datetime.date(2021, 8, 20))
+    assert calendar.is_working_day(datetime.date(2021, 8, 22))
+    assert calendar.next_working_day(datetime.date(2021, 8, 13)) == datetime.date(
+        2021, 8, 17
+    )
+
+
+def test_wrong_calendar_name():
+    with pytest.raises(ValueError):
+        get_calendar("XX")
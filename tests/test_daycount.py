@@ -0,0 +1,116 @@
+"""Actual/Actual day count tests."""
+
+import calendar
+import datetime
+
+import pytest
+
+from amorty import daycount, utils
+from amorty.date import LoanDate
+
+
+def test_year_starts():
+    year_starts = daycount.get_year_starts()
+    for year in (1, 1900, 2000, 2020, 2021, datetime.MAXYEAR):
+        assert year_starts[year - 1] == datetime.date(year, 1, 1).toordinal()
+        days_in_year = year_starts[year] - year_starts[year - 1]
+        assert days_in_year == (366 if calendar.isleap(year) else 365)
+
+
+@pytest.mark.parametrize(
+    "start, end, expected",
+    [
+        ("2021-08-16", "2021-09-15", (30, 0)),
+        ("2020-02-15", "2020-03-16", (0, 30)),
+        ("2020-12-15", "2021-01-15", (14, 17)),
+        ("2019-12-16", "2020-01-15", (16, 14)),
+        ("2019-12-15", "2021-01-15", (31, 366)),
+        ("2021-12-15", "2022-01-17", (33, 0)),
+    ],
+)
+def test_count_days(start, end, expected):
+    start, end = utils.convert_date(start), utils.convert_date(end)
+    assert daycount.count_days(start, end) == expected
+    assert sum(days for days, _ in daycount.split_by_years(start, end)) == sum(expected)
+
+
+def test_year_fraction_over_two_boundaries():
+    start, end = datetime.date(2019, 12, 15), datetime.date(2021, 1, 15)
+    assert daycount.split_by_years(start, end) == [(17, 365), (366, 366), (14, 365)]
+    assert daycount.year_fraction(start, end) == pytest.approx(1 + 31 / 365)
+    numerator = daycount.year_fraction_numerator(start, end)
+    assert numerator == utils.YEAR_FRACTION_DENOMINATOR * (365 + 31) // 365
+
+
+def test_first_period_is_split_by_years():
+    plan = LoanDate(2, "2019-12-16").get_schedule_plan()
+    assert plan.dates[0] == datetime.date(2020, 1, 16)
+    assert plan.year_fractions[0] == 16 / 365 + 15 / 366
+
+
+def test_payment_moved_to_next_year():
+    plan = LoanDate(2, "2024-10-28").get_schedule_plan()
+    assert plan.dates == (datetime.date(2024, 11, 28), datetime.date(2025, 1, 9))
+    assert plan.year_fractions[1] == 34 / 366 + 8 / 365
+
+
+@pytest.mark.parametrize("date", ["2019-10-15", "2020-10-15", "2021-08-16"])
+def test_plan_matches_year_fractions(date):
+    loan_date = LoanDate(24, date)
+    plan = loan_date.get_schedule_plan()
+    periods = list(zip((loan_date.date,) + plan.dates, plan.dates))
+    assert plan.days == tuple((end - start).days for start, end in periods)
+    assert plan.year_fractions == tuple(
+        daycount.year_fraction(start, end) for start, end in periods
+    )
+    assert plan.year_fraction_numerators == tuple(
+        daycount.year_fraction_numerator(start, end) for start, end in periods
+    )
+
+
+@pytest.mark.parametrize(
+    "name, start, end, expected",
+    [
+        ("ACT/ACT", "2019-12-16", "2020-01-15", 16 / 365 + 14 / 366),
+        ("ACT/365F", "2020-02-15", "2020-03-16", 30 / 365),
+        ("ACT/360", "2021-08-16", "2021-09-15", 30 / 360),
+        ("30/360", "2021-01-31", "2021-02-28", 28 / 360),
+        ("30/360", "2021-01-30", "2021-03-31", 60 / 360),
+        ("30/360", "2021-02-28", "2021-03-31", 33 / 360),
+        ("30/360", "2020-12-15", "2021-01-15", 30 / 360),
+    ],
+)
+def test_day_counts(name, start, end, expected):
+    day_count = daycount.get_day_count(name.lower())
+    start, end = utils.convert_date(start), utils.convert_date(end)
+    assert day_count.name == name
+    assert day_count.year_fraction(start, end) == pytest.approx(expected)
+    numerator = day_count.year_fraction_numerator(start, end)
+    assert numerator / utils.YEAR_FRACTION_DENOMINATOR == pytest.approx(expected)
+
+
+def test_default_day_count():
+    assert daycount.get_day_count() is daycount.get_day_count("Actual/Actual")
+    assert LoanDate(5, "2021-07-24").day_count.name == "ACT/ACT"
+
+
+@pytest.mark.parametrize("name", ["ACT/364", 360])
+def test_wrong_day_count(name):
+    with pytest.raises(ValueError):
+        daycount.get_day_count(name)
+
+
+def test_register_day_count(monkeypatch):
+    monkeypatch.setattr(daycount, "DAY_COUNTS", dict(daycount.DAY_COUNTS))
+    daycount.register_day_count(daycount.ActualFixed("ACT/364", 364))
+    plan = LoanDate(1, "2021-08-16", day_count="act/364").get_schedule_plan()
+    assert plan.year_fractions == (31 / 364,)
+
+
+def test_day_count_resets_plan():
+    loan_date = LoanDate(12, "2021-08-16")
+    actual = loan_date.get_schedule_plan()
+    loan_date.day_count = "ACT/360"
+    plan = loan_date.get_schedule_plan()
+    assert plan.dates == actual.dates
+    assert plan.year_fractions == tuple(days / 360 for days in plan.days)
@@ -0,0 +1,119 @@
+import csv
+import time
+
+import pytest
+
+from amorty import export
+from amorty.export import export_schedules, get_file_name
+from amorty.loan import Annuity
+from amorty.portfolio import LoanSpec
+from amorty.utils import Progress
+
+
+class CountingProgress(Progress):
+    enabled = True
+
+    def __init__(self):
+        self.count = 0
+
+    def next(self, n=1):
+        self.count += n
+
+
+SPECS = [
+    LoanSpec(1000, 5, 20, "2020-05-15", loan_id="A-1"),
+    LoanSpec(5000, 3, 20, "2021-05-15", "straight-line"),
+    LoanSpec(2000, 12, 10, "2021-05-15", loan_id="a-1"),
+]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_export_schedules(tmp_path, workers):
+    paths = export_schedules(SPECS, str(tmp_path / "out"), workers=workers)
+    names = ["A-1.csv", "loan-2.csv", "a-1-3.csv"]
+    assert paths == [str(tmp_path / "out" / name) for name in names]
+    with open(paths[0], newline="") as file:
+        rows = list(csv.reader(file))
+    expected = list(Annuity(1000, 5, 20, "2020-05-15").create_loan())
+    assert rows[0] == list(export.HEADER)
+    assert [float(row[4]) for row in rows[1:]] == [row.payment for row in expected]
+
+
+def test_export_repeated_numbered_names(tmp_path):
+    specs = [
+        LoanSpec(1000 + index, 5, 20, "2020-05-15", loan_id=loan_id)
+        for index, loan_id in enumerate(["x-3", "x", "x"])
+    ]
+    paths = export_schedules(specs, str(tmp_path), workers=1)
+    names = ["x-3.csv", "x.csv", "x-3-2.csv"]
+    assert paths == [str(tmp_path / name) for name in names]
+    with open(paths[0], newline="") as file:
+        assert float(list(csv.reader(file))[-1][2]) == pytest.approx(
+            list(Annuity(1000, 5, 20, "2020-05-15").create_loan())[-1].principal
+        )
+
+
+@pytest.mark.parametrize("format_name", ["excel", "jsonl", "parquet"])
+def test_export_formats(tmp_path, format_name):
+    if format_name == "parquet":
+        pytest.importorskip("pyarrow")
+    paths = export_schedules(SPECS[:1], str(tmp_path), format_name, workers=1)
+    extension = export.EXPORT_FORMATS[format_name][1]
+    assert paths == [str(tmp_path / f"A-1.{extension}")]
+
+
+def test_export_waits_for_writers(tmp_path, monkeypatch):
+    format_type = export.EXPORT_FORMATS["csv"][0]
+    progress = CountingProgress()
+    taken = []
+
+    class SlowFormat(format_type):
+        def write(self):
+            if not taken:
+                time.sleep(0.2)
+                taken.append(progress.count)
+            super().write()
+
+    monkeypatch.setitem(export.EXPORT_FORMATS, "csv", (SlowFormat, "csv"))
+    specs = [LoanSpec(1000 + index, 5, 20, "2020-05-15") for index in range(10)]
+    paths = export_schedules(
+        specs, str(tmp_path), workers=1, writers=1, queue_size=2, progress=progress
+    )
+    assert len(paths) == 10
+    # The written schedule and two in the queue, the next one waits for a place
+    assert taken == [3]
+
+
+def test_export_error(tmp_path, monkeypatch):
+    format_type = export.EXPORT_FORMATS["csv"][0]
+
+    class BrokenFormat(format_type):
+        def write(self):
+            raise OSError("Disk full")
+
+    monkeypatch.setitem(export.EXPORT_FORMATS, "csv", (BrokenFormat, "csv"))
+    with pytest.raises(OSError, match="Disk full"):
+        export_schedules(SPECS * 20, str(tmp_path), workers=1, queue_size=1)
+
+
+@pytest.mark.parametrize(
+    "options", [{"format_name": "xml"}, {"writers": 0}, {"queue_size": 0}]
+)
+def test_wrong_options(tmp_path, options):
+    with pytest.raises(ValueError):
+        export_schedules(SPECS, str(tmp_path), **options)
+
+
+@pytest.mark.parametrize(
+    "loan_id, names, expected",
+    [
+        (None, set(), "loan-4.csv"),
+        ("../etc/passwd", set(), ".._etc_passwd.csv"),
+        ("..", set(), "loan-4.csv"),
+        ("Иванов И.И.", set(), "Иванов_И.И..csv"),
+        (7, {"7.csv"}, "7-4.csv"),
+        ("x", {"x.csv", "x-4.csv"}, "x-4-2.csv"),
+    ],
+)
+def test_file_name(loan_id, names, expected):
+    assert get_file_name(loan_id, 4, "csv", names) == expected
@@ -0,0 +1,49 @@
+import subprocess
+import sys
+
+import pytest
+
+import amorty
+
+HEAVY_MODULES = ["holidays", "numpy", "progress", "pyarrow", "xlsxwriter"]
+
+
+def get_imported_modules(code):
+    result = subprocess.run(
+        [sys.executable, "-c", f"{code}; import sys; print(' '.join(sys.modules))"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(result.stdout.split())
+
+
+@pytest.mark.parametrize("module", ["amorty", "amorty.__main__", "amorty.portfolio"])
+def test_heavy_modules_are_not_imported(module):
+    modules = get_imported_modules(f"import {module}")
+    assert [name for name in HEAVY_MODULES if name in modules] == []
+    assert "concurrent.futures.process" not in modules
+
+
+def test_batch_modules_are_not_imported_by_cli():
+    modules = get_imported_modules("import amorty.__main__")
+    assert "amorty.portfolio" not in modules
+    assert "amorty.export" not in modules
+    assert "threading" not in modules
+
+
+def test_holidays_are_imported_by_default_calendar():
+    modules = get_imported_modules(
+        "from amorty import Annuity; Annuity(1000, 5, 20, '2021-05-15').row_at(1)"
+    )
+    assert "holidays" in modules
+    assert "xlsxwriter" not in modules
+
+
+def test_lazy_formats():
+    from amorty.loan_format import ExcelFormat, TableFormat
+
+    assert amorty.TableFormat is TableFormat
+    assert amorty.ExcelFormat is ExcelFormat
+    with pytest.raises(AttributeError):
+        amorty.JSONFormat
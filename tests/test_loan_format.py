@@ -0,0 +1,243 @@
+import csv
+import io
+import json
+import zipfile
+
+import pytest
+
+from amorty import loan_format
+from amorty.loan import Annuity
+from amorty.loan_format import (
+    CSVFormat,
+    ExcelFormat,
+    ExcelPortfolioFormat,
+    JSONLFormat,
+    ParquetFormat,
+    TableFormat,
+    get_sheet_name,
+    iter_batches,
+)
+from amorty.portfolio import LoanSpec, create_schedule
+from amorty.utils import Progress
+
+HEADERS = ["Date", "Days", "Principal", "Interest", "Payment", "Balance"]
+
+
+@pytest.fixture
+def schedules():
+    return [
+        create_schedule(LoanSpec(1000, 5, 20, "2020-05-15", loan_id=loan_id))
+        for loan_id in ("A-1", "B/2", "A-1")
+    ]
+
+
+def get_sheets(path):
+    with zipfile.ZipFile(path) as workbook:
+        return sorted(
+            name for name in workbook.namelist() if name.startswith("xl/worksheets/")
+        )
+
+
+def read_workbook(path):
+    with zipfile.ZipFile(path) as workbook:
+        return workbook.read("xl/workbook.xml").decode()
+
+
+def test_excel_output_path(tmp_path):
+    path = tmp_path / "schedule.xlsx"
+    loan = Annuity(1000, 5, 20, "2020-05-15")
+    ExcelFormat(loan.create_loan(), HEADERS, str(path)).write()
+    assert get_sheets(path) == ["xl/worksheets/sheet1.xml"]
+
+
+def test_excel_progress(tmp_path):
+    class RowCounter(Progress):
+        enabled = True
+        rows = 0
+
+        def next(self, n=1):
+            self.rows += n
+
+    progress = RowCounter()
+    loan = Annuity(1000, 5, 20, "2020-05-15")
+    ExcelFormat(loan.create_loan(), HEADERS, str(tmp_path / "a.xlsx"), progress).write()
+    assert progress.rows == 5
+
+
+def test_excel_sheet_per_loan(tmp_path, schedules):
+    path = tmp_path / "portfolio.xlsx"
+    ExcelPortfolioFormat(schedules, HEADERS, str(path), layout="sheets").write()
+    workbook = read_workbook(path)
+    assert len(get_sheets(path)) == 3
+    assert 'name="A-1"' in workbook
+    assert 'name="B_2"' in workbook
+    assert 'name="A-1 (3)"' in workbook
+
+
+def test_excel_long_sheet(tmp_path, schedules, monkeypatch):
+    monkeypatch.setattr(loan_format, "EXCEL_MAX_ROWS", 11)
+    path = tmp_path / "portfolio.xlsx"
+    ExcelPortfolioFormat(schedules, HEADERS, str(path)).write()
+    assert len(get_sheets(path)) == 2
+
+
+@pytest.fixture
+def open_files_limit():
+    resource = pytest.importorskip("resource")
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (256, hard))
+    yield 256
+    resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+
+@pytest.mark.parametrize("layout", ["sheets", "long"])
+def test_excel_more_loans_than_open_files(tmp_path, open_files_limit, layout):
+    loan = Annuity(1000, 2, 20, "2020-05-15")
+    rows = list(loan.create_loan())
+    schedules = [(LoanSpec(1000, 2, 20, "2020-05-15"), rows)] * open_files_limit
+    formatter = ExcelPortfolioFormat(
+        schedules, HEADERS, str(tmp_path / "portfolio.xlsx"), layout=layout
+    )
+    if layout == "sheets":
+        with pytest.raises(ValueError, match="long layout"):
+            formatter.write()
+        assert not (tmp_path / "portfolio.xlsx").exists()
+    else:
+        formatter.write()
+        assert len(get_sheets(tmp_path / "portfolio.xlsx")) == 1
+
+
+def test_excel_wrong_layout(schedules):
+    with pytest.raises(ValueError):
+        ExcelPortfolioFormat(schedules, HEADERS, layout="wide")
+
+
+@pytest.mark.parametrize(
+    "loan_id, names, expected",
+    [
+        (None, set(), "Loan 4"),
+        ("x" * 40, set(), "x" * 31),
+        ("a:b", {"a_b"}, "a_b (4)"),
+        ("''", set(), "'' (4)"),
+        ("a", {"a", "a (4)", "a (4-2)"}, "a (4-3)"),
+        ("x" * 40, {"x" * 31, "x" * 27 + " (4)"}, "x" * 25 + " (4-2)"),
+    ],
+)
+def test_sheet_name(loan_id, names, expected):
+    assert get_sheet_name(loan_id, 4, names) == expected
+
+
+def test_csv(tmp_path):
+    path = tmp_path / "schedule.csv"
+    loan = Annuity(1000, 5, 20, "2020-05-15")
+    CSVFormat(loan.create_loan(), HEADERS, str(path)).write()
+    with open(path, newline="") as file:
+        rows = list(csv.reader(file))
+    expected = list(loan.create_loan())
+    assert rows[0] == HEADERS
+    assert rows[1][0] == expected[0].date.isoformat()
+    assert [float(row[4]) for row in rows[1:]] == [row.payment for row in expected]
+
+
+def test_jsonl_to_stdout(capsys):
+    loan = Annuity(1000, 5, 20, "2020-05-15")
+    JSONLFormat(loan.create_loan(), HEADERS).write()
+    rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    expected = list(loan.create_loan())
+    assert rows[0] == dict(expected[0]._asdict(), date=expected[0].date.isoformat())
+    assert [row["balance"] for row in rows] == [row.balance for row in expected]
+
+
+def test_csv_with_loan_ids(schedules):
+    output = io.StringIO()
+    CSVFormat(schedules, ["loan_id", *HEADERS], output, loan_ids=True).write()
+    rows = list(csv.reader(io.StringIO(output.getvalue())))
+    assert rows[0] == ["loan_id", *HEADERS]
+    assert [row[0] for row in rows[1:]] == ["A-1"] * 5 + ["B/2"] * 5 + ["A-1"] * 5
+    assert float(rows[-1][5]) == schedules[2].rows[-1].payment
+
+
+@pytest.mark.parametrize("loan_id", ["A-1", 'a"b', 7, None])
+def test_jsonl_with_loan_ids(loan_id):
+    schedule = create_schedule(LoanSpec(1000, 5, 20, "2020-05-15", loan_id=loan_id))
+    output = io.StringIO()
+    JSONLFormat([schedule], HEADERS, output, loan_ids=True).write()
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    expected = schedule.rows[0]
+    assert rows[0] == {
+        "loan_id": loan_id,
+        **expected._asdict(),
+        "date": expected.date.isoformat(),
+    }
+    assert len(rows) == 5
+
+
+def test_parquet(tmp_path, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(loan_format, "PARQUET_BATCH_SIZE", 2)
+    path = tmp_path / "schedule.parquet"
+    loan = Annuity(1000, 5, 20, "2020-05-15")
+    ParquetFormat(loan.create_loan(), HEADERS, str(path)).write()
+    table = pq.read_table(path)
+    expected = list(loan.create_loan())
+    assert table.column_names == list(expected[0]._fields)
+    assert table.column("date").to_pylist() == [row.date for row in expected]
+    assert table.column("payment").to_pylist() == [row.payment for row in expected]
+
+
+def test_file_objects():
+    loan = Annuity(1000, 5, 20, "2020-05-15")
+    text = io.StringIO()
+    CSVFormat(loan.create_loan(), HEADERS, text).write()
+    assert not text.closed
+    assert text.getvalue().splitlines()[0] == ",".join(HEADERS)
+    workbook = io.BytesIO()
+    ExcelFormat(loan.create_loan(), HEADERS, workbook).write()
+    assert not workbook.closed
+    assert workbook.getvalue()[:2] == b"PK"
+
+
+def test_iter_batches():
+    assert list(iter_batches(range(5), 2)) == [(0, 1), (2, 3), (4,)]
+    assert list(iter_batches([], 2)) == []
+
+
+def test_table(tmp_path):
+    path = tmp_path / "schedule.txt"
+    loan = Annuity(1000, 3, 20, "2020-05-15")
+    TableFormat(loan.create_loan(), HEADERS, str(path)).write()
+    assert path.read_text() == (
+        "==========  ======  ===========  ==========  =========  =========\n"
+        "Date          Days    Principal    Interest    Payment    Balance\n"
+        "==========  ======  ===========  ==========  =========  =========\n"
+        "2020-06-15      31       327.57       16.94     344.51     672.43\n"
+        "2020-07-15      30       333.48       11.02     344.51     338.95\n"
+        "2020-08-17      33       338.95        6.11     345.06       0.00\n"
+        "==========  ======  ===========  ==========  =========  =========\n"
+    )
+
+
+def test_table_is_streamed(capsys):
+    loan = Annuity(3_000_000, 360, 7.5, "2020-05-15")
+    written = []
+
+    def rows():
+        for row in loan.create_loan():
+            yield row
+            written.append(capsys.readouterr().out)
+
+    TableFormat(rows(), HEADERS).write()
+    lines = written[0].splitlines()
+    assert len(lines) == 4
+    assert lines[3].startswith("2020-06-15      31      1,919.06     19,057.38")
+    assert all(len(line) == len(lines[0]) for line in lines)
+    assert all(output.count("\n") == 1 for output in written[1:-1])
+
+
+def test_table_without_rows(tmp_path):
+    path = tmp_path / "schedule.txt"
+    TableFormat(iter([]), HEADERS, str(path)).write()
+    assert (
+        path.read_text().splitlines()[1]
+        == "Date          Days    Principal    Interest    Payment    Balance"
+    )
@@ -0,0 +1,174 @@
+import csv
+import io
+import json
+import subprocess
+import sys
+
+import pytest
+
+from amorty import utils
+from amorty.__main__ import main
+from amorty.loan import Annuity
+
+LOANS = """loan_id,amount,period,rate,date,method
+1,1000,5,20,2020-05-15,annuity
+2,5000,3,20,2021-05-15,straight-line
+"""
+
+
+def test_batch_files(tmp_path):
+    input_path = tmp_path / "loans.csv"
+    output_path = tmp_path / "schedules.jsonl"
+    input_path.write_text(LOANS)
+    main(["batch", "--input", str(input_path), "--output", str(output_path)])
+
+    rows = [json.loads(line) for line in output_path.read_text().splitlines()]
+    expected = list(Annuity(1000, 5, 20, "2020-05-15").create_loan())
+    assert [row["loan_id"] for row in rows] == ["1"] * 5 + ["2"] * 3
+    assert rows[0]["date"] == expected[0].date.isoformat()
+    assert rows[4]["payment"] == pytest.approx(expected[4].payment)
+
+
+def test_batch_standard_streams(monkeypatch, capsys):
+    loans = (
+        '{"loan_id": 7, "amount": 1000, "period": 2, "rate": 20, "date": "2020-05-15"}'
+    )
+    monkeypatch.setattr("sys.stdin", io.StringIO(loans))
+    main(["batch", "--input-format", "jsonl", "--output-format", "csv"])
+
+    rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+    assert [row["loan_id"] for row in rows] == ["7", "7"]
+    assert float(rows[-1]["balance"]) == 0
+
+
+def test_batch_to_closed_stdout(tmp_path):
+    loans = tmp_path / "loans.csv"
+    loans.write_text(
+        "amount,period,rate,date\n" + "1000,60,12,2020-05-15\n" * 300, "utf-8"
+    )
+    command = [sys.executable, "-m", "amorty", "batch", "-i", str(loans)]
+    process = subprocess.Popen(
+        command + ["--output-format", "csv"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    assert process.stdout.readline().startswith("loan_id,date")
+    process.stdout.close()
+    assert process.stderr.read() == ""
+    assert process.wait() == 1
+
+
+def test_batch_excel(tmp_path):
+    input_path = tmp_path / "loans.csv"
+    output_path = tmp_path / "schedules.xlsx"
+    input_path.write_text(LOANS)
+    main(
+        [
+            "batch",
+            "-i",
+            str(input_path),
+            "-o",
+            str(output_path),
+            "--excel-layout",
+            "sheets",
+        ]
+    )
+    assert output_path.exists()
+
+
+def test_batch_conventions(tmp_path):
+    input_path = tmp_path / "loans.jsonl"
+    output_path = tmp_path / "schedules.jsonl"
+    input_path.write_text(
+        '{"amount": 1000, "period": 2, "rate": 20, "date": "2021-01-01"}\n'
+        '{"amount": 1000, "period": 2, "rate": 20, "date": "2021-01-01", '
+        '"day_count": "ACT/ACT"}\n'
+    )
+    main(
+        ["batch", "-i", str(input_path), "-o", str(output_path)]
+        + ["--calendar", "WEEKEND", "--day-count", "ACT/360"]
+    )
+
+    rows = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert rows[0]["date"] == "2021-02-01"
+    assert rows[0]["interest"] == pytest.approx(1000 * 0.2 * 31 / 360)
+    assert rows[2]["interest"] == pytest.approx(1000 * 0.2 * 31 / 365)
+
+
+def test_export(tmp_path, capsys):
+    input_path = tmp_path / "loans.csv"
+    input_path.write_text(LOANS)
+    output_dir = tmp_path / "statements"
+    main(["export", "-i", str(input_path), "-o", str(output_dir), "-w", "1"])
+
+    assert sorted(path.name for path in output_dir.iterdir()) == ["1.csv", "2.csv"]
+    with open(output_dir / "2.csv", newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == ["Date", "Days", "Principal", "Interest", "Payment", "Balance"]
+    assert len(rows) == 4
+    assert "2 files have been saved" in capsys.readouterr().out
+
+
+def test_conventions(capsys):
+    main(
+        [
+            "-a",
+            "1000",
+            "-p",
+            "2",
+            "-r",
+            "20",
+            "-d",
+            "2021-01-01",
+            "--day-count",
+            "30/360",
+            "-c",
+            "weekend",
+        ]
+    )
+    output = capsys.readouterr().out
+    assert "2021-02-01" in output
+    assert "16.67" in output
+
+
+@pytest.mark.parametrize(
+    "format_name, first_line, lines_count",
+    [("csv", "Date,Days", 6), ("jsonl", "{", 5)],
+)
+def test_machine_readable_formats(capsys, format_name, first_line, lines_count):
+    main(
+        ["-a", "1000", "-p", "5", "-r", "20", "-d", "2020-05-15", "-q"]
+        + ["-f", format_name]
+    )
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith(first_line)
+    assert len(lines) == lines_count
+
+
+@pytest.mark.parametrize(
+    "options, shown", [([], False), (["-f", "csv"], False), (["-o", "table.txt"], True)]
+)
+def test_progress_only_for_files(tmp_path, monkeypatch, options, shown):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr("sys.stdout.isatty", lambda: True)
+    progresses = []
+    create_progress = utils.create_progress
+
+    def recorded_create_progress(*args):
+        progresses.append(create_progress(*args))
+        return progresses[-1]
+
+    monkeypatch.setattr(utils, "create_progress", recorded_create_progress)
+    main(["-a", "1000", "-p", "5", "-r", "20", "-d", "2020-05-15"] + options)
+    assert [progress.enabled for progress in progresses] == [shown]
+
+
+def test_wrong_format():
+    with pytest.raises(AttributeError):
+        main(["-a", "1000", "-p", "5", "-r", "20", "-d", "2020-05-15", "-f", "xml"])
+
+
+def test_wrong_method():
+    with pytest.raises(AttributeError, match="Invalid method option: bullet"):
+        main(["-a", "1000", "-p", "5", "-r", "20", "-d", "2020-05-15", "-m", "bullet"])
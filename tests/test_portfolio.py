@@ -0,0 +1,97 @@
+import datetime
+import io
+
+import pytest
+
+from amorty.loan import Annuity, StraightLine
+from amorty.portfolio import (
+    LoanSpec,
+    aggregate_cash_flows,
+    amortize_portfolio,
+    read_csv,
+    read_jsonl,
+    read_specs,
+)
+
+CSV = """loan_id,amount,period,rate,date,method
+1,1000,5,20,2020-05-15,annuity
+2,5000,5,20,2021-05-15,straight-line
+"""
+
+JSONL = """{"loan_id": 1, "amount": 1000, "period": 5, "rate": 20, "date": "2020-05-15"}
+
+{"loan_id": 2, "amount": 5000, "period": 5, "rate": 20, "date": "2021-05-15", "method": "sl"}
+"""
+
+EXPECTED_SPECS = [
+    LoanSpec(1000.0, 5, 20.0, datetime.date(2020, 5, 15), "annuity", "1"),
+    LoanSpec(5000.0, 5, 20.0, datetime.date(2021, 5, 15), "straight-line", "2"),
+]
+
+
+@pytest.fixture
+def specs():
+    return [
+        LoanSpec(1000 + index, 5 + index % 7, 20, "2020-05-15", method, index)
+        for index, method in enumerate(["annuity", "straight-line"] * 10)
+    ]
+
+
+def test_read_csv():
+    assert list(read_csv(io.StringIO(CSV))) == EXPECTED_SPECS
+
+
+def test_read_jsonl():
+    specs = list(read_jsonl(io.StringIO(JSONL)))
+    assert [spec.loan_id for spec in specs] == [1, 2]
+    assert [spec[:4] for spec in specs] == [spec[:4] for spec in EXPECTED_SPECS]
+    assert [spec.method for spec in specs] == ["annuity", "sl"]
+
+
+def test_read_specs(tmp_path):
+    path = tmp_path / "loans.csv"
+    path.write_text(CSV)
+    assert list(read_specs(str(path))) == EXPECTED_SPECS
+
+
+def test_read_unsupported_file():
+    with pytest.raises(ValueError):
+        list(read_specs("loans.xml"))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_amortize_portfolio(specs, workers):
+    schedules = list(amortize_portfolio(specs, workers=workers, chunksize=3))
+    assert [schedule.spec for schedule in schedules] == specs
+    loan = StraightLine(1001, 6, 20, "2020-05-15")
+    assert schedules[1].rows == tuple(loan.create_loan())
+
+
+def test_amortize_portfolio_unordered(specs):
+    schedules = amortize_portfolio(specs, workers=2, chunksize=3, ordered=False)
+    assert sorted(schedule.spec.loan_id for schedule in schedules) == list(range(20))
+
+
+def test_monthly_cash_flows(specs):
+    buckets = aggregate_cash_flows(
+        specs, "2020-05-01", "2021-12-31", workers=2, chunksize=3
+    )
+    rows = [
+        row
+        for schedule in amortize_portfolio(specs, workers=1)
+        for row in schedule.rows
+    ]
+    assert buckets.outside == (0.0, 0.0, 0.0)
+    assert buckets.total().interest == pytest.approx(sum(row.interest for row in rows))
+    june = dict(buckets.items())[datetime.date(2020, 6, 1)]
+    assert june.principal + june.interest == pytest.approx(june.payment)
+
+
+def test_monthly_cash_flows_of_single_loan():
+    loan = Annuity(1000, 5, 20, "2020-05-15")
+    buckets = aggregate_cash_flows(
+        [LoanSpec(1000, 5, 20, "2020-05-15")], "2020-05-01", "2020-10-31", workers=1
+    )
+    assert [
+        cash_flow.interest for _, cash_flow in buckets.items() if cash_flow.payment
+    ] == [row.interest for row in loan.create_loan()]
@@ -0,0 +1,78 @@
+import itertools
+
+import pytest
+
+from amorty import profiling
+from amorty.__main__ import main
+from amorty.cache import ScheduleCache
+from amorty.loan import Annuity
+
+
+@pytest.fixture
+def loan():
+    return Annuity(1000, 12, 10, "2021-05-15")
+
+
+def test_disabled(loan):
+    rows = iter([1, 2])
+    assert profiling.get_stats() is None
+    assert profiling.timed("amortization", rows, "periods") is rows
+    assert profiling.counted("rows", rows) is rows
+    list(loan.create_loan())
+    assert profiling.get_stats() is None
+
+
+def test_schedule_stats(loan):
+    with profiling.profile() as stats:
+        list(loan.create_loan())
+        list(loan.create_loan())
+    assert profiling.get_stats() is None
+    assert stats.counters["periods computed"] == 24
+    assert stats.counters["calendar lookups"] == 12
+    assert stats.counters["plan cache hits"] == 1
+    assert set(stats.as_dict()["times"]) == {"calendar", "amortization"}
+
+
+def test_cache_stats(loan):
+    cache = ScheduleCache()
+    with profiling.profile() as stats:
+        cache.get_schedule(loan)
+        cache.get_schedule(loan)
+    assert stats.counters["schedule cache hits"] == 1
+    assert stats.counters["schedule cache misses"] == 1
+
+
+def test_nested_stages_are_excluded(monkeypatch):
+    clock = itertools.count()
+    monkeypatch.setattr(profiling.time, "perf_counter", lambda: next(clock))
+    stats = profiling.Stats()
+    stats.start("rendering")
+    stats.start("amortization")
+    stats.stop()
+    stats.start("amortization")
+    stats.stop()
+    stats.stop()
+    assert stats.times == {"amortization": 2, "rendering": 3}
+
+
+def test_profile_restores_previous_stats():
+    with profiling.profile() as outer:
+        with profiling.profile() as inner:
+            profiling.count("rows")
+        profiling.count("rows", 2)
+    assert inner.counters["rows"] == 1
+    assert outer.counters["rows"] == 2
+
+
+def test_profile_option(capsys):
+    main(["-a", "1000", "-p", "12", "-r", "10", "-d", "2021-05-15", "-f", "csv"])
+    output = capsys.readouterr().out
+    main(
+        ["-a", "1000", "-p", "12", "-r", "10", "-d", "2021-05-15", "-f", "csv"]
+        + ["--profile"]
+    )
+    captured = capsys.readouterr()
+    assert captured.out == output
+    assert "rendering" in captured.err
+    assert "rows written" in captured.err
+    assert profiling.get_stats() is None
@@ -0,0 +1,53 @@
+import pytest
+
+from amorty import profiling
+from amorty.loan import Annuity, RateReset, StraightLine
+from amorty.rates import apply_rate_curve, get_rate_resets
+
+CURVE = {"2021-01-01": 7.5, "2021-07-26": 8.5, "2022-02-28": 20.0}
+
+
+def test_get_rate_resets():
+    loan = Annuity(1000, 24, 10, "2020-11-15")
+    resets = get_rate_resets(loan, CURVE, spread=2)
+    # The payment periods start on 2020-11-15, 2020-12-15, 2021-01-15, ...
+    assert resets == [RateReset(3, 9.5), RateReset(10, 10.5), RateReset(17, 22.0)]
+
+
+def test_get_rate_resets_every_quarter():
+    loan = Annuity(1000, 24, 10, "2020-11-15")
+    resets = get_rate_resets(loan, CURVE, spread=2, reset_every=3)
+    assert resets == [RateReset(4, 9.5), RateReset(10, 10.5), RateReset(19, 22.0)]
+
+
+def test_get_rate_resets_keeps_rate():
+    loan = Annuity(1000, 24, 9.5, "2020-11-15")
+    assert get_rate_resets(loan, {"2021-01-01": 7.5}, spread=2) == []
+    assert get_rate_resets(loan, {}) == []
+
+
+@pytest.mark.parametrize("reset_every", [0, 1.5])
+def test_wrong_reset_interval(reset_every):
+    loan = Annuity(1000, 24, 10, "2020-11-15")
+    with pytest.raises(ValueError):
+        get_rate_resets(loan, CURVE, reset_every=reset_every)
+
+
+def test_apply_rate_curve():
+    loans = [
+        Annuity(100_000, 60, 10, "2020-11-15"),
+        StraightLine(100_000, 12, 10, "2020-11-15"),
+        Annuity(100_000, 360, 10, "2019-01-10"),
+    ]
+    assert apply_rate_curve(loans, CURVE, spread=2) == loans
+    schedules = [list(loan.create_loan()) for loan in loans]
+    # The loans ended before the changed date and the payments before it are kept
+    with profiling.profile() as stats:
+        changed = apply_rate_curve(loans, {**CURVE, "2023-01-01": 16}, spread=2)
+        new_schedules = [list(loan.create_loan()) for loan in loans]
+    assert changed == [loans[0], loans[2]]
+    assert stats.counters["rate segments computed"] == 2
+    assert new_schedules[1] == schedules[1]
+    assert new_schedules[0][:26] == schedules[0][:26]
+    assert new_schedules[0][26].interest < schedules[0][26].interest
+    assert apply_rate_curve(loans, {**CURVE, "2023-01-01": 16}, spread=2) == []
@@ -0,0 +1,57 @@
+import datetime
+
+import pytest
+
+from amorty.loan import Annuity, LoanDetails, StraightLine
+from amorty.schedule import Schedule
+
+
+@pytest.fixture
+def loan():
+    return Annuity(amount=1000, period=5, rate=20, date="2020-05-15")
+
+
+@pytest.mark.parametrize("loan_type", [Annuity, StraightLine])
+def test_from_loan(loan_type):
+    loan = loan_type(amount=1000, period=5, rate=20, date="2020-05-15")
+    schedule = Schedule.from_loan(loan)
+    assert list(schedule) == list(loan.create_loan())
+    assert schedule == Schedule.from_rows(loan.create_loan())
+
+
+def test_row_views(loan):
+    schedule = Schedule.from_loan(loan)
+    rows = list(loan.create_loan())
+    assert len(schedule) == 5
+    assert schedule[0] == rows[0]
+    assert schedule[-1] == rows[-1]
+    assert isinstance(schedule[2], LoanDetails)
+    assert list(schedule[1:3]) == rows[1:3]
+
+
+def test_column_buffers(loan):
+    schedule = Schedule.from_loan(loan)
+    dates = schedule.column("date")
+    assert dates.readonly
+    assert dates.tolist()[0] == datetime.date(2020, 6, 15).toordinal()
+    assert schedule.column("payment").tolist() == [row.payment for row in schedule]
+    assert schedule.nbytes == 5 * (2 * 4 + 4 * 8)
+
+
+def test_wrong_column(loan):
+    with pytest.raises(ValueError):
+        Schedule.from_loan(loan).column("rate")
+
+
+def test_wrong_columns():
+    with pytest.raises(ValueError):
+        Schedule({"date": []})
+
+
+def test_to_numpy(loan):
+    np = pytest.importorskip("numpy")
+    schedule = Schedule.from_loan(loan)
+    columns = schedule.to_numpy()
+    assert columns["balance"][-1] == 0
+    assert columns["day"].dtype == np.intc
+    assert not columns["payment"].flags.writeable
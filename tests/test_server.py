@@ -0,0 +1,153 @@
+import asyncio
+import json
+
+import pytest
+
+from amorty.loan import Annuity
+from amorty.server import ScheduleServer
+
+LOAN = {"amount": 1000, "period": 5, "rate": 20, "date": "2020-05-15", "loan_id": "1"}
+
+
+async def request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(body)
+
+
+def run_with_server(scenario, **kwargs):
+    async def main():
+        server = ScheduleServer(workers=1, **kwargs)
+        listener = await server.start("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            return await scenario(server, port)
+        finally:
+            listener.close()
+            await server.close()
+
+    return asyncio.run(main())
+
+
+def test_schedule():
+    async def scenario(server, port):
+        return await request(port, "POST", "/schedules", LOAN)
+
+    status, schedule = run_with_server(scenario)
+    expected = list(Annuity(1000, 5, 20, "2020-05-15").create_loan())
+    assert status == 200
+    assert schedule["loan_id"] == "1"
+    assert [row["date"] for row in schedule["rows"]] == [
+        row.date.isoformat() for row in expected
+    ]
+    assert [row["payment"] for row in schedule["rows"]] == [
+        row.payment for row in expected
+    ]
+
+
+def test_concurrent_requests_are_batched_and_cached():
+    loans = [dict(LOAN, amount=amount) for amount in (1000, 2000, 3000)]
+
+    async def scenario(server, port):
+        responses = await asyncio.gather(
+            *(request(port, "POST", "/schedules", loan) for loan in loans * 4),
+            request(port, "POST", "/schedules", loans),
+        )
+        status, health = await request(port, "GET", "/health")
+        return responses, health
+
+    responses, health = run_with_server(scenario)
+    assert all(status == 200 for status, _ in responses)
+    assert [len(schedule["rows"]) for schedule in responses[-1][1]] == [5, 5, 5]
+    assert responses[0][1]["rows"][-1]["balance"] == 0
+    assert health["cache"]["currsize"] == 3
+
+
+def test_keep_alive():
+    async def scenario(server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        body = json.dumps(LOAN).encode()
+        statuses = []
+        for _ in range(3):
+            writer.write(
+                f"POST /schedules HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+                + body
+            )
+            status_line = await reader.readline()
+            headers = {}
+            line = await reader.readline()
+            while line != b"\r\n":
+                name, _, value = line.decode().partition(":")
+                headers[name.lower()] = value.strip()
+                line = await reader.readline()
+            await reader.readexactly(int(headers["content-length"]))
+            statuses.append(int(status_line.split()[1]))
+        writer.close()
+        return statuses, server.cache.cache_info()
+
+    statuses, info = run_with_server(scenario)
+    assert statuses == [200, 200, 200]
+    assert (info.hits, info.misses) == (2, 1)
+
+
+@pytest.mark.parametrize(
+    "method, path, payload, expected",
+    [
+        ("POST", "/schedules", dict(LOAN, amount=-1), 400),
+        ("POST", "/schedules", {"amount": 1000}, 400),
+        ("POST", "/schedules", None, 400),
+        ("POST", "/schedules", dict(LOAN, calendar="/etc/passwd"), 400),
+        ("POST", "/schedules", dict(LOAN, calendar="../holidays.txt"), 400),
+        ("GET", "/schedules", None, 405),
+        ("GET", "/loans", None, 404),
+    ],
+)
+def test_errors(method, path, payload, expected):
+    async def scenario(server, port):
+        return await request(port, method, path, payload)
+
+    status, response = run_with_server(scenario)
+    assert status == expected
+    assert "error" in response
+
+
+def test_calendar_file_is_not_read(tmp_path):
+    path = tmp_path / "holidays.txt"
+    path.write_text("secret\n")
+
+    async def scenario(server, port):
+        return [
+            await request(port, "POST", "/schedules", dict(LOAN, calendar=name))
+            for name in (str(path), "weekend")
+        ]
+
+    (status, response), (weekend_status, _) = run_with_server(scenario)
+    assert status == 400
+    assert "secret" not in response["error"]
+    assert weekend_status == 200
+
+
+@pytest.mark.parametrize("length", ["abc", "-1", "²"])
+def test_invalid_content_length(length):
+    async def scenario(server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(
+            f"POST /schedules HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode(
+                "latin-1"
+            )
+        )
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    response = run_with_server(scenario)
+    assert response.startswith(b"HTTP/1.1 400 ")
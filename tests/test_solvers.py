@@ -0,0 +1,112 @@
+import pytest
+
+from amorty import daycount
+from amorty.loan import Annuity, StraightLine
+from amorty.solvers import (
+    get_annuity_payment,
+    get_effective_rate,
+    solve_amount,
+    solve_period,
+    solve_rate,
+)
+
+
+@pytest.fixture
+def loan():
+    return Annuity(amount=3_000_000, period=360, rate=7.5, date="2020-05-15")
+
+
+@pytest.mark.parametrize(
+    "amount, period, rate",
+    [
+        (1000, 1, 20),
+        (1000, 5, 20),
+        (3_000_000, 360, 7.5),
+        (10_000, 12, 300),
+        (1e6, 600, 0.5),
+    ],
+)
+def test_solve_rate(amount, period, rate):
+    payment = get_annuity_payment(amount, period, rate)
+    assert solve_rate(payment, amount, period) == pytest.approx(rate, rel=1e-10)
+
+
+def test_solve_rate_close_to_zero():
+    payment = get_annuity_payment(1000, 2, 0.01)
+    assert solve_rate(payment, 1000, 2) == pytest.approx(0.01, rel=1e-6)
+
+
+def test_solve_amount(loan):
+    payment = loan.get_annuity_payment()
+    assert solve_amount(payment, 360, 7.5) == pytest.approx(3_000_000)
+
+
+def test_solve_period(loan):
+    payment = loan.get_annuity_payment()
+    assert solve_period(payment, 3_000_000, 7.5) == 360
+    assert solve_period(payment - 0.01, 3_000_000, 7.5) == 361
+    assert solve_period(25_000, 3_000_000, 7.5) == 223
+    assert get_annuity_payment(3_000_000, 223, 7.5) <= 25_000
+    assert get_annuity_payment(3_000_000, 222, 7.5) > 25_000
+
+
+@pytest.mark.parametrize(
+    "solver, arguments",
+    [
+        (solve_rate, (1000, 5000, 5)),
+        (solve_rate, (-1000, 5000, 5)),
+        (solve_period, (18_750, 3_000_000, 7.5)),
+        (solve_amount, (1000, 0, 7.5)),
+    ],
+)
+def test_wrong_arguments(solver, arguments):
+    with pytest.raises(ValueError):
+        solver(*arguments)
+
+
+def test_solvers_are_vectorized():
+    np = pytest.importorskip("numpy")
+    payments = np.linspace(21_000, 40_000, 1000)
+    rates = solve_rate(payments, 3_000_000, 360)
+    assert rates.shape == payments.shape
+    assert get_annuity_payment(3_000_000, 360, rates) == pytest.approx(payments)
+    periods = solve_period(payments, 3_000_000, np.full(1000, 7.5))
+    assert periods.dtype.kind == "i"
+    assert periods[0] == 359
+    amounts = solve_amount(payments, 360, rates)
+    assert amounts == pytest.approx(np.full(1000, 3_000_000))
+
+
+@pytest.mark.parametrize("loan_type", [Annuity, StraightLine])
+def test_effective_rate(loan_type):
+    loan = loan_type(amount=1000, period=12, rate=12, date="2021-01-15")
+    effective_rate = get_effective_rate(loan)
+    assert effective_rate == pytest.approx(100 * (1.01**12 - 1), abs=0.05)
+    assert get_effective_rate(loan, fees=10) > effective_rate
+
+
+def test_effective_rate_discounts_schedule(loan):
+    rate = get_effective_rate(loan) / 100
+    present_value = 0.0
+    time = 0.0
+    plan = loan.date.get_schedule_plan()
+    for row, year_fraction in zip(loan.create_loan(), plan.year_fractions):
+        time += year_fraction
+        present_value += row.payment / (1 + rate) ** time
+    assert present_value == pytest.approx(3_000_000)
+
+
+@pytest.mark.parametrize("day_count", ["ACT/360", "30/360"])
+def test_effective_rate_times_are_actual_actual(day_count):
+    loan = Annuity(1000, 24, 12, "2020-12-15", day_count=day_count)
+    rate = get_effective_rate(loan) / 100
+    present_value = sum(
+        row.payment / (1 + rate) ** daycount.year_fraction(loan.date.date, row.date)
+        for row in loan.create_loan()
+    )
+    assert present_value == pytest.approx(1000)
+
+
+def test_wrong_fees(loan):
+    with pytest.raises(ValueError):
+        get_effective_rate(loan, fees=3_000_000)
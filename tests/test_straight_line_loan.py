@@ -23,3 +23,22 @@ def test_loan(loan):
     assert total_interest == interest_expected
     assert total_principal == principal_expected
     assert total_payment == payment_expected
+
+
+@pytest.mark.parametrize("k, expected", [(0, 5000), (2, 3000), (5, 0)])
+def test_balance_at(loan, k, expected):
+    assert loan.balance_at(k) == pytest.approx(expected)
+
+
+def test_row_at(loan):
+    rows = list(loan.create_loan())
+    for k, row in enumerate(rows, start=1):
+        assert loan.row_at(k) == pytest.approx(row)
+
+
+def test_loan_in_cents():
+    loan = StraightLine(1000, 3, 20, "2020-05-15", round_to_cents=True)
+    rows = list(loan.create_loan())
+    assert [row.principal for row in rows] == [333.33, 333.33, 333.34]
+    assert [row.interest for row in rows] == [16.94, 10.93, 6.01]
+    assert [loan.balance_at(k) for k in range(4)] == [1000, 666.67, 333.34, 0]
@@ -2,7 +2,31 @@ import datetime
 
 import pytest
 
-from amorty.utils import convert_date, set_year_type
+from amorty.utils import (
+    BarProgress,
+    Progress,
+    convert_date,
+    create_progress,
+    divide_half_up,
+    to_cents,
+    track,
+)
+
+
+class RecordingProgress(Progress):
+    enabled = True
+
+    def __init__(self):
+        self.events = []
+
+    def start(self):
+        self.events.append("start")
+
+    def next(self, n=1):
+        self.events.append(n)
+
+    def finish(self):
+        self.events.append("finish")
 
 
 @pytest.mark.parametrize("date", [(datetime.date(2021, 9, 13)), ("2021-09-13")])
@@ -11,9 +35,35 @@ def test_convert_date(date):
     assert convert_date(date) == expected
 
 
+def test_progress_is_off_without_terminal(monkeypatch):
+    monkeypatch.setattr("sys.stdout.isatty", lambda: False)
+    assert not create_progress("Writing", 10).enabled
+
+
+def test_quiet_progress(monkeypatch):
+    monkeypatch.setattr("sys.stdout.isatty", lambda: True)
+    assert not create_progress("Writing", 10, quiet=True).enabled
+    assert isinstance(create_progress("Writing", 10), BarProgress)
+
+
+def test_track_without_progress():
+    items = [1, 2, 3]
+    assert track(items, Progress()) is items
+
+
+def test_track_advances_progress():
+    progress = RecordingProgress()
+    assert list(track("ab", progress)) == ["a", "b"]
+    assert progress.events == ["start", 1, 1, "finish"]
+
+
 @pytest.mark.parametrize(
-    "date, expected",
-    [(datetime.date(2019, 5, 23), 365), (datetime.date(2020, 7, 18), 366)],
+    "amount, expected", [(1000, 100000), (0.125, 13), (210.114, 21011), (1.005, 101)]
 )
-def test_year_type(date, expected):
-    assert set_year_type(date) == expected
+def test_to_cents(amount, expected):
+    assert to_cents(amount) == expected
+
+
+@pytest.mark.parametrize("numerator, expected", [(4, 1), (5, 1), (6, 2), (0, 0)])
+def test_divide_half_up(numerator, expected):
+    assert divide_half_up(numerator, 4) == expected
@@ -0,0 +1,60 @@
+import datetime
+
+import pytest
+
+from amorty.loan import Annuity, StraightLine
+
+np = pytest.importorskip("numpy")
+vectorized = pytest.importorskip("amorty.vectorized")
+
+AMOUNTS = [1000, 5000, 250_000, 3_000_000]
+RATES = [20, 20, 7.5, 12.9]
+PERIODS = [5, 5, 36, 360]
+DATES = ["2020-05-15", "2021-05-15", datetime.date(2019, 12, 31), "2020-05-15"]
+
+
+@pytest.mark.parametrize("loan_type", [Annuity, StraightLine])
+def test_same_as_scalar_loans(loan_type):
+    schedule = vectorized.amortize(AMOUNTS, RATES, PERIODS, DATES, loan_type)
+    for index, params in enumerate(zip(AMOUNTS, PERIODS, RATES, DATES)):
+        rows = list(loan_type(*params).create_loan())
+        active = slice(0, len(rows))
+        amount = params[0]
+        for name in ("principal", "interest", "payment", "balance"):
+            expected = [getattr(row, name) for row in rows]
+            result = getattr(schedule, name)[index, active]
+            assert result == pytest.approx(expected, abs=amount * vectorized.TOLERANCE)
+        assert list(schedule.days[index, active]) == [row.day for row in rows]
+        assert list(schedule.dates[index, active]) == [row.date for row in rows]
+
+
+def test_shorter_loans_are_masked():
+    schedule = vectorized.amortize(AMOUNTS, RATES, PERIODS, DATES)
+    assert schedule.payment.shape == (4, 360)
+    assert list(schedule.mask.sum(axis=1)) == PERIODS
+    assert not schedule.payment[0, 5:].any()
+    assert not schedule.days[0, 5:].any()
+    assert np.isnat(schedule.dates[0, 5:]).all()
+
+
+def test_chunks():
+    chunks = list(
+        vectorized.amortize_chunks(AMOUNTS, RATES, PERIODS, DATES, chunksize=3)
+    )
+    schedule = vectorized.amortize(AMOUNTS, RATES, PERIODS, DATES)
+    assert [len(chunk.payment) for chunk in chunks] == [3, 1]
+    assert (chunks[0].payment == schedule.payment[:3, :36]).all()
+
+
+@pytest.mark.parametrize(
+    "amounts, rates, periods",
+    [
+        ([1000, -1], [5, 5], [5, 5]),
+        ([1000], [0], [5]),
+        ([1000], [5], [0]),
+        ([], [], []),
+    ],
+)
+def test_wrong_parameters(amounts, rates, periods):
+    with pytest.raises(ValueError):
+        vectorized.amortize(amounts, rates, periods, ["2021-01-01"] * len(amounts))